@@ -0,0 +1,111 @@
+import heapq
+from artifact_reader import list_tables, select_artifacts
+from domains import registrable_domains
+
+DEFAULT_TOP = 20
+MAX_TOP = 1000
+
+
+def _bucket_sql(artifact):
+    """Biểu thức SQL nhóm bản ghi theo ngày và giờ (UTC) của thời gian Unix.
+
+    Dùng cùng thời điểm với dòng thời gian: cookie được tính theo lúc tạo, không theo hạn
+    dùng.
+    """
+    if artifact.timeline_unix_sql == "NULL":
+        return "NULL"
+    return f"strftime('%Y-%m-%d %H', ({artifact.timeline_unix_sql}) / 1000000, 'unixepoch')"
+
+
+def _count_order(item):
+    """Số bản ghi giảm dần rồi theo tên (NULL trước), như ORDER BY records DESC, host."""
+    name, count = item
+    return -count, name is not None, name or ""
+
+
+def _top_sites(host_counts, top):
+    """Gộp số bản ghi theo tên miền đăng ký được, kèm số host khác nhau của mỗi tên miền.
+
+    Cookie của ".ads.example.co.uk" và "www.example.co.uk" cùng thuộc "example.co.uk".
+    """
+    sites = registrable_domains(host for host, _ in host_counts)
+    counts = {}
+    hosts = {}
+    for host, count in host_counts:
+        site = sites[host]
+        counts[site] = counts.get(site, 0) + count
+        hosts[site] = hosts.get(site, 0) + 1
+    return [
+        {"site": site, "count": count, "hosts": hosts[site]}
+        for site, count in heapq.nsmallest(top, counts.items(), key=_count_order)
+    ]
+
+
+def aggregate_artifact(cursor, artifact, top=DEFAULT_TOP, where="", params=()):
+    """Thống kê một loại dữ liệu bằng GROUP BY ngay trong SQLite.
+
+    Một truy vấn đếm theo (ngày, giờ) rồi gộp thành biểu đồ theo ngày và theo giờ trong
+    ngày; một truy vấn đếm theo tên miền. Chỉ các dòng tổng hợp rời khỏi SQLite.
+    """
+    cursor.execute(
+        f"SELECT {_bucket_sql(artifact)} AS bucket, COUNT(*) "
+        f"FROM {artifact.source} WHERE {artifact.where} {where} GROUP BY bucket",
+        params,
+    )
+    total = 0
+    per_day = {}
+    per_hour = [0] * 24
+    for bucket, count in cursor.fetchall():
+        total += count
+        if bucket is None:
+            continue
+        day, hour = bucket.split(" ")
+        per_day[day] = per_day.get(day, 0) + count
+        per_hour[int(hour)] += count
+
+    top_hosts = []
+    top_sites = []
+    if artifact.host:
+        # Đếm theo mọi host một lần rồi gộp theo tên miền đăng ký được trong Python: số
+        # host khác nhau nhỏ hơn rất nhiều so với số bản ghi.
+        cursor.execute(
+            f"SELECT {artifact.host} AS host, COUNT(*) AS records "
+            f"FROM {artifact.source} WHERE {artifact.where} {where} GROUP BY host",
+            params,
+        )
+        host_counts = cursor.fetchall()
+        top_hosts = [
+            {"host": host, "count": count}
+            for host, count in heapq.nsmallest(top, host_counts, key=_count_order)
+        ]
+        top_sites = _top_sites(host_counts, top)
+
+    return {
+        "label": artifact.label,
+        "total": total,
+        "top_hosts": top_hosts,
+        "top_sites": top_sites,
+        "per_day": [{"day": day, "count": per_day[day]} for day in sorted(per_day)],
+        "per_hour": [
+            {"hour": hour, "count": count} for hour, count in enumerate(per_hour)
+        ],
+    }
+
+
+def aggregate_artifacts(
+    cursor, artifacts, db_type, data_type, top=DEFAULT_TOP, filters=None
+):
+    """Thống kê mọi loại dữ liệu được chọn, trả về (tên loại dữ liệu -> thống kê, lỗi)."""
+    results = {}
+    errors = []
+    tables = list_tables(cursor)
+    for artifact in select_artifacts(artifacts, db_type, data_type):
+        if not all(table in tables for table in artifact.tables):
+            if data_type == artifact.name:
+                errors.append(artifact.missing_error)
+            continue
+        condition = artifact.filter_sql(filters)
+        if condition is None:
+            continue
+        results[artifact.name] = aggregate_artifact(cursor, artifact, top, *condition)
+    return results, errors
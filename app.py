@@ -1,56 +1,132 @@
 import sqlite3
 import os
-import shutil
-import tempfile
-import pandas as pd
+import json
+import threading
+import itertools
 import platform
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, session
-import unicodedata
-from edge_reader import (
-    read_edge_data,
-    calculate_total_records as calculate_edge_records,
+from collections import namedtuple
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    jsonify,
+    send_file,
+    session,
+)
+from itsdangerous import BadSignature, URLSafeSerializer
+from chromium_reader import (
+    ARTIFACTS as CHROMIUM_ARTIFACTS,
+    BROWSERS as CHROMIUM_BROWSERS,
+    DB_FILES as CHROMIUM_DB_FILES,
+    get_db_path as get_chromium_db_path,
+    read_chromium_data,
+    iter_chromium_data,
+    calculate_total_records as calculate_chromium_records,
+    estimate_total_records as estimate_chromium_records,
 )
 from firefox_reader import (
+    ARTIFACTS as FIREFOX_ARTIFACTS,
+    DB_FILES as FIREFOX_DB_FILES,
+    list_profiles as list_firefox_profiles,
     read_firefox_data,
+    iter_firefox_data,
     calculate_total_records as calculate_firefox_records,
+    estimate_total_records as estimate_firefox_records,
+)
+from snapshot_cache import snapshot_cache, source_fingerprint
+from shared_cache import load_secret
+from case_store import (
+    DEFAULT_CASE_DB,
+    SEARCH_LIMIT,
+    ingest_rows,
+    open_case_store,
+    search as search_case_store,
 )
-from brave_reader import (
-    read_brave_data,
-    calculate_total_records as calculate_brave_records,
+from collector import (
+    DATA_TYPES,
+    SUPPORTED_BROWSERS,
+    get_db_type,
+    plan_tasks,
+    run_tasks,
 )
+from exporters import get_exporter, iter_csv
+from pagination import decode_cursor, page_cursors
+from filters import Filters, parse_filters
+from analytics import DEFAULT_TOP, MAX_TOP, aggregate_artifacts
+from jobs import DONE as JOB_DONE, FINISHED as JOB_FINISHED, job_queue
+from timeline import iter_timeline, read_timeline, timeline_source
+from metrics import metrics
+from responses import compress, dumps, make_etag
+from records import as_dict, to_columnar
 from datetime import datetime
 
+RECORD_COUNTERS = {
+    "chromium": (calculate_chromium_records, estimate_chromium_records),
+    "firefox": (calculate_firefox_records, estimate_firefox_records),
+}
+
+# Các cơ sở dữ liệu SQLite được gộp vào dòng thời gian của data_type "all".
+TIMELINE_SOURCES = {
+    "chromium": (CHROMIUM_ARTIFACTS, list(CHROMIUM_DB_FILES)),
+    "firefox": (
+        FIREFOX_ARTIFACTS,
+        [db_type for db_type in FIREFOX_DB_FILES if db_type != "Logins"],
+    ),
+}
+
+# Việc xuất dữ liệu chạy nền (/jobs): báo tiến độ sau mỗi khối bản ghi, luồng sự kiện
+# gửi lại trạng thái ít nhất mỗi JOB_EVENT_TIMEOUT giây để giữ kết nối.
+JOB_PROGRESS_ROWS = 5000
+JOB_EVENT_TIMEOUT = 15
+
+# Xem trước: giao diện cuộn ảo tải từng khối page_size bản ghi trong tối đa limit bản ghi.
+PREVIEW_PAGE_SIZE = 20
+MAX_PREVIEW_PAGE_SIZE = 1000
+MAX_PREVIEW_LIMIT = 100000
+# Dạng JSON của một trang: "records" (mỗi dòng một object) hoặc "columns" (tên cột một
+# lần, mỗi dòng một mảng giá trị).
+RESPONSE_SHAPES = ("records", "columns")
+
+# Tham số đã kiểm tra của một lượt xuất dữ liệu, kèm bộ xuất lấy từ get_exporter.
+ExportRequest = namedtuple(
+    "ExportRequest",
+    [
+        "browser",
+        "data_type",
+        "db_type",
+        "db_path",
+        "limit",
+        "filters",
+        "export_rows",
+        "mimetype",
+        "extension",
+        "typed",
+        "entries",
+    ],
+    defaults=(None,),
+)
+
 app = Flask(__name__)
-app.config["SECRET_KEY"] = os.urandom(32)
+# Mọi worker Gunicorn phải dùng cùng một khóa để đọc được phiên và token truy vấn của nhau:
+# lấy từ biến môi trường, nếu không có thì từ file trong thư mục bộ nhớ đệm dùng chung.
+app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY") or load_secret(
+    snapshot_cache.cache_dir / "secret_key"
+)
 app.config["SESSION_COOKIE_HTTPONLY"] = True
 app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
-
-
-def clean_string(s):
-    """Làm sạch chuỗi để tránh lỗi ký tự trong CSV."""
-    if pd.isna(s):
-        return "Không xác định"
-    s = unicodedata.normalize("NFKC", str(s))
-    return "".join(c for c in s if c.isprintable())
+app.config["CASE_DB"] = DEFAULT_CASE_DB
 
 
 def get_firefox_profile(user_home, os_type):
     """Tìm thư mục profile mặc định của Firefox."""
-    profiles_dir = {
-        "windows": user_home
-        / "AppData"
-        / "Roaming"
-        / "Mozilla"
-        / "Firefox"
-        / "Profiles",
-    }.get(os_type)
-
-    if not profiles_dir or not profiles_dir.exists():
-        return None, "Thư mục profile Firefox không tồn tại."
-
-    for profile in profiles_dir.iterdir():
-        if profile.is_dir() and (profile / "places.sqlite").exists():
+    profiles, error = list_firefox_profiles(user_home, os_type)
+    if error:
+        return None, error
+
+    for profile in profiles:
+        if (profile / "places.sqlite").exists():
             return profile, None
     return None, "Không tìm thấy profile Firefox hợp lệ."
 
@@ -65,150 +141,163 @@ def get_browser_db_path(browser, user_home, profile="Default", db_type="History"
         return None, f"Thư mục home không tồn tại: {user_home}"
 
     browser = browser.lower()
-    if browser not in ["edge", "firefox", "brave"]:
+    if browser != "firefox" and browser not in CHROMIUM_BROWSERS:
         return None, f"Trình duyệt không được hỗ trợ: {browser}"
 
     if browser == "firefox":
-        profile_dir, error = get_firefox_profile(user_home)
+        profile_dir, error = get_firefox_profile(user_home, "windows")
         if not profile_dir:
             return None, error
-        db_paths = {
-            "History": profile_dir / "places.sqlite",
-            "Cookies": profile_dir / "cookies.sqlite",
-            "Formhistory": profile_dir / "formhistory.sqlite",
-            "Logins": profile_dir / "logins.json",
-        }
-        db_path = db_paths.get(db_type)
-        if not db_path:
+        db_file = FIREFOX_DB_FILES.get(db_type)
+        if not db_file:
             return None, f"Loại cơ sở dữ liệu không được hỗ trợ cho Firefox: {db_type}"
-        return db_path, None
-
-    browser_paths = {
-        "edge": {
-            "History": user_home
-            / "AppData"
-            / "Local"
-            / "Microsoft"
-            / "Edge"
-            / "User Data"
-            / profile
-            / "History",
-            "Cookies": user_home
-            / "AppData"
-            / "Local"
-            / "Microsoft"
-            / "Edge"
-            / "User Data"
-            / profile
-            / "Network"
-            / "Cookies",
-            "Logins": user_home
-            / "AppData"
-            / "Local"
-            / "Microsoft"
-            / "Edge"
-            / "User Data"
-            / profile
-            / "Login Data",
-            "Autofill": user_home
-            / "AppData"
-            / "Local"
-            / "Microsoft"
-            / "Edge"
-            / "User Data"
-            / profile
-            / "Web Data",
-        },
-        "brave": {
-            "History": user_home
-            / "AppData"
-            / "Local"
-            / "BraveSoftware"
-            / "Brave-Browser"
-            / "User Data"
-            / profile
-            / "History",
-            "Cookies": user_home
-            / "AppData"
-            / "Local"
-            / "BraveSoftware"
-            / "Brave-Browser"
-            / "User Data"
-            / profile
-            / "Network"
-            / "Cookies",
-            "Logins": user_home
-            / "AppData"
-            / "Local"
-            / "BraveSoftware"
-            / "Brave-Browser"
-            / "User Data"
-            / profile
-            / "Login Data",
-            "Autofill": user_home
-            / "AppData"
-            / "Local"
-            / "BraveSoftware"
-            / "Brave-Browser"
-            / "User Data"
-            / profile
-            / "Web Data",
-        },
-    }
-
-    db_path = browser_paths.get(browser, {}).get(db_type)
-    if not db_path:
-        return None, f"Loại cơ sở dữ liệu không được hỗ trợ cho {browser}: {db_type}"
+        return profile_dir / db_file, None
 
-    return db_path, None
+    return get_chromium_db_path(browser, user_home, profile, db_type)
 
 
-def copy_db_to_temp(db_path):
-    """Sao chép cơ sở dữ liệu sang thư mục tạm."""
-    temp_dir = Path(tempfile.gettempdir())
-    temp_db = temp_dir / f"browser_data_{os.urandom(4).hex()}.db"
-    try:
-        shutil.copy2(db_path, temp_db)
-        return temp_db, None
-    except Exception as e:
-        return None, f"Không thể sao chép cơ sở dữ liệu: {e}"
+def record_counters(browser):
+    return RECORD_COUNTERS["firefox" if browser == "firefox" else "chromium"]
+
+
+def timeline_sources(browser):
+    return TIMELINE_SOURCES["firefox" if browser == "firefox" else "chromium"]
+
+
+def timeline_entries(browser, user_home):
+    """Các cơ sở dữ liệu có file được gộp vào dòng thời gian "all" của một trình duyệt.
+
+    Trả về (danh sách mục cho read_timeline_data, lỗi).
+    """
+    entries = []
+    for db_type in timeline_sources(browser)[1]:
+        db_path, error = get_browser_db_path(browser, user_home, db_type=db_type)
+        if not db_path:
+            return None, error
+        if db_path.exists():
+            entries.append((db_type, browser, db_type, db_path, None))
+    return entries, None
+
+
+def count_key(browser, db_type, data_type, filters=None):
+    """Khóa lưu số bản ghi đã đếm trên bản sao, tách riêng theo từng bộ lọc."""
+    return ("count", browser, db_type, data_type, filters.key() if filters else None)
+
+
+def count_records_in_background(snapshot, browser, db_type, data_type, filters=None):
+    """Đếm chính xác tổng số bản ghi trên một luồng nền và lưu vào bản sao."""
+    key = count_key(browser, db_type, data_type, filters)
+    with snapshot.lock:
+        if key in snapshot.counting:
+            return
+        snapshot.counting.add(key)
+    snapshot_cache.retain(snapshot)
+
+    def run():
+        conn = None
+        try:
+            conn = snapshot.connect()
+            calculate = record_counters(browser)[0]
+            snapshot.store_result(
+                key, calculate(conn.cursor(), db_type, data_type, filters)
+            )
+        except sqlite3.Error:
+            pass
+        finally:
+            if conn:
+                conn.close()
+            with snapshot.lock:
+                snapshot.counting.discard(key)
+            snapshot_cache.release(snapshot)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_total_records(
+    snapshot, cursor, browser, db_type, data_type, estimate=False, filters=None
+):
+    """Lấy tổng số bản ghi đã lưu cùng bản sao, chỉ đếm lần đầu. Trả về (tổng, là_ước_lượng)."""
+    key = count_key(browser, db_type, data_type, filters)
+    total = snapshot.result(key)
+    if total is not None:
+        return total, False
+
+    calculate, estimate_records = record_counters(browser)
+    if not estimate or filters:
+        # Ước lượng từ thống kê bảng không áp dụng được cho bộ lọc nên đếm chính xác.
+        total = calculate(cursor, db_type, data_type, filters)
+        return snapshot.store_result(key, total), False
+
+    count_records_in_background(snapshot, browser, db_type, data_type)
+    return estimate_records(cursor, db_type, data_type), True
 
 
 def read_browser_data(
-    db_path, db_type, browser, limit, data_type="all", page=1, items_per_page=20
+    db_path,
+    db_type,
+    browser,
+    limit,
+    data_type="all",
+    page=1,
+    items_per_page=20,
+    page_cursor=None,
+    estimate=False,
+    filters=None,
 ):
     """Đọc dữ liệu từ cơ sở dữ liệu của trình duyệt."""
     if browser == "firefox" and db_type == "Logins":
-        result = read_firefox_data(
-            db_path, db_type, None, None, limit, data_type, page, items_per_page
-        )
+        with metrics.labels(browser=browser):
+            result = read_firefox_data(
+                db_path,
+                db_type,
+                None,
+                None,
+                limit,
+                data_type,
+                page,
+                items_per_page,
+                filters=filters,
+            )
         return result
 
-    temp_db, error = copy_db_to_temp(db_path)
-    if not temp_db:
+    # Bản sao được dùng lại cho mọi trang và lượt tải xuống của cùng một file nguồn.
+    with metrics.labels(browser=browser), metrics.timed("snapshot"):
+        snapshot, error = snapshot_cache.acquire(db_path)
+    if not snapshot:
         return None, error
 
     conn = None
     cursor = None
     try:
-        conn = sqlite3.connect(temp_db)
+        conn = snapshot.connect()
         cursor = conn.cursor()
 
-        if browser == "edge":
-            all_data, errors = read_edge_data(
-                conn, cursor, db_type, limit, data_type, page, items_per_page
-            )
-            total_records = calculate_edge_records(cursor, db_type, data_type)
-        elif browser == "firefox":
-            all_data, errors = read_firefox_data(
-                db_path, db_type, conn, cursor, limit, data_type, page, items_per_page
-            )
-            total_records = calculate_firefox_records(cursor, db_type, data_type)
-        elif browser == "brave":
-            all_data, errors = read_brave_data(
-                conn, cursor, db_type, limit, data_type, page, items_per_page
-            )
-            total_records = calculate_brave_records(cursor, db_type, data_type)
+        with metrics.labels(browser=browser):
+            if browser == "firefox":
+                all_data, errors, bounds = read_firefox_data(
+                    db_path,
+                    db_type,
+                    conn,
+                    cursor,
+                    limit,
+                    data_type,
+                    page,
+                    items_per_page,
+                    page_cursor,
+                    filters,
+                )
+            else:
+                all_data, errors, bounds = read_chromium_data(
+                    conn,
+                    cursor,
+                    db_type,
+                    limit,
+                    data_type,
+                    page,
+                    items_per_page,
+                    page_cursor,
+                    filters,
+                )
 
         if not all_data and errors:
             return None, f"Không tìm thấy dữ liệu. Lỗi: {', '.join(errors)}"
@@ -218,8 +307,18 @@ def read_browser_data(
                 f"Không tìm thấy dữ liệu cho loại {data_type} trên {browser.capitalize()}.",
             )
 
+        with metrics.labels(browser=browser), metrics.timed("totals"):
+            total_records, is_estimate = get_total_records(
+                snapshot, cursor, browser, db_type, data_type, estimate, filters
+            )
+
         total_records = min(total_records, limit)
         total_pages = (total_records + items_per_page - 1) // items_per_page
+        next_cursor, prev_cursor = page_cursors(
+            bounds, page_cursor, items_per_page, page
+        )
+        if page >= total_pages and not is_estimate:
+            next_cursor = None
 
         return {
             "data": all_data,
@@ -227,6 +326,9 @@ def read_browser_data(
             "current_page": page,
             "items_per_page": items_per_page,
             "total_records": total_records,
+            "total_is_estimate": is_estimate,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
         }, None
 
     except sqlite3.Error as e:
@@ -238,11 +340,424 @@ def read_browser_data(
             cursor.close()
         if conn:
             conn.close()
-        if temp_db and os.path.exists(temp_db):
-            try:
-                os.remove(temp_db)
-            except:
-                pass
+        snapshot_cache.release(snapshot)
+
+
+def read_timeline_data(
+    entries,
+    limit,
+    page=1,
+    items_per_page=20,
+    page_cursor=None,
+    estimate=False,
+    filters=None,
+):
+    """Đọc một trang dòng thời gian gộp từ nhiều cơ sở dữ liệu.
+
+    entries là danh sách (tên nguồn, trình duyệt, loại cơ sở dữ liệu, đường dẫn, nhãn);
+    tên nguồn phải ổn định giữa các trang vì con trỏ lưu vị trí theo tên.
+    """
+    snapshots = []
+    conns = []
+    sources = []
+    total_records = 0
+    total_is_estimate = False
+    try:
+        for name, browser, db_type, db_path, label in entries:
+            with metrics.labels(browser=browser), metrics.timed("snapshot"):
+                snapshot, _ = snapshot_cache.acquire(db_path)
+            if not snapshot:
+                continue
+            snapshots.append(snapshot)
+            conn = snapshot.connect()
+            conns.append(conn)
+            cursor = conn.cursor()
+            artifacts = timeline_sources(browser)[0]
+            source = timeline_source(name, cursor, artifacts, db_type, label, filters)
+            if not source.artifacts:
+                continue
+            sources.append(source)
+            with metrics.labels(browser=browser), metrics.timed("totals"):
+                total, is_estimate = get_total_records(
+                    snapshot, cursor, browser, db_type, "all", estimate, filters
+                )
+            total_records += total
+            total_is_estimate = total_is_estimate or is_estimate
+
+        if not sources:
+            return None, "Không tìm thấy dữ liệu."
+        all_data, next_cursor, prev_cursor = read_timeline(
+            sources, items_per_page, page_cursor, page
+        )
+        if not all_data:
+            return None, "Không tìm thấy dữ liệu."
+
+        total_records = min(total_records, limit)
+        total_pages = (total_records + items_per_page - 1) // items_per_page
+        if page >= total_pages and not total_is_estimate:
+            next_cursor = None
+
+        return {
+            "data": all_data,
+            "total_pages": total_pages,
+            "current_page": page,
+            "items_per_page": items_per_page,
+            "total_records": total_records,
+            "total_is_estimate": total_is_estimate,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }, None
+
+    except sqlite3.Error as e:
+        return None, f"Lỗi cơ sở dữ liệu: {e}"
+    except Exception as e:
+        return None, f"Lỗi không xác định: {e}"
+    finally:
+        for conn in conns:
+            conn.close()
+        for snapshot in snapshots:
+            snapshot_cache.release(snapshot)
+
+
+def read_analytics(entries, browser, data_type, top=DEFAULT_TOP, filters=None):
+    """Thống kê các cơ sở dữ liệu (loại cơ sở dữ liệu, đường dẫn) của một trình duyệt.
+
+    Kết quả được lưu trên bản sao theo tham số nên chỉ tính lại khi file nguồn thay đổi.
+    """
+    results = {}
+    errors = []
+    artifacts = timeline_sources(browser)[0]
+    for db_type, db_path in entries:
+        with metrics.labels(browser=browser), metrics.timed("snapshot"):
+            snapshot, error = snapshot_cache.acquire(db_path)
+        if not snapshot:
+            errors.append(error)
+            continue
+        key = (
+            "analytics",
+            browser,
+            db_type,
+            data_type,
+            top,
+            filters.key() if filters else None,
+        )
+        conn = None
+        try:
+            cached = snapshot.result(key)
+            if cached is None:
+                conn = snapshot.connect()
+                with metrics.timed("analytics", browser=browser):
+                    cached = snapshot.store_result(
+                        key,
+                        aggregate_artifacts(
+                            conn.cursor(), artifacts, db_type, data_type, top, filters
+                        ),
+                    )
+            stats, db_errors = cached
+            results.update(stats)
+            errors.extend(db_errors)
+        except sqlite3.Error as e:
+            errors.append(f"Lỗi cơ sở dữ liệu: {e}")
+        finally:
+            if conn:
+                conn.close()
+            snapshot_cache.release(snapshot)
+    return results, errors
+
+
+def stream_browser_data(
+    db_path, db_type, browser, data_type="all", limit=None, typed=False, filters=None
+):
+    """Mở bản sao và trả về (bản ghi, hàm đóng, lỗi) để xuất dữ liệu theo luồng.
+
+    Bản ghi được đọc dần bằng fetchmany; hàm đóng giải phóng kết nối và bản sao.
+    """
+    if browser == "firefox" and db_type == "Logins":
+        with metrics.labels(browser=browser):
+            rows, errors = iter_firefox_data(
+                db_path, db_type, None, data_type, limit, typed=typed, filters=filters
+            )
+        first = next(rows, None)
+        if first is None:
+            return None, None, ", ".join(errors) or None
+        return itertools.chain([first], rows), lambda: None, None
+
+    with metrics.labels(browser=browser), metrics.timed("snapshot"):
+        snapshot, error = snapshot_cache.acquire(db_path)
+    if not snapshot:
+        return None, None, error
+
+    conn = None
+    closed = False
+
+    def close():
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        if conn:
+            conn.close()
+        snapshot_cache.release(snapshot)
+
+    try:
+        # Bản ghi có thể được đọc tiếp ở luồng gửi phản hồi.
+        conn = snapshot.connect(check_same_thread=False)
+        cursor = conn.cursor()
+        # Bộ đọc ghi nhớ nhãn browser cho các phép đo trong lúc gửi phản hồi theo luồng.
+        with metrics.labels(browser=browser):
+            if browser == "firefox":
+                rows, errors = iter_firefox_data(
+                    db_path,
+                    db_type,
+                    cursor,
+                    data_type,
+                    limit,
+                    typed=typed,
+                    filters=filters,
+                )
+            else:
+                rows, errors = iter_chromium_data(
+                    cursor, db_type, data_type, limit, typed=typed, filters=filters
+                )
+        first = next(rows, None)
+    except sqlite3.Error as e:
+        close()
+        return None, None, f"Lỗi cơ sở dữ liệu: {e}"
+
+    if first is None:
+        close()
+        if errors:
+            return None, None, f"Không tìm thấy dữ liệu. Lỗi: {', '.join(errors)}"
+        return None, None, None
+
+    def generate():
+        try:
+            yield first
+            yield from rows
+        finally:
+            close()
+
+    return generate(), close, None
+
+
+def stream_timeline_data(entries, limit=None, typed=False, filters=None):
+    """Như stream_browser_data nhưng cho dòng thời gian gộp của data_type "all".
+
+    entries giống read_timeline_data; bản ghi theo đúng thứ tự của /preview.
+    """
+    snapshots = []
+    conns = []
+    sources = []
+    closed = False
+
+    def close():
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        for conn in conns:
+            conn.close()
+        for snapshot in snapshots:
+            snapshot_cache.release(snapshot)
+
+    try:
+        for name, browser, db_type, db_path, label in entries:
+            with metrics.labels(browser=browser), metrics.timed("snapshot"):
+                snapshot, _ = snapshot_cache.acquire(db_path)
+            if not snapshot:
+                continue
+            snapshots.append(snapshot)
+            # Bản ghi có thể được đọc tiếp ở luồng gửi phản hồi.
+            conn = snapshot.connect(check_same_thread=False)
+            conns.append(conn)
+            artifacts = timeline_sources(browser)[0]
+            source = timeline_source(
+                name, conn.cursor(), artifacts, db_type, label, filters
+            )
+            if source.artifacts:
+                sources.append(source)
+        rows = iter_timeline(sources, limit, typed=typed)
+        first = next(rows, None)
+    except sqlite3.Error as e:
+        close()
+        return None, None, f"Lỗi cơ sở dữ liệu: {e}"
+
+    if first is None:
+        close()
+        return None, None, None
+
+    def generate():
+        try:
+            yield first
+            yield from rows
+        finally:
+            close()
+
+    return generate(), close, None
+
+
+def collect_profile_data(task, limit, items_per_page, filters=None):
+    """Đọc trang đầu dữ liệu của một việc thu thập (một profile, một loại dữ liệu)."""
+    if not task.db_path:
+        return (
+            None,
+            f"Loại cơ sở dữ liệu không được hỗ trợ cho {task.browser}: {task.db_type}",
+        )
+    if not task.db_path.exists():
+        return None, f"File cơ sở dữ liệu không tồn tại: {task.db_path}"
+    data, error = read_browser_data(
+        task.db_path,
+        task.db_type,
+        task.browser,
+        limit,
+        task.data_type,
+        1,
+        items_per_page,
+        estimate=True,
+        filters=filters,
+    )
+    return (shape_page(data, "records") if data else None), error
+
+
+def ingest_profile_data(task, case_db):
+    """Nạp toàn bộ dữ liệu của một việc thu thập vào kho vụ việc."""
+    if not task.db_path or not task.db_path.exists():
+        return None, f"File cơ sở dữ liệu không tồn tại: {task.db_path}"
+    rows, close, error = stream_browser_data(
+        task.db_path, task.db_type, task.browser, task.data_type, typed=True
+    )
+    if not rows:
+        return None, error or "Không có dữ liệu để nạp."
+    conn = open_case_store(case_db)
+    try:
+        count = ingest_rows(conn, task.browser, task.profile, task.data_type, rows)
+    finally:
+        close()
+        conn.close()
+    return {"records": count}, None
+
+
+def count_output(chunks, export_format):
+    """Chuyển tiếp các khối dữ liệu xuất, cộng số byte vào output_bytes_total."""
+    for chunk in chunks:
+        metrics.inc("output_bytes_total", len(chunk), format=export_format)
+        yield chunk
+
+
+def bounded_int(value, default, minimum=1, maximum=None):
+    """Đọc số nguyên từ tham số yêu cầu; rỗng hoặc thiếu thì lấy default.
+
+    Ném ValueError nếu không phải số hoặc ngoài [minimum, maximum], để endpoint trả lỗi
+    dữ liệu không hợp lệ thay vì lỗi 500.
+    """
+    number = default if value in (None, "") else int(value)
+    if number < minimum or (maximum is not None and number > maximum):
+        raise ValueError(value)
+    return number
+
+
+def shape_page(data, shape):
+    """Đưa các bản ghi của trang về dạng JSON đã chọn (xem RESPONSE_SHAPES)."""
+    rows = data.pop("data")
+    if shape == "columns":
+        data["columns"], data["rows"] = to_columnar(rows)
+    else:
+        data["data"] = [as_dict(row) for row in rows]
+    return data
+
+
+def query_serializer():
+    return URLSafeSerializer(app.secret_key, salt="preview-query")
+
+
+def encode_query(browser, limit, data_type, filters):
+    """Token đã ký chứa trạng thái truy vấn xem trước, dùng được trên mọi worker.
+
+    Chỉ được tạo sau khi tham số của form đã được kiểm tra nên GET không bỏ qua được
+    bước kiểm tra đó bằng cách sửa token.
+    """
+    return query_serializer().dumps(
+        {
+            "browser": browser,
+            "limit": limit,
+            "data_type": data_type,
+            "filters": filters.to_dict(),
+        }
+    )
+
+
+def decode_query(token):
+    """Giải mã token truy vấn, trả về (trạng thái, lỗi)."""
+    if not token:
+        return None, None
+    try:
+        query = query_serializer().loads(token)
+    except BadSignature:
+        return None, "Token truy vấn không hợp lệ."
+    if not isinstance(query, dict):
+        return None, "Token truy vấn không hợp lệ."
+    return query, None
+
+
+def json_response(data, etag=None):
+    """Phản hồi JSON nén theo Accept-Encoding, kèm ETag nếu có (giai đoạn serialize, compress)."""
+    with metrics.timed("serialize"):
+        body = dumps(data)
+    with metrics.timed("compress"):
+        body, encoding = compress(body, request.accept_encodings)
+    response = Response(body, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag)
+        # Trình duyệt luôn hỏi lại bằng If-None-Match; nguồn chưa đổi thì nhận 304.
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def source_etag(db_paths, *params):
+    """ETag từ dấu vân tay các file nguồn (chỉ os.stat, không mở SQLite) và tham số.
+
+    Trả về None nếu không đọc được thông tin file.
+    """
+    try:
+        fingerprints = [source_fingerprint(db_path)[0] for db_path in db_paths]
+    except OSError:
+        return None
+    return make_etag(snapshot_cache.mode, fingerprints, *params)
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def cached_preview(etag):
+    """304 nếu máy khách đã có trang, trang đã lưu trong kho kết quả nếu có, nếu không None."""
+    if not etag:
+        return None
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    page = snapshot_cache.results.get("preview", etag)
+    return json_response(page, etag) if page else None
+
+
+def preview_response(data, shape, query, etag):
+    """Phản hồi một trang xem trước kèm token truy vấn.
+
+    Trang có tổng chính xác được lưu vào kho kết quả theo ETag để mọi worker trả lại
+    ngay mà không đọc lại SQLite; trang có tổng ước lượng không được lưu.
+    """
+    page = shape_page(data, shape)
+    page["query"] = query
+    if page.get("total_is_estimate"):
+        return json_response(page)
+    if etag:
+        snapshot_cache.results.set("preview", etag, page)
+    return json_response(page, etag)
 
 
 def save_to_csv(data, output_file):
@@ -250,16 +765,37 @@ def save_to_csv(data, output_file):
     if not data or len(data) == 0:
         return False, "Không có dữ liệu để lưu vào CSV."
     try:
-        df = pd.DataFrame(data)
-        for col in df.columns:
-            if df[col].dtype == "object":
-                df[col] = df[col].apply(clean_string)
-        df.to_csv(output_file, index=False, encoding="utf-8-sig")
+        # Các module đọc dữ liệu đã làm sạch chuỗi, không làm sạch lại ở đây.
+        with metrics.timed("csv"), open(output_file, "wb") as f:
+            for chunk in count_output(iter_csv(data), "csv"):
+                f.write(chunk)
         return True, output_file
     except Exception as e:
         return False, f"Lỗi khi lưu CSV: {e}"
 
 
+@app.before_request
+def start_timing():
+    metrics.start_request()
+
+
+@app.after_request
+def add_server_timing(response):
+    """Gửi thời gian theo giai đoạn của yêu cầu trong header Server-Timing."""
+    timing = metrics.server_timing()
+    if timing:
+        response.headers["Server-Timing"] = timing
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Chỉ số của tiến trình (thời gian theo giai đoạn, số bản ghi, số byte) cho Prometheus."""
+    return Response(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -267,40 +803,85 @@ def index():
 
 @app.route("/preview", methods=["POST", "GET"])
 def preview():
-    browser = session.get("browser")
-    limit = session.get("limit")
-    data_type = session.get("data_type")
+    query, error = decode_query(request.args.get("query"))
+    if error:
+        return jsonify({"error": error})
+    # Trang sau đọc trạng thái từ token đã ký nếu có (mọi worker đều đọc được), nếu không
+    # thì từ phiên.
+    state = query or session
+    browser = state.get("browser")
+    limit = state.get("limit")
+    data_type = state.get("data_type")
+    filters = Filters.from_dict(state.get("filters"))
 
-    page = int(request.args.get("page", 1))
-    items_per_page = 20
+    estimate = request.values.get("estimate") == "1"
+    shape = request.values.get("shape", "records")
+    page_cursor, error = decode_cursor(request.args.get("cursor"))
+    if error:
+        return jsonify({"error": error})
+    try:
+        page = bounded_int(request.args.get("page"), 1)
+        items_per_page = bounded_int(
+            request.values.get("page_size"), PREVIEW_PAGE_SIZE, 1, MAX_PREVIEW_PAGE_SIZE
+        )
+        if request.method == "POST":
+            limit = bounded_int(request.form.get("limit"), 100, 1, MAX_PREVIEW_LIMIT)
+    except ValueError:
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+    if shape not in RESPONSE_SHAPES:
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
 
     if request.method == "POST":
         browser = request.form.get("browser")
-        limit = int(request.form.get("limit", 100))
         data_type = request.form.get("data_type")
 
-        if not browser or limit < 1 or limit > 1000 or not data_type:
+        if not browser or not data_type:
             return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+        filters, error = parse_filters(request.form)
+        if error:
+            return jsonify({"error": error})
 
         session["browser"] = browser
         session["limit"] = limit
         session["data_type"] = data_type
+        session["filters"] = filters.to_dict()
 
     elif request.method == "GET":
         if not browser or not limit or not data_type:
             return jsonify({"error": "Vui lòng gửi dữ liệu form trước khi phân trang."})
+    query = encode_query(browser, limit, data_type, filters)
 
     user_home = Path.home()
+    # Tham số quyết định nội dung trang; estimate không nằm trong đó vì trang có tổng
+    # ước lượng không được gắn ETag.
+    params = (
+        browser,
+        limit,
+        data_type,
+        filters.to_dict(),
+        page,
+        items_per_page,
+        request.args.get("cursor"),
+        shape,
+    )
 
-    db_types = {
-        "history": "History",
-        "downloads": "History",
-        "cookies": "Cookies",
-        "logins": "Logins",
-        "autofill": "Autofill",
-        "all": "History",
-    }
-    db_type = db_types.get(data_type, "History")
+    if data_type == "all":
+        # Gộp mọi loại dữ liệu của trình duyệt thành một dòng thời gian duy nhất.
+        entries, error = timeline_entries(browser, user_home)
+        if entries is None:
+            return jsonify({"error": error})
+        etag = source_etag([entry[3] for entry in entries], *params)
+        cached = cached_preview(etag)
+        if cached:
+            return cached
+        data, error = read_timeline_data(
+            entries, limit, page, items_per_page, page_cursor, estimate, filters
+        )
+        if not data:
+            return jsonify({"error": error or "Không thể trích xuất dữ liệu."})
+        return preview_response(data, shape, query, etag)
+
+    db_type = get_db_type(browser, data_type)
 
     db_path, error = get_browser_db_path(browser, user_home, db_type=db_type)
 
@@ -316,75 +897,427 @@ def preview():
             }
         )
 
+    etag = source_etag([db_path], *params)
+    cached = cached_preview(etag)
+    if cached:
+        return cached
+
     data, error = read_browser_data(
-        db_path, db_type, browser, limit, data_type, page, items_per_page
+        db_path,
+        db_type,
+        browser,
+        limit,
+        data_type,
+        page,
+        items_per_page,
+        page_cursor,
+        estimate,
+        filters,
     )
     if not data:
         return jsonify({"error": error or "Không thể trích xuất dữ liệu."})
 
-    return jsonify(data)
+    return preview_response(data, shape, query, etag)
 
 
-@app.route("/download", methods=["POST"])
-def download():
-    browser = request.form.get("browser")
-    limit = int(request.form.get("limit", 100))
-    data_type = request.form.get("data_type")
+@app.route("/analytics", methods=["GET", "POST"])
+def analytics():
+    """Thống kê tên miền hàng đầu và biểu đồ hoạt động theo ngày/giờ (UTC)."""
+    browser = request.values.get("browser")
+    data_type = request.values.get("data_type", "all")
+    top = int(request.values.get("top", DEFAULT_TOP))
+    filters, error = parse_filters(request.values)
+    if error:
+        return jsonify({"error": error})
 
-    if not browser or limit < 1 or limit > 1000 or not data_type:
+    if (
+        browser not in SUPPORTED_BROWSERS
+        or data_type not in ["all", *DATA_TYPES]
+        or top < 1
+        or top > MAX_TOP
+    ):
         return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
 
     user_home = Path.home()
+    if data_type == "all":
+        db_types = timeline_sources(browser)[1]
+    else:
+        db_types = [get_db_type(browser, data_type)]
+    entries = []
+    for db_type in db_types:
+        if db_type not in timeline_sources(browser)[1]:
+            return jsonify(
+                {
+                    "error": f"Không hỗ trợ thống kê {data_type} trên {browser.capitalize()}."
+                }
+            )
+        db_path, error = get_browser_db_path(browser, user_home, db_type=db_type)
+        if not db_path:
+            return jsonify({"error": error})
+        if db_path.exists():
+            entries.append((db_type, db_path))
 
-    db_types = {
-        "history": "History",
-        "downloads": "History",
-        "cookies": "Cookies",
-        "logins": "Logins",
-        "autofill": "Autofill",
-        "all": "History",
-    }
-    db_type = db_types.get(data_type, "History")
-
-    db_path, error = get_browser_db_path(browser, user_home, db_type=db_type)
+    etag = source_etag(
+        [db_path for _, db_path in entries], browser, data_type, top, filters.to_dict()
+    )
+    if etag and request.if_none_match.contains(etag):
+        return not_modified(etag)
 
-    if not db_path:
+    results, errors = read_analytics(entries, browser, data_type, top, filters)
+    if not results:
         return jsonify(
-            {"error": error or f"Không thể lấy đường dẫn cơ sở dữ liệu cho {browser}."}
+            {"error": ", ".join(errors) or "Không tìm thấy dữ liệu để thống kê."}
         )
+    return json_response({"analytics": results, "errors": errors}, etag)
 
-    if not db_path.exists():
-        return jsonify(
-            {
-                "error": f"File cơ sở dữ liệu không tồn tại: {db_path}. Đảm bảo trình duyệt đã được cài đặt và có dữ liệu."
-            }
+
+@app.route("/collect", methods=["POST"])
+def collect():
+    """Thu thập song song nhiều loại dữ liệu trên mọi profile của nhiều trình duyệt."""
+    browsers = request.form.getlist("browsers") or SUPPORTED_BROWSERS
+    data_types = request.form.getlist("data_types") or DATA_TYPES
+    try:
+        limit = bounded_int(request.form.get("limit"), 100, 1, MAX_PREVIEW_LIMIT)
+        items_per_page = bounded_int(
+            request.form.get("items_per_page"),
+            PREVIEW_PAGE_SIZE,
+            1,
+            MAX_PREVIEW_PAGE_SIZE,
         )
+    except ValueError:
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+    filters, error = parse_filters(request.form)
+    if error:
+        return jsonify({"error": error})
 
-    data, error = read_browser_data(
-        db_path, db_type, browser, limit, data_type, page=1, items_per_page=limit
+    if any(browser not in SUPPORTED_BROWSERS for browser in browsers) or any(
+        data_type not in DATA_TYPES for data_type in data_types
+    ):
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+
+    if platform.system() != "Windows":
+        return jsonify({"error": "Ứng dụng chỉ hỗ trợ hệ điều hành Windows."})
+
+    tasks, errors = plan_tasks(browsers, data_types, Path.home())
+    results = run_tasks(
+        tasks, lambda task: collect_profile_data(task, limit, items_per_page, filters)
+    )
+    return jsonify({"results": results, "errors": errors, "total_tasks": len(tasks)})
+
+
+@app.route("/ingest", methods=["POST"])
+def ingest():
+    """Nạp dữ liệu của mọi profile vào kho vụ việc để tìm kiếm bằng /search."""
+    browsers = request.form.getlist("browsers") or SUPPORTED_BROWSERS
+    data_types = request.form.getlist("data_types") or DATA_TYPES
+
+    if any(browser not in SUPPORTED_BROWSERS for browser in browsers) or any(
+        data_type not in DATA_TYPES for data_type in data_types
+    ):
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+
+    if platform.system() != "Windows":
+        return jsonify({"error": "Ứng dụng chỉ hỗ trợ hệ điều hành Windows."})
+
+    case_db = app.config["CASE_DB"]
+    tasks, errors = plan_tasks(browsers, data_types, Path.home())
+    results = run_tasks(tasks, lambda task: ingest_profile_data(task, case_db))
+    return jsonify({"results": results, "errors": errors, "total_tasks": len(tasks)})
+
+
+@app.route("/search", methods=["GET", "POST"])
+def search():
+    """Tìm kiếm từ khóa (có xếp hạng) trên URL và tiêu đề trong kho vụ việc."""
+    query = request.values.get("q", "")
+    limit = int(request.values.get("limit", 50))
+    offset = int(request.values.get("offset", 0))
+    since = request.values.get("since")
+    until = request.values.get("until")
+
+    if limit < 1 or limit > SEARCH_LIMIT or offset < 0:
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+
+    conn = open_case_store(app.config["CASE_DB"])
+    try:
+        results, has_more, error = search_case_store(
+            conn,
+            query,
+            limit,
+            offset,
+            prefix=request.values.get("prefix") == "1",
+            browser=request.values.get("browser"),
+            profile=request.values.get("profile"),
+            artifact=request.values.get("artifact"),
+            since=int(since) if since else None,
+            until=int(until) if until else None,
+        )
+    finally:
+        conn.close()
+    if error:
+        return jsonify({"error": error})
+    return jsonify(
+        {"results": results, "has_more": has_more, "offset": offset, "limit": limit}
+    )
+
+
+@app.route("/timeline", methods=["POST"])
+def timeline():
+    """Dòng thời gian gộp mọi loại dữ liệu trên mọi profile của nhiều trình duyệt."""
+    browsers = request.form.getlist("browsers") or SUPPORTED_BROWSERS
+    try:
+        limit = bounded_int(request.form.get("limit"), 1000, 1, MAX_PREVIEW_LIMIT)
+        items_per_page = bounded_int(
+            request.form.get("items_per_page"),
+            PREVIEW_PAGE_SIZE,
+            1,
+            MAX_PREVIEW_PAGE_SIZE,
+        )
+        page = bounded_int(request.form.get("page"), 1)
+    except ValueError:
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+    estimate = request.form.get("estimate") == "1"
+    shape = request.form.get("shape", "records")
+    page_cursor, error = decode_cursor(request.form.get("cursor"))
+    if error:
+        return jsonify({"error": error})
+    filters, error = parse_filters(request.form)
+    if error:
+        return jsonify({"error": error})
+
+    if shape not in RESPONSE_SHAPES or any(
+        browser not in SUPPORTED_BROWSERS for browser in browsers
+    ):
+        return jsonify({"error": "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."})
+
+    if platform.system() != "Windows":
+        return jsonify({"error": "Ứng dụng chỉ hỗ trợ hệ điều hành Windows."})
+
+    tasks, _ = plan_tasks(browsers, DATA_TYPES, Path.home())
+    entries = []
+    seen = set()
+    for task in tasks:
+        if task.db_type not in timeline_sources(task.browser)[1]:
+            continue
+        if task.db_path in seen or not task.db_path.exists():
+            continue
+        seen.add(task.db_path)
+        label = f"{task.browser}/{task.profile}"
+        entries.append(
+            (f"{label}/{task.db_type}", task.browser, task.db_type, task.db_path, label)
+        )
+
+    data, error = read_timeline_data(
+        entries, limit, page, items_per_page, page_cursor, estimate, filters
     )
     if not data:
-        return jsonify(
-            {
-                "error": error
-                or f"Không thể trích xuất dữ liệu cho loại {data_type} trên {browser.capitalize()}."
-            }
+        return jsonify({"error": error or "Không thể trích xuất dữ liệu."})
+    return json_response(shape_page(data, shape))
+
+
+def parse_export_request(form):
+    """Đọc và kiểm tra tham số xuất dữ liệu dùng chung cho /download và /jobs."""
+    browser = form.get("browser")
+    data_type = form.get("data_type")
+    # limit rỗng hoặc 0: xuất toàn bộ bản ghi, không giới hạn.
+    limit = int(form.get("limit") or 0)
+    export_format = form.get("format", "csv")
+
+    if not browser or limit < 0 or not data_type:
+        return None, "Dữ liệu không hợp lệ, vui lòng kiểm tra lại."
+    filters, error = parse_filters(form)
+    if error:
+        return None, error
+
+    exporter, error = get_exporter(export_format)
+    if not exporter:
+        return None, error
+
+    if data_type == "all":
+        # Cùng dòng thời gian gộp với /preview, không chỉ cơ sở dữ liệu History.
+        entries, error = timeline_entries(browser, Path.home())
+        if entries is None:
+            return None, error
+        if not entries:
+            return (
+                None,
+                f"Không tìm thấy cơ sở dữ liệu nào của {browser.capitalize()}. Đảm bảo trình duyệt đã được cài đặt và có dữ liệu.",
+            )
+        return (
+            ExportRequest(
+                browser,
+                data_type,
+                None,
+                None,
+                limit or None,
+                filters,
+                *exporter[:4],
+                entries=entries,
+            ),
+            None,
         )
 
-    if "data" not in data or not data["data"]:
-        return jsonify(
-            {
-                "error": f"Không tìm thấy dữ liệu cho loại {data_type} trên {browser.capitalize()} để tải xuống dưới dạng CSV."
-            }
+    db_type = get_db_type(browser, data_type)
+
+    db_path, error = get_browser_db_path(browser, Path.home(), db_type=db_type)
+
+    if not db_path:
+        return None, error or f"Không thể lấy đường dẫn cơ sở dữ liệu cho {browser}."
+
+    if not db_path.exists():
+        return (
+            None,
+            f"File cơ sở dữ liệu không tồn tại: {db_path}. Đảm bảo trình duyệt đã được cài đặt và có dữ liệu.",
+        )
+
+    return (
+        ExportRequest(
+            browser, data_type, db_type, db_path, limit or None, filters, *exporter[:4]
+        ),
+        None,
+    )
+
+
+def open_export(export):
+    """Mở luồng bản ghi cho một yêu cầu xuất, trả về (bản ghi, hàm đóng, lỗi)."""
+    if export.entries:
+        rows, close, error = stream_timeline_data(
+            export.entries, export.limit, export.typed, export.filters
+        )
+    else:
+        rows, close, error = stream_browser_data(
+            export.db_path,
+            export.db_type,
+            export.browser,
+            export.data_type,
+            export.limit,
+            export.typed,
+            export.filters,
         )
+    if not rows:
+        return (
+            None,
+            None,
+            error
+            or f"Không tìm thấy dữ liệu cho loại {export.data_type} trên {export.browser.capitalize()} để tải xuống.",
+        )
+    return rows, close, None
+
+
+def export_filename(export):
+    return f"browser_data_{export.browser}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export.extension}"
+
+
+def run_export_job(job, output_path, export):
+    """Việc nền: sao chép, đọc và ghi toàn bộ bản ghi ra file, báo tiến độ theo khối."""
+    job.update(stage="Đang sao chép cơ sở dữ liệu")
+    rows, close, error = open_export(export)
+    if not rows:
+        raise RuntimeError(error)
+
+    def tracked():
+        count = 0
+        for count, row in enumerate(rows, 1):
+            if count % JOB_PROGRESS_ROWS == 0:
+                job.check()
+                job.update(rows=count)
+            yield row
+        job.update(rows=count)
+
+    try:
+        job.check()
+        job.update(stage="Đang xuất dữ liệu")
+        with open(output_path, "wb") as f:
+            for chunk in count_output(export.export_rows(tracked()), export.extension):
+                f.write(chunk)
+    finally:
+        close()
+    return export.mimetype, export_filename(export)
+
+
+@app.route("/download", methods=["POST"])
+def download():
+    export, error = parse_export_request(request.form)
+    if not export:
+        return jsonify({"error": error})
+
+    rows, close, error = open_export(export)
+    if not rows:
+        return jsonify({"error": error})
+
+    response = Response(
+        count_output(export.export_rows(rows), export.extension),
+        mimetype=export.mimetype,
+    )
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename={export_filename(export)}"
+    )
+    response.call_on_close(close)
+    return response
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Chạy một lượt xuất dữ liệu ở nền, trả về mã việc để theo dõi."""
+    export, error = parse_export_request(request.form)
+    if not export:
+        return jsonify({"error": error})
+    job, error = job_queue.submit(
+        "export", lambda job, output_path: run_export_job(job, output_path, export)
+    )
+    if not job:
+        return jsonify({"error": error})
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Không tìm thấy việc."})
+    return jsonify(job.to_dict())
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """Luồng Server-Sent Events báo tiến độ cho tới khi việc kết thúc."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Không tìm thấy việc."})
+
+    def generate():
+        version = None
+        while True:
+            version = job.wait(version, JOB_EVENT_TIMEOUT)
+            yield f"data: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+            if job.status in JOB_FINISHED:
+                break
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = job_queue.cancel(job_id)
+    if not job:
+        return jsonify({"error": "Không tìm thấy việc."})
+    return jsonify(job.to_dict())
+
 
-    output_file = (
-        f"browser_data_{browser}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Không tìm thấy việc."})
+    if job.status != JOB_DONE:
+        return jsonify({**job.to_dict(), "error": job.error or "Việc chưa hoàn tất."})
+    return send_file(
+        job.result_path,
+        mimetype=job.mimetype,
+        as_attachment=True,
+        download_name=job.filename,
     )
-    success, result = save_to_csv(data["data"], output_file)
-    if success:
-        return send_file(result, as_attachment=True, download_name=output_file)
-    return jsonify({"error": result})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,351 @@
+from domains import registrable_domain
+from filters import escape_like, host_filter as make_host_filter
+from metrics import metrics
+from pagination import Seek, estimate_table_rows
+from records import DisplayRecord, TypedRecord
+from sanitize import clean_string
+
+
+class Artifact:
+    """Mô tả khai báo một loại dữ liệu: bảng, cột hiển thị, thứ tự sắp xếp và bộ chuyển đổi.
+
+    convert_time nhận tên cột thời gian và trả về biểu thức SQL định dạng nó; unix_time
+    trả về biểu thức quy nó về microseconds Unix cho các định dạng xuất có kiểu (xem timeconv).
+    watermark là cột tăng dần theo dữ liệu mới, dùng làm mốc cho lần thu thập gia tăng.
+    host là biểu thức SQL lấy tên miền của bản ghi (xem filters), dùng để thống kê, lọc
+    và tính cột "Tên miền" (tên miền đăng ký được, xem domains).
+    timeline_time (mặc định time) là cột sắp xếp trong dòng thời gian gộp, với
+    timeline_unix_time quy nó về microseconds Unix; cookie sắp theo thời điểm tạo thay vì
+    hạn dùng vốn thường ở xa trong tương lai.
+    native_time đổi microseconds Unix về đơn vị gốc của cột thời gian và host_filter (mặc
+    định dựng từ host) tạo điều kiện lọc tên miền, để bộ lọc so sánh thẳng trên cột gốc và
+    dùng được chỉ mục.
+
+    Câu lệnh SELECT được dựng một lần khi khai báo; mọi trang dùng cùng một chuỗi SQL
+    nên sqlite3 lấy lại câu lệnh đã biên dịch từ bộ đệm của kết nối.
+    """
+
+    def __init__(
+        self,
+        name,
+        db_type,
+        label,
+        source,
+        tables,
+        missing_error,
+        key,
+        url=None,
+        url_default=None,
+        title=(),
+        title_format="{}",
+        title_default=None,
+        visit_count=None,
+        time=None,
+        convert_time=None,
+        unix_time=None,
+        time_default="",
+        order_by_time=True,
+        nullable_time=False,
+        where=None,
+        count_table=None,
+        watermark=None,
+        native_time=None,
+        host=None,
+        host_filter=None,
+        timeline_time=None,
+        timeline_unix_time=None,
+    ):
+        self.name = name
+        self.db_type = db_type
+        self.label = label
+        self.source = source
+        self.where = where or 1
+        self.tables = tables
+        self.missing_error = missing_error
+        self.key = key
+        self.url = url
+        self.url_default = url_default
+        self.title_format = title_format
+        self.title_default = title_default
+        self.time = time
+        self.order_time = time if order_by_time else None
+        self.timeline_time = timeline_time or time
+        timeline_unix_time = timeline_unix_time or unix_time
+        self.nullable_time = nullable_time
+        self.count_table = count_table or tables[-1]
+        self.watermark = watermark
+        self.visit_count = visit_count
+        self.native_time = native_time
+        self.host = host
+        self.host_filter = host_filter or (make_host_filter(host) if host else None)
+
+        # Chỉ chiếu các cột thực sự hiển thị: url, tiêu đề..., số lần truy cập,
+        # thời gian gốc (cho con trỏ), thời gian đã định dạng, khóa, thời gian Unix, mốc, host.
+        # Thời gian được định dạng cho cả cột ngay trong SQLite.
+        if time and convert_time:
+            time_text = convert_time(time)
+        else:
+            time_text = f"'{time_default}'"
+        columns = [
+            url or "NULL",
+            *title,
+            visit_count or "NULL",
+            time or "NULL",
+            time_text,
+            key,
+            unix_time(time) if time and unix_time else "NULL",
+            watermark or "NULL",
+            host or "NULL",
+        ]
+        self.title_slice = slice(1, 1 + len(title))
+        self.visit_index = 1 + len(title)
+        self.time_index = self.visit_index + 1
+        self.time_text_index = self.time_index + 1
+        self.key_index = self.time_text_index + 1
+        self.unix_time_index = self.key_index + 1
+        self.watermark_index = self.unix_time_index + 1
+        self.host_index = self.watermark_index + 1
+        self.unix_time_sql = columns[self.unix_time_index]
+        self.select_sql = (
+            f"SELECT {', '.join(columns)} FROM {source} WHERE {self.where}"
+        )
+        self.count_sql = f"SELECT COUNT(*) FROM {source} WHERE {self.where}"
+        # Dòng thời gian gộp chỉ sắp xếp trên (thời gian Unix, thời gian gốc, khóa),
+        # rồi lấy đủ cột theo khóa cho các dòng được chọn (xem timeline).
+        # Thời điểm của bản ghi trên dòng thời gian, cũng dùng cho biểu đồ theo ngày/giờ.
+        if self.timeline_time and timeline_unix_time:
+            self.timeline_unix_sql = timeline_unix_time(self.timeline_time)
+        else:
+            self.timeline_unix_sql = "NULL"
+        self.timeline_sql = (
+            f"SELECT {self.timeline_unix_sql}, {self.timeline_time or 'NULL'}, {key} "
+            f"FROM {source} WHERE {self.where}"
+        )
+
+    def filter_sql(self, filters):
+        """Dịch bộ lọc thành (điều kiện "AND ...", tham số).
+
+        Trả về None nếu loại dữ liệu không có cột để thỏa bộ lọc (ví dụ lọc số lần
+        truy cập trên cookie) và khi đó loại dữ liệu bị bỏ qua.
+        """
+        if not filters:
+            return "", ()
+        conditions = []
+        params = []
+        if filters.since is not None or filters.until is not None:
+            if not (self.time and self.native_time):
+                return None
+            if filters.since is not None:
+                conditions.append(f"{self.time} >= ?")
+                params.append(self.native_time(filters.since))
+            else:
+                # Thời gian 0 nghĩa là không có thời gian, không thuộc khoảng nào.
+                conditions.append(f"{self.time} > 0")
+            if filters.until is not None:
+                conditions.append(f"{self.time} < ?")
+                params.append(self.native_time(filters.until))
+        if filters.host:
+            if not self.host_filter:
+                return None
+            condition, host_params = self.host_filter(filters.host)
+            conditions.append(condition)
+            params.extend(host_params)
+        if filters.url:
+            if not self.url:
+                return None
+            conditions.append(f"{self.url} LIKE ? ESCAPE '\\'")
+            params.append(f"%{escape_like(filters.url)}%")
+        if filters.min_visits is not None:
+            if not self.visit_count:
+                return None
+            conditions.append(f"{self.visit_count} >= ?")
+            params.append(filters.min_visits)
+        return f"AND {' AND '.join(conditions)}", tuple(params)
+
+    def build_row(self, row, typed=False):
+        """Chuyển một dòng SQLite thành bản ghi hiển thị (records.Record, theo thứ tự COLUMNS).
+
+        typed=True thêm "Dấu thời gian" (microseconds Unix, UTC) cho các định dạng xuất có kiểu.
+        """
+        if self.url:
+            url = clean_string(row[0]) or self.url_default
+        else:
+            url = self.url_default
+        title = self.title_format.format(*map(clean_string, row[self.title_slice]))
+        values = (
+            self.label,
+            url,
+            title or self.title_default,
+            row[self.visit_index],
+            row[self.time_text_index],
+            registrable_domain(row[self.host_index]),
+        )
+        if typed:
+            return TypedRecord((*values, row[self.unix_time_index]))
+        return DisplayRecord(values)
+
+
+def list_tables(cursor):
+    """Lấy tập tên bảng của cơ sở dữ liệu bằng một truy vấn duy nhất."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def select_artifacts(artifacts, db_type, data_type):
+    """Chọn các loại dữ liệu thuộc db_type ứng với data_type."""
+    return [
+        a for a in artifacts if a.db_type == db_type and data_type in ["all", a.name]
+    ]
+
+
+def read_artifacts(
+    cursor,
+    artifacts,
+    db_type,
+    data_type,
+    items_per_page,
+    offset=0,
+    page_cursor=None,
+    filters=None,
+):
+    """Đọc một trang của mọi loại dữ liệu được chọn theo sổ đăng ký.
+
+    filters (xem filters.Filters) được đẩy xuống SQL cùng điều kiện của con trỏ.
+    """
+    all_data = []
+    errors = []
+    bounds = {}
+    tables = list_tables(cursor)
+
+    for artifact in select_artifacts(artifacts, db_type, data_type):
+        if not all(table in tables for table in artifact.tables):
+            if data_type == artifact.name:
+                errors.append(artifact.missing_error)
+            continue
+        condition = artifact.filter_sql(filters)
+        if condition is None:
+            continue
+        filter_where, filter_params = condition
+
+        seek = Seek(
+            page_cursor,
+            artifact.name,
+            artifact.order_time,
+            artifact.key,
+            offset,
+            nullable=artifact.nullable_time,
+        )
+        rows = []
+        if not seek.skip:
+            with metrics.timed("query", artifact=artifact.name):
+                cursor.execute(
+                    f"{artifact.select_sql} {filter_where} {seek.where} {seek.order} "
+                    "LIMIT ? OFFSET ?",
+                    (*filter_params, *seek.params, items_per_page, seek.offset),
+                )
+                rows = seek.arrange(cursor.fetchall())
+        bounds[artifact.name] = seek.bounds(
+            rows, artifact.time_index, artifact.key_index
+        )
+        with metrics.timed("build", artifact=artifact.name):
+            all_data.extend([artifact.build_row(row) for row in rows])
+        metrics.inc("rows_total", len(rows), artifact=artifact.name)
+
+    return all_data, errors, bounds
+
+
+def iter_artifacts(
+    cursor,
+    artifacts,
+    db_type,
+    data_type,
+    limit=None,
+    batch_size=1000,
+    typed=False,
+    watermarks=None,
+    filters=None,
+):
+    """Duyệt toàn bộ bản ghi theo từng khối fetchmany, trả về (iterator, lỗi).
+
+    limit giới hạn số bản ghi của mỗi loại dữ liệu; None nghĩa là không giới hạn.
+    watermarks (tên loại dữ liệu -> mốc) bật chế độ gia tăng: chỉ đọc bản ghi sau mốc,
+    theo thứ tự mốc tăng dần, và dict được cập nhật tới mốc mới khi bản ghi được duyệt.
+    filters được đẩy xuống SQL như read_artifacts.
+    """
+    # Bộ sinh có thể chạy sau khi phạm vi nhãn của người gọi đã kết thúc (phản hồi theo luồng).
+    scope = metrics.current_labels()
+    errors = []
+    selected = []
+    tables = list_tables(cursor)
+    for artifact in select_artifacts(artifacts, db_type, data_type):
+        if all(table in tables for table in artifact.tables):
+            condition = artifact.filter_sql(filters)
+            if condition is not None:
+                selected.append((artifact, *condition))
+        elif data_type == artifact.name:
+            errors.append(artifact.missing_error)
+
+    def rows():
+        for artifact, where, params in selected:
+            incremental = watermarks is not None and artifact.watermark
+            if incremental:
+                mark = watermarks.get(artifact.name)
+                if mark is not None:
+                    where = f"{where} AND {artifact.watermark} > ?"
+                    params = (*params, mark)
+                # Sắp theo mốc để chỉ số trên cột mốc giới hạn phần phải đọc.
+                order = f"ORDER BY {artifact.watermark}"
+            else:
+                order = Seek(
+                    None, artifact.name, artifact.order_time, artifact.key
+                ).order
+            labels = {**scope, "artifact": artifact.name}
+            with metrics.timed("query", **labels):
+                cursor.execute(
+                    f"{artifact.select_sql} {where} {order} LIMIT ?",
+                    (*params, limit or -1),
+                )
+            while True:
+                with metrics.timed("fetch", **labels):
+                    batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                with metrics.timed("build", **labels):
+                    records = [artifact.build_row(row, typed) for row in batch]
+                metrics.inc("rows_total", len(records), **labels)
+                yield from records
+                if incremental and batch[-1][artifact.watermark_index] is not None:
+                    watermarks[artifact.name] = batch[-1][artifact.watermark_index]
+
+    return rows(), errors
+
+
+def calculate_total_records(cursor, artifacts, db_type, data_type, filters=None):
+    """Tính tổng số bản ghi (thỏa bộ lọc) của các loại dữ liệu được chọn."""
+    total_records = 0
+    tables = list_tables(cursor)
+    for artifact in select_artifacts(artifacts, db_type, data_type):
+        if all(table in tables for table in artifact.tables):
+            condition = artifact.filter_sql(filters)
+            if condition is None:
+                continue
+            where, params = condition
+            with metrics.timed("count", artifact=artifact.name):
+                cursor.execute(f"{artifact.count_sql} {where}", params)
+                total_records += cursor.fetchone()[0]
+    return total_records
+
+
+def estimate_total_records(cursor, artifacts, db_type, data_type, filters=None):
+    """Ước lượng nhanh tổng số bản ghi (sqlite_stat1 hoặc max(rowid)).
+
+    Thống kê bảng không biết gì về bộ lọc nên khi có bộ lọc thì đếm chính xác.
+    """
+    if filters:
+        return calculate_total_records(cursor, artifacts, db_type, data_type, filters)
+    total_records = 0
+    tables = list_tables(cursor)
+    for artifact in select_artifacts(artifacts, db_type, data_type):
+        if all(table in tables for table in artifact.tables):
+            total_records += estimate_table_rows(cursor, artifact.count_table)
+    return total_records
@@ -0,0 +1,430 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+from chromium_reader import (
+    BROWSERS as CHROMIUM_BROWSERS,
+    DB_FILES as CHROMIUM_DB_FILES,
+    iter_chromium_data,
+)
+from firefox_reader import DB_FILES as FIREFOX_DB_FILES, iter_firefox_data
+from collector import DATA_TYPES, get_db_type
+from exporters import COLUMNS, get_exporter, iter_csv
+from records import record_type
+from snapshot_cache import ACCESS_MODES, connect_db, remove_db_files, snapshot_db
+
+# Chỉ các định dạng ghép nối được: nối các phần liên tiếp vẫn là một file hợp lệ.
+BATCH_FORMATS = ["csv", "ndjson.gz", "ndjson.zst"]
+SOURCE_COLUMNS = ["Trình duyệt", "Nguồn"]
+BATCH_COLUMNS = SOURCE_COLUMNS + COLUMNS
+SQLITE_HEADER = b"SQLite format 3\x00"
+# File có thể nhận diện một profile Firefox (logins.json quá chung chung).
+FIREFOX_MARKERS = ("places.sqlite", "cookies.sqlite", "formhistory.sqlite")
+
+# Một việc trích xuất: một loại dữ liệu trong một thư mục profile tìm thấy.
+BatchTask = namedtuple(
+    "BatchTask", ["browser", "source", "data_type", "db_type", "db_path"]
+)
+
+
+def is_sqlite(path):
+    """Kiểm tra file có phải cơ sở dữ liệu SQLite qua 16 byte đầu."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def detect_chromium_browser(profile_dir):
+    """Đoán trình duyệt từ đường dẫn profile, "chromium" nếu không nhận ra."""
+    parts = [part.lower() for part in profile_dir.parts]
+    for browser, (_, user_data) in CHROMIUM_BROWSERS.items():
+        # Bỏ "AppData/Local" vì thư mục profile có thể được sao chép riêng.
+        marker = [part.lower() for part in user_data[2:]]
+        for i in range(len(parts) - len(marker) + 1):
+            if parts[i : i + len(marker)] == marker:
+                return browser
+    return "chromium"
+
+
+def find_profiles(root):
+    """Duyệt cây thư mục và trả về các (trình duyệt, thư mục profile) tìm thấy."""
+    profiles = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        directory = Path(dirpath)
+        names = set(filenames)
+        if any(
+            name in names and is_sqlite(directory / name) for name in FIREFOX_MARKERS
+        ):
+            profiles.append(("firefox", directory))
+            dirnames[:] = []
+            continue
+        # Chỉ kiểm tra file khi tên đầu tiên của đường dẫn có mặt, tránh stat thừa.
+        entries = names.union(dirnames)
+        if any(
+            db_file[0] in entries and is_sqlite(directory.joinpath(*db_file))
+            for db_file in CHROMIUM_DB_FILES.values()
+        ):
+            profiles.append((detect_chromium_browser(directory), directory))
+            dirnames[:] = []
+    return profiles
+
+
+def plan_batch_tasks(root, data_types):
+    """Tạo việc trích xuất cho từng loại dữ liệu của mọi profile dưới root."""
+    tasks = []
+    for browser, profile_dir in find_profiles(root):
+        source = profile_dir.relative_to(root).as_posix()
+        db_files = FIREFOX_DB_FILES if browser == "firefox" else CHROMIUM_DB_FILES
+        for data_type in data_types:
+            db_type = get_db_type(browser, data_type)
+            db_file = db_files.get(db_type)
+            if not db_file:
+                continue
+            if isinstance(db_file, str):
+                db_file = (db_file,)
+            db_path = profile_dir.joinpath(*db_file)
+            if db_path.exists():
+                tasks.append(BatchTask(browser, source, data_type, db_type, db_path))
+    return tasks
+
+
+def encode_rows(rows, export_format, header=True):
+    """Mã hóa bản ghi theo định dạng; CSV dùng thêm cột nguồn."""
+    if export_format == "csv":
+        return iter_csv(rows, columns=BATCH_COLUMNS, header=header)
+    return get_exporter(export_format)[0][0](rows)
+
+
+def load_state(state_path):
+    """Đọc mốc gia tăng đã lưu: {nguồn: {loại dữ liệu: mốc}}."""
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(state_path, state):
+    """Ghi mốc gia tăng qua file tạm rồi đổi tên để không để lại file hỏng."""
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temp_path, state_path)
+
+
+def task_watermarks(state, task):
+    """Mốc đã lưu của riêng loại dữ liệu của việc (dict rỗng nếu chưa có)."""
+    marks = state.get(task.source, {})
+    return {task.data_type: marks[task.data_type]} if task.data_type in marks else {}
+
+
+def merge_watermarks(state, task, sent, task_marks):
+    """Ghi vào state các mốc mà việc đã đẩy lên so với sent, không đụng mốc khác."""
+    advanced = {
+        name: mark for name, mark in task_marks.items() if sent.get(name) != mark
+    }
+    if advanced:
+        state.setdefault(task.source, {}).update(advanced)
+
+
+def open_task_rows(task, typed=False, watermarks=None, mode="copy", limit=None):
+    """Mở nguồn của một việc, trả về (iterator bản ghi hoặc None, danh sách lỗi, hàm đóng).
+
+    task chỉ cần browser, db_type, data_type và db_path (BatchTask hoặc
+    collector.CollectTask). Hàm đóng giải phóng kết nối và bản sao tạm; gọi sau khi
+    duyệt xong, kể cả khi lỗi.
+    """
+    if task.browser == "firefox" and task.db_type == "Logins":
+        rows, errors = iter_firefox_data(
+            task.db_path,
+            task.db_type,
+            None,
+            task.data_type,
+            limit,
+            typed=typed,
+            watermarks=watermarks,
+        )
+        return rows, errors, lambda: None
+
+    temp_db, owned, error = snapshot_db(task.db_path, mode)
+    if not temp_db:
+        return None, [error], lambda: None
+    conn = None
+
+    def close():
+        if conn:
+            conn.close()
+        if owned:
+            remove_db_files(temp_db)
+
+    try:
+        conn = connect_db(temp_db, immutable=not owned)
+        cursor = conn.cursor()
+        if task.browser == "firefox":
+            rows, errors = iter_firefox_data(
+                task.db_path,
+                task.db_type,
+                cursor,
+                task.data_type,
+                limit,
+                typed=typed,
+                watermarks=watermarks,
+            )
+        else:
+            rows, errors = iter_chromium_data(
+                cursor,
+                task.db_type,
+                task.data_type,
+                limit,
+                typed=typed,
+                watermarks=watermarks,
+            )
+    except Exception:
+        close()
+        raise
+    return rows, errors, close
+
+
+def run_batch_task(
+    task, export_format, part_path, watermarks=None, case_db=None, mode="copy"
+):
+    """Đọc một việc, ghi ra một phần của file kết quả và/hoặc nạp vào kho vụ việc.
+
+    part_path=None bỏ qua file kết quả; watermarks bật chế độ gia tăng (xem
+    iter_artifacts); mode là cách mở file nguồn (xem snapshot_cache.ACCESS_MODES).
+    Trả về (số bản ghi, lỗi, mốc mới).
+    """
+    # Kho vụ việc lưu thời gian dạng số nên luôn đọc bản ghi có kiểu khi nạp.
+    typed = export_format != "csv" or case_db is not None
+    close = None
+    case_conn = None
+    count = 0
+    try:
+        writer = None
+        if case_db:
+            # Chỉ nạp kho vụ việc mới cần case_store, giữ khởi động nhanh cho việc xuất.
+            from case_store import CaseWriter, open_case_store
+
+            case_conn = open_case_store(case_db)
+            # Chế độ gia tăng chỉ nối thêm bản ghi mới, không nạp lại từ đầu.
+            writer = CaseWriter(
+                case_conn,
+                task.browser,
+                task.source,
+                task.data_type,
+                replace=watermarks is None,
+            )
+        rows, errors, close = open_task_rows(task, typed, watermarks, mode)
+        if rows is None:
+            return 0, ", ".join(errors), watermarks
+
+        def tagged():
+            nonlocal count
+            for row in rows:
+                count += 1
+                if writer:
+                    writer.add(row)
+                tagged_record = record_type((*SOURCE_COLUMNS, *row.columns))
+                yield tagged_record((task.browser, task.source, *row))
+
+        if part_path:
+            with open(part_path, "wb") as f:
+                for chunk in encode_rows(tagged(), export_format, header=False):
+                    f.write(chunk)
+        else:
+            for _ in tagged():
+                pass
+        if writer:
+            writer.flush()
+        if not count and errors:
+            return 0, ", ".join(errors), watermarks
+        return count, None, watermarks
+    # Phần ghi dở bị bỏ qua khi ghép để file kết quả luôn hợp lệ.
+    except sqlite3.Error as e:
+        return 0, f"Lỗi cơ sở dữ liệu: {e}", watermarks
+    except OSError as e:
+        return 0, f"Lỗi đọc/ghi file: {e}", watermarks
+    finally:
+        if close:
+            close()
+        if case_conn:
+            case_conn.close()
+
+
+def run_batch(
+    root,
+    output,
+    export_format="csv",
+    data_types=None,
+    workers=None,
+    state_path=None,
+    case_db=None,
+    mode="copy",
+):
+    """Trích xuất mọi profile dưới root trên một pool tiến trình và ghép vào output.
+
+    Với state_path, chỉ bản ghi sau mốc đã lưu của từng profile và loại dữ liệu
+    được đọc rồi nối tiếp vào output có sẵn; mốc chỉ được lưu khi ghi xong.
+    Với case_db, bản ghi đồng thời được nạp vào kho vụ việc; output có thể là None.
+    Tiến trình được in ra stderr. Trả về (tổng số bản ghi, danh sách lỗi).
+    """
+    root = Path(root)
+    output = Path(output) if output else None
+    tasks = plan_batch_tasks(root, data_types or DATA_TYPES)
+    print(f"Tìm thấy {len(tasks)} việc trích xuất dưới {root}", file=sys.stderr)
+    state = load_state(state_path) if state_path else None
+    append = state is not None and output is not None and output.exists()
+    if case_db:
+        from case_store import open_case_store
+
+        # Tạo lược đồ một lần trước khi các tiến trình cùng ghi vào kho.
+        open_case_store(case_db).close()
+
+    parts_dir = Path(
+        tempfile.mkdtemp(prefix="batch_parts_", dir=output.parent if output else None)
+    )
+    counts = [0] * len(tasks)
+    # Mỗi việc chỉ nhận mốc của loại dữ liệu của nó: các việc khác cùng nguồn chạy
+    # song song, nên gửi cả dict của nguồn sẽ làm mốc cũ ghi đè mốc vừa được đẩy lên.
+    sent = [None if state is None else task_watermarks(state, task) for task in tasks]
+    marks = [None] * len(tasks)
+    errors = []
+    started = time.monotonic()
+    # Pool tiến trình chỉ cần khi chạy hàng loạt; nạp muộn để dòng lệnh nhẹ (xem cli.py)
+    # không phải trả chi phí import concurrent.futures.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    run_batch_task,
+                    task,
+                    export_format,
+                    parts_dir / str(i) if output else None,
+                    None if sent[i] is None else dict(sent[i]),
+                    case_db,
+                    mode,
+                ): i
+                for i, task in enumerate(tasks)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                task = tasks[i]
+                try:
+                    counts[i], error, marks[i] = future.result()
+                except Exception as e:
+                    counts[i], error = 0, f"Lỗi không xác định: {e}"
+                if error:
+                    # Mốc của việc lỗi không được lưu để lần sau đọc lại.
+                    marks[i] = None
+                    errors.append(
+                        {
+                            "source": task.source,
+                            "data_type": task.data_type,
+                            "error": error,
+                        }
+                    )
+                status = error or f"{counts[i]} bản ghi"
+                print(
+                    f"[{done}/{len(tasks)}] {time.monotonic() - started:.1f}s "
+                    f"{task.browser} {task.source} {task.data_type}: {status}",
+                    file=sys.stderr,
+                )
+
+        # Ghép các phần theo thứ tự việc để kết quả ổn định giữa các lần chạy.
+        if output:
+            with open(output, "ab" if append else "wb") as out:
+                if export_format == "csv" and not append:
+                    out.write(next(iter_csv((), columns=BATCH_COLUMNS)))
+                for i, count in enumerate(counts):
+                    part_path = parts_dir / str(i)
+                    if count and part_path.exists():
+                        with open(part_path, "rb") as part:
+                            shutil.copyfileobj(part, out)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    if state is not None:
+        for task, task_sent, task_marks in zip(tasks, sent, marks):
+            if task_marks:
+                merge_watermarks(state, task, task_sent, task_marks)
+        save_state(state_path, state)
+    return sum(counts), errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Trích xuất dữ liệu trình duyệt từ thư mục thu thập ngoại tuyến "
+        "(ảnh đĩa đã mount, gói triage, thư mục profile sao chép)."
+    )
+    parser.add_argument("root", type=Path, help="Thư mục gốc chứa các cây AppData")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="File kết quả")
+    parser.add_argument("-f", "--format", choices=BATCH_FORMATS, default="csv")
+    parser.add_argument(
+        "-t",
+        "--data-type",
+        dest="data_types",
+        action="append",
+        choices=DATA_TYPES,
+        help="Loại dữ liệu cần trích xuất (lặp lại được, mặc định tất cả)",
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="Số tiến trình song song"
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=None,
+        help="File lưu mốc gia tăng; chỉ lấy bản ghi mới và nối vào file kết quả",
+    )
+    parser.add_argument(
+        "--case-db",
+        default=None,
+        help="Kho vụ việc SQLite để nạp bản ghi, tìm kiếm bằng /search",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=ACCESS_MODES,
+        default="copy",
+        help="Cách mở file nguồn: copy (sao chép), backup (backup API, gồm cả -wal), "
+        "immutable (đọc thẳng, không sao chép; chỉ cho dữ liệu không còn thay đổi)",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.root.is_dir():
+        parser.error(f"Thư mục không tồn tại: {args.root}")
+    if not args.output and not args.case_db:
+        parser.error("Cần ít nhất một trong --output hoặc --case-db.")
+    exporter, error = get_exporter(args.format)
+    if not exporter:
+        parser.error(error)
+
+    total, errors = run_batch(
+        args.root,
+        args.output,
+        args.format,
+        args.data_types,
+        args.workers,
+        args.state,
+        args.case_db,
+        args.mode,
+    )
+    print(
+        f"Đã ghi {total} bản ghi vào {args.output or args.case_db} ({len(errors)} lỗi).",
+        file=sys.stderr,
+    )
+    return 0 if total or args.state else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
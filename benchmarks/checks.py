@@ -0,0 +1,174 @@
+import argparse
+import gzip
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from benchmarks.synthetic import generate_home
+
+# Kiểm tra tính đúng đắn trên dữ liệu giả (cùng dữ liệu với benchmarks.run): các lỗi đơn vị
+# thời gian không làm hỏng chương trình mà chỉ cho ra cột rỗng hay bộ lọc bỏ sót, nên
+# được kiểm tra bằng dữ liệu thay vì đo thời gian.
+DEFAULT_ROWS = 2000
+FILTER_SINCE = "2022-01-01"
+# Khoảng hợp lệ của "Dấu thời gian" (microseconds Unix): dữ liệu giả nằm trong 2020-2024,
+# hạn dùng cookie có thể xa hơn vài năm.
+PLAUSIBLE_START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+PLAUSIBLE_END = datetime(2040, 1, 1, tzinfo=timezone.utc)
+# Profile Firefox giả không có bảng moz_downloads (như Firefox hiện đại).
+SKIP = {("firefox", "downloads")}
+
+
+def to_micros(moment):
+    return int(moment.timestamp() * 1000000)
+
+
+def export_typed(client, browser, data_type, **filters):
+    """Xuất toàn bộ bản ghi dạng NDJSON gzip (có "Dấu thời gian"); trả về (bản ghi, lỗi)."""
+    response = client.post(
+        "/download",
+        data={
+            "browser": browser,
+            "data_type": data_type,
+            "limit": 0,
+            "format": "ndjson.gz",
+            **filters,
+        },
+    )
+    if response.mimetype == "application/json":
+        return [], response.get_json().get("error")
+    lines = gzip.decompress(response.get_data()).decode("utf-8").splitlines()
+    return [json.loads(line) for line in lines], None
+
+
+def check_typed_timestamps(client, browser, data_type):
+    """Mọi "Dấu thời gian" (nếu có) nằm trong khoảng hợp lệ."""
+    rows, error = export_typed(client, browser, data_type)
+    if error:
+        return [error]
+    return check_plausible(rows)
+
+
+def check_plausible(rows):
+    """Lỗi cho các "Dấu thời gian" ngoài khoảng PLAUSIBLE_START-PLAUSIBLE_END."""
+    low, high = to_micros(PLAUSIBLE_START), to_micros(PLAUSIBLE_END)
+    bad = [
+        row["Dấu thời gian"]
+        for row in rows
+        if row["Dấu thời gian"] is not None and not low <= row["Dấu thời gian"] < high
+    ]
+    if bad:
+        return [
+            f"{len(bad)}/{len(rows)} dấu thời gian ngoài khoảng hợp lệ, ví dụ {bad[0]}"
+        ]
+    return []
+
+
+def check_since_filter(client, browser, data_type):
+    """Lọc since (đẩy xuống SQL trên cột gốc) trả về đúng các bản ghi từ mốc trở đi.
+
+    Bắt các loại dữ liệu mà bộ lọc đổi mốc sang sai đơn vị của cột, ví dụ tự động điền
+    của Chromium lưu số giây Unix.
+    """
+    rows, error = export_typed(client, browser, data_type)
+    if error:
+        return [error]
+    since = to_micros(datetime.fromisoformat(FILTER_SINCE).replace(tzinfo=timezone.utc))
+    stamps = [row["Dấu thời gian"] for row in rows if row["Dấu thời gian"] is not None]
+    if not stamps:
+        # Loại dữ liệu không có thời gian (ví dụ tự động điền của Firefox): không lọc được.
+        return []
+    expected = sum(1 for stamp in stamps if stamp >= since)
+    if not expected:
+        # Dữ liệu giả trải tới 2024 nên luôn có bản ghi sau mốc nếu thời gian đúng đơn vị.
+        return [f"không có dấu thời gian nào từ {FILTER_SINCE}"]
+    filtered, error = export_typed(client, browser, data_type, since=FILTER_SINCE)
+    if error:
+        return [f"lọc since={FILTER_SINCE}: {error}"]
+    if len(filtered) != expected:
+        return [
+            f"lọc since={FILTER_SINCE} trả về {len(filtered)} bản ghi, cần {expected}"
+        ]
+    return []
+
+
+def check_timeline_order(client, browser):
+    """Dòng thời gian "all" sắp theo thời gian giảm dần, bản ghi không có thời gian ở cuối.
+
+    Cookie sắp theo thời điểm tạo nhưng "Dấu thời gian" là hạn dùng nên bị bỏ qua.
+    """
+    rows, error = export_typed(client, browser, "all")
+    if error:
+        return [error]
+    failures = check_plausible(rows)
+    previous = None
+    for position, row in enumerate(rows):
+        if row["Loại"] == "Cookie":
+            continue
+        stamp = row["Dấu thời gian"]
+        if previous is not None and (
+            stamp is not None and (previous[1] is None or stamp > previous[1])
+        ):
+            failures.append(
+                f"dòng {position} ({row['Loại']}, {stamp}) đứng sau "
+                f"dòng {previous[0]} ({previous[1]})"
+            )
+            break
+        previous = (position, stamp)
+    return failures
+
+
+CHECKS = {
+    "typed_timestamps": check_typed_timestamps,
+    "since_filter": check_since_filter,
+}
+
+
+def run(workdir, rows=DEFAULT_ROWS):
+    """Sinh dữ liệu giả rồi chạy mọi kiểm tra; trả về danh sách lỗi."""
+    home = Path(workdir) / "home"
+    paths = generate_home(home, rows)
+    # Giống benchmarks.run: profile giả theo cây AppData của Windows, bộ nhớ đệm riêng.
+    os.environ["HOME"] = os.environ["USERPROFILE"] = str(home)
+    os.environ["SNAPSHOT_CACHE_DIR"] = str(Path(workdir) / "cache")
+    platform.system = lambda: "Windows"
+    import app
+    from collector import DATA_TYPES
+
+    client = app.app.test_client()
+    failures = []
+    for browser in paths:
+        for data_type in DATA_TYPES:
+            if (browser, data_type) in SKIP:
+                continue
+            for name, check in CHECKS.items():
+                for failure in check(client, browser, data_type):
+                    failures.append(f"{name} {browser} {data_type}: {failure}")
+        for failure in check_timeline_order(client, browser):
+            failures.append(f"timeline_order {browser} all: {failure}")
+    app.snapshot_cache.clear()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Kiểm tra đơn vị thời gian, dấu thời gian và bộ lọc trên dữ liệu giả."
+    )
+    parser.add_argument(
+        "-n", "--rows", type=int, default=DEFAULT_ROWS, help="Số lượt truy cập lịch sử"
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="browser_checks_") as temp_dir:
+        failures = run(temp_dir, args.rows)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    print(f"{len(failures)} lỗi.", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
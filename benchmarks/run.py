@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from benchmarks.synthetic import generate_home
+
+DEFAULT_SIZES = [10000]
+DEFAULT_REPEAT = 3
+PREVIEW_LIMIT = 1000
+ITEMS_PER_PAGE = 20
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def measure(work, repeat, setup=None):
+    """Chạy work() repeat lần (setup() trước mỗi lần, không tính giờ), trả về (thời gian, kết quả)."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = work()
+        runs.append(time.perf_counter() - start)
+    return runs, result
+
+
+class Recorder:
+    """Gom kết quả đo thành danh sách bản ghi phẳng, dễ so sánh giữa các phiên bản."""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def run(
+        self, stage, context, work, setup=None, rows=None, output_bytes=None, error=None
+    ):
+        runs, result = measure(work, self.repeat, setup)
+        record = {
+            **context,
+            "stage": stage,
+            "min": min(runs),
+            "median": statistics.median(runs),
+            "runs": runs,
+            "rows": rows(result) if rows else None,
+            "bytes": output_bytes(result) if output_bytes else None,
+            "error": error(result) if error else None,
+        }
+        self.results.append(record)
+        print(
+            f"{context['size']:>9} {context['browser']:8} {context['data_type']:10} "
+            f"{stage:24} {record['min'] * 1000:10.1f} ms",
+            file=sys.stderr,
+        )
+        return result
+
+
+def clear_caches():
+    """Xóa bản sao và kết quả đã tính để đo lần chạy đầu.
+
+    Chỉ chạm tới thư mục bộ nhớ đệm riêng của lượt đo (xem run), không phải của ứng dụng
+    đang chạy thật.
+    """
+    from snapshot_cache import snapshot_cache
+
+    snapshot_cache.clear()
+    snapshot_cache.results.clear()
+
+
+def bench_readers(app, recorder, size, paths):
+    """Đo từng giai đoạn của read_browser_data và save_to_csv cho mỗi loại dữ liệu."""
+    from collector import DATA_TYPES, get_db_type
+    from snapshot_cache import snapshot_cache
+
+    for browser, db_paths in paths.items():
+        for data_type in DATA_TYPES:
+            db_type = get_db_type(browser, data_type)
+            db_path = db_paths[db_type]
+            context = {"size": size, "browser": browser, "data_type": data_type}
+            sqlite_source = db_path.suffix != ".json"
+
+            if sqlite_source:
+
+                def copy():
+                    snapshot, _ = snapshot_cache.acquire(db_path)
+                    snapshot_cache.release(snapshot)
+
+                recorder.run("snapshot_copy", context, copy, setup=clear_caches)
+
+                snapshot, _ = snapshot_cache.acquire(db_path)
+                conn = snapshot.connect()
+                counter, estimator = app.record_counters(browser)
+                recorder.run(
+                    "count_exact",
+                    context,
+                    lambda: counter(conn.cursor(), db_type, data_type),
+                    rows=lambda total: total,
+                )
+                recorder.run(
+                    "count_estimate",
+                    context,
+                    lambda: estimator(conn.cursor(), db_type, data_type),
+                    rows=lambda total: total,
+                )
+                conn.close()
+                snapshot_cache.release(snapshot)
+
+            def read_page():
+                data, error = app.read_browser_data(
+                    db_path,
+                    db_type,
+                    browser,
+                    PREVIEW_LIMIT,
+                    data_type,
+                    1,
+                    ITEMS_PER_PAGE,
+                )
+                return data
+
+            page_rows = lambda data: len(data["data"]) if data else 0
+            recorder.run(
+                "read_browser_data_cold",
+                context,
+                read_page,
+                setup=clear_caches,
+                rows=page_rows,
+            )
+            recorder.run("read_browser_data_warm", context, read_page, rows=page_rows)
+
+            def read_all():
+                rows, close, error = app.stream_browser_data(
+                    db_path, db_type, browser, data_type
+                )
+                if not rows:
+                    return []
+                try:
+                    return list(rows)
+                finally:
+                    close()
+
+            data = recorder.run("stream_all", context, read_all, rows=len)
+            output = Path(tempfile.gettempdir()) / f"bench_{os.getpid()}.csv"
+            recorder.run(
+                "save_to_csv",
+                context,
+                lambda: app.save_to_csv(data, output),
+                rows=lambda _: len(data),
+            )
+            if output.exists():
+                output.unlink()
+
+
+def bench_endpoints(app, recorder, size, paths):
+    """Đo /preview và /download từ đầu đến cuối qua Flask test client."""
+    from collector import DATA_TYPES
+
+    client = app.app.test_client()
+    for browser in paths:
+        for data_type in ["all", *DATA_TYPES]:
+            context = {"size": size, "browser": browser, "data_type": data_type}
+            form = {"browser": browser, "data_type": data_type}
+
+            def preview():
+                return client.post(
+                    "/preview", data={**form, "limit": PREVIEW_LIMIT}
+                ).get_json()
+
+            page_rows = lambda data: len(data.get("data", []))
+            page_error = lambda data: data.get("error")
+            recorder.run(
+                "preview_cold",
+                context,
+                preview,
+                setup=clear_caches,
+                rows=page_rows,
+                error=page_error,
+            )
+            first = recorder.run(
+                "preview_warm", context, preview, rows=page_rows, error=page_error
+            )
+            if first.get("next_cursor"):
+                recorder.run(
+                    "preview_next_page",
+                    context,
+                    lambda: client.get(
+                        f"/preview?page=2&cursor={first['next_cursor']}"
+                    ).get_json(),
+                    rows=page_rows,
+                    error=page_error,
+                )
+
+            if data_type == "all":
+                continue
+            for export_format in ["csv", "ndjson.gz"]:
+
+                def download():
+                    response = client.post(
+                        "/download",
+                        data={**form, "limit": "", "format": export_format},
+                    )
+                    # Đọc hết phản hồi theo luồng để tính cả thời gian xuất dữ liệu.
+                    return response, response.get_data()
+
+                recorder.run(
+                    f"download_{export_format}",
+                    {**context, "format": export_format},
+                    download,
+                    output_bytes=lambda result: len(result[1]),
+                    error=lambda result: (
+                        result[0].get_json().get("error") if result[0].is_json else None
+                    ),
+                )
+
+
+def run(sizes, workdir, repeat=DEFAULT_REPEAT, endpoints=True):
+    """Sinh dữ liệu cho từng kích thước rồi đo; trả về tài liệu kết quả dạng dict."""
+    recorder = Recorder(repeat)
+    generated = {}
+    host_platform = platform.platform()
+    # Bản sao, kho kết quả và việc nền của lượt đo nằm trong workdir, đặt trước khi import
+    # app để không dùng chung (và không bị clear_caches xóa) bộ nhớ đệm của các worker thật.
+    os.environ["SNAPSHOT_CACHE_DIR"] = str(Path(workdir) / "cache")
+    for size in sizes:
+        home = Path(workdir) / str(size)
+        start = time.perf_counter()
+        paths = generate_home(home, size)
+        generated[size] = time.perf_counter() - start
+
+        # Ứng dụng tìm profile qua Path.home(): HOME trên Linux/macOS, USERPROFILE trên Windows.
+        os.environ["HOME"] = os.environ["USERPROFILE"] = str(home)
+        # Dữ liệu giả dùng cây AppData của Windows nên cho phép chạy đo trên mọi hệ điều hành.
+        platform.system = lambda: "Windows"
+        import app
+
+        bench_readers(app, recorder, size, paths)
+        if endpoints:
+            bench_endpoints(app, recorder, size, paths)
+    # Dọn bản sao trước khi workdir tạm bị xóa.
+    clear_caches()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": host_platform,
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "generate_seconds": generated,
+            "snapshot_mode": os.environ.get("SNAPSHOT_MODE", "copy"),
+        },
+        "results": recorder.results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Đo hiệu năng các module đọc và các endpoint trên dữ liệu giả."
+    )
+    parser.add_argument(
+        "-n",
+        "--rows",
+        dest="sizes",
+        type=int,
+        action="append",
+        help="Số lượt truy cập lịch sử của dữ liệu giả (lặp lại được, mặc định 10000)",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="File JSON kết quả (mặc định stdout)",
+    )
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=None,
+        help="Thư mục chứa dữ liệu giả (mặc định thư mục tạm, xóa khi xong)",
+    )
+    parser.add_argument(
+        "--no-endpoints", action="store_true", help="Bỏ qua /preview và /download"
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="browser_bench_") as temp_dir:
+        report = run(
+            args.sizes or DEFAULT_SIZES,
+            args.workdir or temp_dir,
+            args.repeat,
+            not args.no_endpoints,
+        )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
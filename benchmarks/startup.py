@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from benchmarks.run import git_revision
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_REPEAT = 10
+TOP_IMPORTS = 15
+# Lệnh được đo, mỗi lần trong một trình thông dịch mới: tên -> tham số của python.
+TARGETS = {
+    "python": ["-c", "pass"],
+    "import_cli": ["-c", "import cli"],
+    "cli_help": ["cli.py", "--help"],
+    "import_batch": ["-c", "import batch"],
+    "import_app": ["-c", "import app"],
+}
+# Thư viện nặng hoặc tùy chọn không được nạp khi khởi động dòng lệnh.
+HEAVY_MODULES = (
+    "flask",
+    "werkzeug",
+    "jinja2",
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "zstandard",
+    "orjson",
+    "brotli",
+    "concurrent.futures",
+)
+
+
+def run_python(args, **kwargs):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+        **kwargs,
+    )
+
+
+def measure(args, repeat):
+    """Thời gian (giây) của repeat lần chạy python args, sau một lần chạy làm nóng.
+
+    Lần làm nóng tạo __pycache__ nên số đo là khởi động thường gặp, không tính biên dịch.
+    """
+    run_python(args)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_python(args)
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def loaded_heavy_modules(module):
+    """Các module trong HEAVY_MODULES đã được nạp sau khi import module."""
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {list(HEAVY_MODULES)!r} if m in sys.modules]))"
+    )
+    return json.loads(run_python(["-c", code]).stdout)
+
+
+def top_imports(module, count=TOP_IMPORTS):
+    """Các import tốn thời gian nhất (cộng dồn, micro giây) theo python -X importtime."""
+    stderr = run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            entries.append({"module": name.strip(), "cumulative_us": int(cumulative)})
+    entries.sort(key=lambda entry: entry["cumulative_us"], reverse=True)
+    return entries[:count]
+
+
+def run(repeat=DEFAULT_REPEAT):
+    """Đo thời gian khởi động các điểm vào; trả về tài liệu kết quả dạng dict."""
+    results = []
+    for target, args in TARGETS.items():
+        runs = measure(args, repeat)
+        record = {
+            "target": target,
+            "min": min(runs),
+            "median": statistics.median(runs),
+            "runs": runs,
+        }
+        results.append(record)
+        print(
+            f"{target:14} {record['min'] * 1000:8.1f} ms "
+            f"(trung vị {record['median'] * 1000:.1f} ms)",
+            file=sys.stderr,
+        )
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": results,
+        "cli_heavy_modules": loaded_heavy_modules("cli"),
+        "cli_top_imports": top_imports("cli"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Đo thời gian khởi động của dòng lệnh (cli.py) so với ứng dụng web."
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="File JSON kết quả (mặc định stdout)",
+    )
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Báo lỗi nếu import cli chậm hơn trình thông dịch trống quá số mili giây này",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    failures = []
+    if report["cli_heavy_modules"]:
+        failures.append(
+            f"cli nạp thư viện nặng: {', '.join(report['cli_heavy_modules'])}"
+        )
+    if args.max_ms is not None:
+        medians = {record["target"]: record["median"] for record in report["results"]}
+        overhead = (medians["import_cli"] - medians["python"]) * 1000
+        if overhead > args.max_ms:
+            failures.append(
+                f"import cli mất {overhead:.1f} ms, vượt ngưỡng {args.max_ms:.1f} ms"
+            )
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
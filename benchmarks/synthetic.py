@@ -0,0 +1,378 @@
+import argparse
+import json
+import os
+import sqlite3
+from pathlib import Path
+from chromium_reader import BROWSERS as CHROMIUM_BROWSERS, DB_FILES as CHROMIUM_DB_FILES
+from firefox_reader import DB_FILES as FIREFOX_DB_FILES, PROFILES_DIRS
+from timeconv import CHROME_EPOCH_OFFSET
+
+# Dữ liệu giả trải đều từ 2020-01-01 trong bốn năm, thời gian tăng theo id như dữ liệu thật.
+START = 1577836800
+SPAN = 4 * 365 * 86400
+FIREFOX_PROFILE = "bench.default-release"
+
+# Tỉ lệ số dòng của từng bảng so với số lượt truy cập (rows).
+RATIOS = {
+    "urls": 10,
+    "hosts": 200,
+    "downloads": 100,
+    "cookies": 10,
+    "logins": 1000,
+    "autofill": 100,
+}
+
+CHROMIUM_SCHEMAS = {
+    "History": """
+CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+CREATE TABLE urls(id INTEGER PRIMARY KEY AUTOINCREMENT, url LONGVARCHAR, title LONGVARCHAR,
+    visit_count INTEGER DEFAULT 0 NOT NULL, typed_count INTEGER DEFAULT 0 NOT NULL,
+    last_visit_time INTEGER NOT NULL, hidden INTEGER DEFAULT 0 NOT NULL);
+CREATE TABLE visits(id INTEGER PRIMARY KEY AUTOINCREMENT, url INTEGER NOT NULL,
+    visit_time INTEGER NOT NULL, from_visit INTEGER, transition INTEGER DEFAULT 0 NOT NULL,
+    segment_id INTEGER, visit_duration INTEGER DEFAULT 0 NOT NULL,
+    incremented_omnibox_typed_score BOOLEAN DEFAULT FALSE NOT NULL, opener_visit INTEGER,
+    originator_cache_guid TEXT, originator_visit_id INTEGER, originator_from_visit INTEGER,
+    originator_opener_visit INTEGER, is_known_to_sync BOOLEAN DEFAULT FALSE NOT NULL,
+    consider_for_ntp_most_visited BOOLEAN DEFAULT FALSE NOT NULL, external_referrer_url TEXT,
+    visited_link_id INTEGER);
+CREATE TABLE downloads (id INTEGER PRIMARY KEY, guid VARCHAR NOT NULL,
+    current_path LONGVARCHAR NOT NULL, target_path LONGVARCHAR NOT NULL,
+    start_time INTEGER NOT NULL, received_bytes INTEGER NOT NULL, total_bytes INTEGER NOT NULL,
+    state INTEGER NOT NULL, danger_type INTEGER NOT NULL, interrupt_reason INTEGER NOT NULL,
+    hash BLOB NOT NULL, end_time INTEGER NOT NULL, opened INTEGER NOT NULL,
+    last_access_time INTEGER NOT NULL, transient INTEGER NOT NULL, referrer VARCHAR NOT NULL,
+    site_url VARCHAR NOT NULL, embedder_download_data VARCHAR NOT NULL,
+    tab_url VARCHAR NOT NULL, tab_referrer_url VARCHAR NOT NULL, http_method VARCHAR NOT NULL,
+    by_ext_id VARCHAR NOT NULL, by_ext_name VARCHAR NOT NULL, by_web_app_id VARCHAR NOT NULL,
+    etag VARCHAR NOT NULL, last_modified VARCHAR NOT NULL, mime_type VARCHAR(255) NOT NULL,
+    original_mime_type VARCHAR(255) NOT NULL);
+CREATE TABLE downloads_url_chains (id INTEGER NOT NULL, chain_index INTEGER NOT NULL,
+    url LONGVARCHAR NOT NULL, PRIMARY KEY (id, chain_index));
+""",
+    "Cookies": """
+CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+CREATE TABLE cookies(creation_utc INTEGER NOT NULL, host_key TEXT NOT NULL,
+    top_frame_site_key TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL,
+    encrypted_value BLOB NOT NULL, path TEXT NOT NULL, expires_utc INTEGER NOT NULL,
+    is_secure INTEGER NOT NULL, is_httponly INTEGER NOT NULL, last_access_utc INTEGER NOT NULL,
+    has_expires INTEGER NOT NULL, is_persistent INTEGER NOT NULL, priority INTEGER NOT NULL,
+    samesite INTEGER NOT NULL, source_scheme INTEGER NOT NULL, source_port INTEGER NOT NULL,
+    last_update_utc INTEGER NOT NULL, source_type INTEGER NOT NULL,
+    has_cross_site_ancestor INTEGER NOT NULL,
+    UNIQUE (host_key, top_frame_site_key, has_cross_site_ancestor, name, path,
+        source_scheme, source_port));
+""",
+    "Logins": """
+CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+CREATE TABLE logins (origin_url VARCHAR NOT NULL, action_url VARCHAR,
+    username_element VARCHAR, username_value VARCHAR, password_element VARCHAR,
+    password_value BLOB, submit_element VARCHAR, signon_realm VARCHAR NOT NULL,
+    date_created INTEGER NOT NULL, blacklisted_by_user INTEGER NOT NULL,
+    scheme INTEGER NOT NULL, password_type INTEGER, times_used INTEGER, form_data BLOB,
+    display_name VARCHAR, icon_url VARCHAR, federation_url VARCHAR, skip_zero_click INTEGER,
+    generation_upload_status INTEGER, possible_username_pairs BLOB,
+    id INTEGER PRIMARY KEY AUTOINCREMENT, date_last_used INTEGER NOT NULL DEFAULT 0,
+    moving_blocked_for BLOB, date_password_modified INTEGER NOT NULL DEFAULT 0,
+    sender_email VARCHAR, sender_name VARCHAR, date_received INTEGER,
+    sharing_notification_displayed INTEGER NOT NULL DEFAULT 0, keychain_identifier BLOB,
+    sender_profile_image_url VARCHAR,
+    UNIQUE (origin_url, username_element, username_value, password_element, signon_realm));
+""",
+    "Autofill": """
+CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+CREATE TABLE autofill (name VARCHAR, value VARCHAR, value_lower VARCHAR,
+    date_created INTEGER DEFAULT 0, date_last_used INTEGER DEFAULT 0, count INTEGER DEFAULT 1,
+    PRIMARY KEY (name, value));
+""",
+}
+
+FIREFOX_SCHEMAS = {
+    "History": """
+CREATE TABLE moz_origins (id INTEGER PRIMARY KEY, prefix TEXT NOT NULL, host TEXT NOT NULL,
+    frecency INTEGER NOT NULL, recalc_frecency INTEGER NOT NULL DEFAULT 0,
+    alt_frecency INTEGER, recalc_alt_frecency INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (prefix, host));
+CREATE TABLE moz_places (id INTEGER PRIMARY KEY, url LONGVARCHAR, title LONGVARCHAR,
+    rev_host LONGVARCHAR, visit_count INTEGER DEFAULT 0, hidden INTEGER DEFAULT 0 NOT NULL,
+    typed INTEGER DEFAULT 0 NOT NULL, frecency INTEGER DEFAULT -1 NOT NULL,
+    last_visit_date INTEGER, guid TEXT, foreign_count INTEGER DEFAULT 0 NOT NULL,
+    url_hash INTEGER DEFAULT 0 NOT NULL, description TEXT, preview_image_url TEXT,
+    site_name TEXT, origin_id INTEGER REFERENCES moz_origins(id),
+    recalc_frecency INTEGER NOT NULL DEFAULT 0, alt_frecency INTEGER,
+    recalc_alt_frecency INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE moz_historyvisits (id INTEGER PRIMARY KEY, from_visit INTEGER,
+    place_id INTEGER, visit_date INTEGER, visit_type INTEGER, session INTEGER,
+    source INTEGER DEFAULT 0 NOT NULL, triggeringPlaceId INTEGER);
+""",
+    "Cookies": """
+CREATE TABLE moz_cookies (id INTEGER PRIMARY KEY, originAttributes TEXT NOT NULL DEFAULT '',
+    name TEXT, value TEXT, host TEXT, path TEXT, expiry INTEGER, lastAccessed INTEGER,
+    creationTime INTEGER, isSecure INTEGER, isHttpOnly INTEGER,
+    inBrowserElement INTEGER DEFAULT 0, sameSite INTEGER DEFAULT 0,
+    rawSameSite INTEGER DEFAULT 0, schemeMap INTEGER DEFAULT 0,
+    isPartitionedAttributeSet INTEGER DEFAULT 0,
+    CONSTRAINT moz_uniqueid UNIQUE (name, host, path, originAttributes));
+""",
+    "Formhistory": """
+CREATE TABLE moz_formhistory (id INTEGER PRIMARY KEY, fieldname TEXT NOT NULL,
+    value TEXT NOT NULL, timesUsed INTEGER, firstUsed INTEGER, lastUsed INTEGER, guid TEXT);
+CREATE TABLE moz_sources (id INTEGER PRIMARY KEY, source TEXT NOT NULL);
+CREATE TABLE moz_history_to_sources (history_id INTEGER, source_id INTEGER,
+    PRIMARY KEY (history_id, source_id));
+""",
+}
+
+# Chỉ mục được tạo sau khi nạp dữ liệu (nhanh hơn), giống chỉ mục của trình duyệt thật.
+CHROMIUM_INDEXES = {
+    "History": """
+CREATE INDEX urls_url_index ON urls (url);
+CREATE INDEX visits_url_index ON visits (url);
+CREATE INDEX visits_from_index ON visits (from_visit);
+CREATE INDEX visits_time_index ON visits (visit_time);
+CREATE INDEX visits_originator_id_index ON visits (originator_visit_id);
+""",
+}
+
+FIREFOX_INDEXES = {
+    "History": """
+CREATE INDEX moz_places_url_hashindex ON moz_places (url_hash);
+CREATE INDEX moz_places_hostindex ON moz_places (rev_host);
+CREATE INDEX moz_places_visitcount ON moz_places (visit_count);
+CREATE INDEX moz_places_frecencyindex ON moz_places (frecency);
+CREATE INDEX moz_places_lastvisitdateindex ON moz_places (last_visit_date);
+CREATE UNIQUE INDEX moz_places_guid_uniqueindex ON moz_places (guid);
+CREATE INDEX moz_places_originidindex ON moz_places (origin_id);
+CREATE INDEX moz_historyvisits_placedateindex ON moz_historyvisits (place_id, visit_date);
+CREATE INDEX moz_historyvisits_fromindex ON moz_historyvisits (from_visit);
+CREATE INDEX moz_historyvisits_dateindex ON moz_historyvisits (visit_date);
+""",
+    "Formhistory": """
+CREATE INDEX moz_formhistory_index ON moz_formhistory (fieldname);
+CREATE INDEX moz_formhistory_lastused_index ON moz_formhistory (lastUsed);
+CREATE INDEX moz_formhistory_guid_index ON moz_formhistory (guid);
+""",
+}
+
+
+def _sequence(count):
+    """CTE đệ quy sinh 1..count ngay trong SQLite, nhanh hơn nhiều so với vòng lặp Python."""
+    return (
+        "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq "
+        f"WHERE i < {int(count)}) "
+    )
+
+
+def _spread(count, unit):
+    """Biểu thức thời gian tăng dần theo i, trải đều trong SPAN, theo đơn vị unit/giây."""
+    return f"(i * {SPAN * unit // max(count, 1)})"
+
+
+def _hash(expr, modulo):
+    # Băm nhân Knuth: giả ngẫu nhiên nhưng tất định, nên mọi lần sinh cho cùng dữ liệu.
+    return f"(({expr}) * 2654435761 % {max(int(modulo), 1)})"
+
+
+def _connect(path, schema):
+    if path.exists():
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executescript(schema)
+    conn.execute("BEGIN")
+    return conn
+
+
+def _finish(conn, indexes=""):
+    conn.execute("COMMIT")
+    conn.executescript(indexes)
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def sizes(rows):
+    """Số dòng của từng bảng ứng với rows lượt truy cập."""
+    counts = {name: max(rows // ratio, 1) for name, ratio in RATIOS.items()}
+    counts["visits"] = rows
+    counts["logins"] = max(counts["logins"], 10)
+    return counts
+
+
+def generate_chromium(profile_dir, rows):
+    """Sinh History, Network/Cookies, Login Data và Web Data cho một profile Chromium."""
+    n = sizes(rows)
+    chrome_start = (START + CHROME_EPOCH_OFFSET) * 1000000
+    paths = {
+        db_type: profile_dir.joinpath(*db_file)
+        for db_type, db_file in CHROMIUM_DB_FILES.items()
+    }
+
+    conn = _connect(paths["History"], CHROMIUM_SCHEMAS["History"])
+    conn.execute(
+        _sequence(n["urls"])
+        + "INSERT INTO urls (id, url, title, visit_count, typed_count, "
+        "last_visit_time, hidden) SELECT i, "
+        f"'https://www' || (i % 7) || '.site' || {_hash('i', n['hosts'])} || '.com/trang/' || i, "
+        f"'Trang ' || i, 1 + {_hash('i', 20)}, 0, {chrome_start} + {_spread(n['urls'], 1000000)}, "
+        "0 FROM seq"
+    )
+    conn.execute(
+        _sequence(n["visits"]) + "INSERT INTO visits (id, url, visit_time, from_visit, "
+        f"transition, visit_duration) SELECT i, 1 + {_hash('i', n['urls'])}, "
+        f"{chrome_start} + {_spread(n['visits'], 1000000)} + {_hash('i', 1000000)}, 0, "
+        "805306368, 0 FROM seq"
+    )
+    conn.execute(
+        _sequence(n["downloads"])
+        + "INSERT INTO downloads SELECT i, printf('%032x', i), "
+        "'C:\\Users\\bench\\Downloads\\file' || i || '.zip', "
+        "'C:\\Users\\bench\\Downloads\\file' || i || '.zip', "
+        f"{chrome_start} + {_spread(n['downloads'], 1000000)}, 1024, 1024, 1, 0, 0, x'', "
+        f"{chrome_start} + {_spread(n['downloads'], 1000000)} + 1000000, 0, 0, 0, "
+        f"'https://dl' || {_hash('i', 50)} || '.example.com/', '', '', '', '', 'GET', '', '', "
+        "'', '', '', 'application/zip', 'application/zip' FROM seq"
+    )
+    conn.execute(
+        _sequence(n["downloads"]) + "INSERT INTO downloads_url_chains SELECT i, 0, "
+        f"'https://dl' || {_hash('i', 50)} || '.example.com/file' || i || '.zip' FROM seq"
+    )
+    _finish(conn, CHROMIUM_INDEXES["History"])
+
+    conn = _connect(paths["Cookies"], CHROMIUM_SCHEMAS["Cookies"])
+    conn.execute(
+        _sequence(n["cookies"]) + "INSERT INTO cookies SELECT "
+        f"{chrome_start} + {_spread(n['cookies'], 1000000)}, "
+        f"'.site' || {_hash('i', n['hosts'])} || '.com', '', 'cookie' || i, '', x'763130', '/', "
+        f"{chrome_start} + {_spread(n['cookies'], 1000000)} + 31536000000000, 1, 0, "
+        f"{chrome_start}, 1, 1, 1, -1, 2, 443, {chrome_start}, 0, 0 FROM seq"
+    )
+    _finish(conn)
+
+    conn = _connect(paths["Logins"], CHROMIUM_SCHEMAS["Logins"])
+    conn.execute(
+        _sequence(n["logins"])
+        + "INSERT INTO logins (origin_url, action_url, username_element, "
+        "username_value, password_element, password_value, signon_realm, date_created, "
+        "blacklisted_by_user, scheme, times_used) SELECT "
+        "'https://login' || i || '.example.com/', '', 'email', 'user' || i || '@example.com', "
+        "'password', x'763130', 'https://login' || i || '.example.com/', "
+        f"{chrome_start} + {_spread(n['logins'], 1000000)}, 0, 0, 1 FROM seq"
+    )
+    _finish(conn)
+
+    conn = _connect(paths["Autofill"], CHROMIUM_SCHEMAS["Autofill"])
+    conn.execute(
+        _sequence(n["autofill"]) + "INSERT INTO autofill SELECT "
+        "'field' || (i % 12), 'giá trị ' || i, 'giá trị ' || i, "
+        f"{START} + {_spread(n['autofill'], 1)}, {START} + {_spread(n['autofill'], 1)}, "
+        f"1 + {_hash('i', 5)} FROM seq"
+    )
+    _finish(conn)
+    return paths
+
+
+def generate_firefox(profile_dir, rows):
+    """Sinh places.sqlite, cookies.sqlite, formhistory.sqlite và logins.json cho Firefox."""
+    n = sizes(rows)
+    micros = START * 1000000
+    paths = {
+        db_type: profile_dir / db_file for db_type, db_file in FIREFOX_DB_FILES.items()
+    }
+
+    conn = _connect(paths["History"], FIREFOX_SCHEMAS["History"])
+    # rev_host là host viết ngược kèm dấu chấm cuối; SQLite không có sẵn hàm reverse().
+    conn.create_function("reverse", 1, lambda text: text[::-1], deterministic=True)
+    host = f"'www' || (i % 7) || '.site' || {_hash('i', n['hosts'])} || '.com'"
+    conn.execute(
+        _sequence(n["urls"]) + "INSERT INTO moz_places (id, url, title, rev_host, "
+        "visit_count, frecency, last_visit_date, guid, url_hash) SELECT i, "
+        f"'https://' || {host} || '/trang/' || i, 'Trang ' || i, "
+        f"reverse({host}) || '.', "
+        f"1 + {_hash('i', 20)}, 100, {micros} + {_spread(n['urls'], 1000000)}, "
+        f"'g' || i, {_hash('i', 1 << 40)} FROM seq"
+    )
+    conn.execute(
+        _sequence(n["visits"])
+        + "INSERT INTO moz_historyvisits (id, from_visit, place_id, "
+        f"visit_date, visit_type, source) SELECT i, 0, 1 + {_hash('i', n['urls'])}, "
+        f"{micros} + {_spread(n['visits'], 1000000)}, 1, 0 FROM seq"
+    )
+    _finish(conn, FIREFOX_INDEXES["History"])
+
+    conn = _connect(paths["Cookies"], FIREFOX_SCHEMAS["Cookies"])
+    conn.execute(
+        _sequence(n["cookies"])
+        + "INSERT INTO moz_cookies (id, originAttributes, name, value, "
+        "host, path, expiry, lastAccessed, creationTime, isSecure, isHttpOnly) SELECT i, '', "
+        f"'cookie' || i, 'v', '.site' || {_hash('i', n['hosts'])} || '.com', '/', "
+        f"{START} + {_spread(n['cookies'], 1)} + 31536000, {micros}, "
+        f"{micros} + {_spread(n['cookies'], 1000000)}, 1, 0 FROM seq"
+    )
+    _finish(conn)
+
+    conn = _connect(paths["Formhistory"], FIREFOX_SCHEMAS["Formhistory"])
+    conn.execute(
+        _sequence(n["autofill"]) + "INSERT INTO moz_formhistory (id, fieldname, value, "
+        "timesUsed, firstUsed, lastUsed, guid) SELECT i, 'field' || (i % 12), 'giá trị ' || i, "
+        f"1 + {_hash('i', 5)}, {micros} + {_spread(n['autofill'], 1000000)}, "
+        f"{micros} + {_spread(n['autofill'], 1000000)}, 'g' || i FROM seq"
+    )
+    _finish(conn, FIREFOX_INDEXES["Formhistory"])
+
+    # logins.json lưu tên người dùng và mật khẩu đã mã hóa, thời gian tính bằng mili giây.
+    logins = [
+        {
+            "id": i,
+            "hostname": f"https://login{i}.example.com",
+            "httpRealm": None,
+            "formSubmitURL": f"https://login{i}.example.com",
+            "usernameField": "email",
+            "passwordField": "password",
+            "encryptedUsername": "MDoEEPgAAAAAAAAAAAAAAAAAAAEwFAYIKoZIhvcNAwcECA==",
+            "encryptedPassword": "MDoEEPgAAAAAAAAAAAAAAAAAAAEwFAYIKoZIhvcNAwcECA==",
+            "guid": f"{{{i:08x}-0000-4000-8000-000000000000}}",
+            "encType": 1,
+            "timeCreated": (START + i * SPAN // n["logins"]) * 1000,
+            "timeLastUsed": (START + i * SPAN // n["logins"]) * 1000,
+            "timePasswordChanged": (START + i * SPAN // n["logins"]) * 1000,
+            "timesUsed": 1,
+        }
+        for i in range(1, n["logins"] + 1)
+    ]
+    with open(paths["Logins"], "w", encoding="utf-8") as f:
+        json.dump({"nextId": n["logins"] + 1, "logins": logins, "version": 3}, f)
+    return paths
+
+
+def generate_home(home, rows, chromium_browser="edge"):
+    """Sinh một thư mục home giả (cây AppData như Windows) với một profile mỗi trình duyệt.
+
+    Trả về {trình duyệt: {loại cơ sở dữ liệu: đường dẫn}}.
+    """
+    home = Path(home)
+    user_data = home.joinpath(*CHROMIUM_BROWSERS[chromium_browser][1])
+    firefox_dir = home.joinpath(*PROFILES_DIRS["windows"], FIREFOX_PROFILE)
+    return {
+        chromium_browser: generate_chromium(user_data / "Default", rows),
+        "firefox": generate_firefox(firefox_dir, rows),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Sinh dữ liệu trình duyệt giả (đúng lược đồ) để đo hiệu năng."
+    )
+    parser.add_argument("home", type=Path, help="Thư mục home giả sẽ được tạo")
+    parser.add_argument(
+        "-n", "--rows", type=int, default=10000, help="Số lượt truy cập lịch sử"
+    )
+    args = parser.parse_args(argv)
+    for browser, paths in generate_home(args.home, args.rows).items():
+        for db_type, path in paths.items():
+            print(f"{browser}\t{db_type}\t{os.path.getsize(path)}\t{path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import os
+import sqlite3
+from pathlib import Path
+
+# Thư mục dữ liệu của ứng dụng theo người dùng (%LOCALAPPDATA% trên Windows), không phải
+# thư mục làm việc hiện tại, để không để lại file ở nơi chạy lệnh.
+DATA_DIR = (
+    Path(os.environ.get("LOCALAPPDATA") or Path.home() / ".local" / "share")
+    / "browser_data"
+)
+# Kho vụ việc: một cơ sở dữ liệu SQLite gộp mọi bản ghi đã trích xuất để tìm kiếm lại.
+DEFAULT_CASE_DB = os.environ.get("CASE_DB") or str(DATA_DIR / "case.sqlite")
+SEARCH_LIMIT = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    browser TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    artifact TEXT NOT NULL,
+    kind TEXT,
+    url TEXT,
+    title TEXT,
+    visit_count INTEGER,
+    time_text TEXT,
+    time INTEGER
+);
+CREATE INDEX IF NOT EXISTS records_source_time
+    ON records (browser, profile, artifact, time);
+CREATE INDEX IF NOT EXISTS records_time ON records (time);
+CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+    url, title,
+    content='records', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+"""
+
+INSERT_SQL = (
+    "INSERT INTO records (browser, profile, artifact, kind, url, title, "
+    "visit_count, time_text, time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def open_case_store(path=DEFAULT_CASE_DB):
+    """Mở (và tạo nếu chưa có) kho vụ việc ở chế độ WAL để đọc song song khi đang ghi."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class CaseWriter:
+    """Ghi bản ghi của một (trình duyệt, profile, loại dữ liệu) vào kho theo từng khối.
+
+    Mỗi khối là một giao dịch ngắn nên nhiều tiến trình có thể cùng nạp vào một kho.
+    replace=True xóa bản ghi cũ của cùng nguồn trước khi nạp lại.
+    """
+
+    def __init__(self, conn, browser, profile, artifact, replace=True, chunk_rows=5000):
+        self.conn = conn
+        self.source = (browser, profile, artifact)
+        self.chunk_rows = chunk_rows
+        self.pending = []
+        self.count = 0
+        if replace:
+            self._transaction(self._delete)
+
+    def _transaction(self, work):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            work()
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _delete(self):
+        where = "browser = ? AND profile = ? AND artifact = ?"
+        # Bảng FTS dùng nội dung ngoài nên phải gỡ chỉ mục trước khi xóa dòng.
+        self.conn.execute(
+            "INSERT INTO records_fts (records_fts, rowid, url, title) "
+            f"SELECT 'delete', id, url, title FROM records WHERE {where}",
+            self.source,
+        )
+        self.conn.execute(f"DELETE FROM records WHERE {where}", self.source)
+
+    def _insert(self, rows):
+        first = self.conn.execute("SELECT coalesce(max(id), 0) FROM records")
+        first = first.fetchone()[0]
+        self.conn.executemany(INSERT_SQL, rows)
+        # Lập chỉ mục cả khối bằng một câu lệnh thay cho trigger từng dòng.
+        self.conn.execute(
+            "INSERT INTO records_fts (rowid, url, title) "
+            "SELECT id, url, title FROM records WHERE id > ?",
+            (first,),
+        )
+
+    def add(self, row):
+        self.pending.append(
+            (
+                *self.source,
+                row["Loại"],
+                row["URL"],
+                row["Tiêu đề"],
+                row["Số lần truy cập"],
+                row["Thời gian"],
+                row.get("Dấu thời gian"),
+            )
+        )
+        if len(self.pending) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows = self.pending
+        self.pending = []
+        self._transaction(lambda: self._insert(rows))
+        self.count += len(rows)
+
+
+def ingest_rows(conn, browser, profile, artifact, rows, replace=True):
+    """Nạp mọi bản ghi (dạng có kiểu) của một nguồn vào kho, trả về số bản ghi đã nạp."""
+    writer = CaseWriter(conn, browser, profile, artifact, replace)
+    for row in rows:
+        writer.add(row)
+    writer.flush()
+    return writer.count
+
+
+def build_match(query, prefix=False):
+    """Chuyển từ khóa người dùng thành biểu thức MATCH an toàn (mỗi từ là một cụm trích dẫn)."""
+    terms = []
+    for term in query.split():
+        quoted = '"' + term.replace('"', '""') + '"'
+        terms.append(quoted + "*" if prefix else quoted)
+    return " ".join(terms)
+
+
+def search(
+    conn,
+    query,
+    limit=50,
+    offset=0,
+    prefix=False,
+    browser=None,
+    profile=None,
+    artifact=None,
+    since=None,
+    until=None,
+):
+    """Tìm bản ghi theo từ khóa trên URL và tiêu đề, xếp hạng bằng bm25.
+
+    since/until lọc theo thời gian (microseconds Unix). Trả về (bản ghi, còn kết quả, lỗi).
+    """
+    match = build_match(query, prefix)
+    if not match:
+        return [], False, "Vui lòng nhập từ khóa tìm kiếm."
+
+    where = ["records_fts MATCH ?"]
+    params = [match]
+    for column, value in (
+        ("browser", browser),
+        ("profile", profile),
+        ("artifact", artifact),
+    ):
+        if value:
+            where.append(f"r.{column} = ?")
+            params.append(value)
+    if since is not None:
+        where.append("r.time >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("r.time < ?")
+        params.append(until)
+
+    try:
+        cursor = conn.execute(
+            "SELECT r.browser, r.profile, r.kind, r.url, r.title, r.visit_count, "
+            "r.time_text, r.time FROM records_fts "
+            "JOIN records r ON r.id = records_fts.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY rank LIMIT ? OFFSET ?",
+            (*params, limit + 1, offset),
+        )
+        rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        return [], False, f"Lỗi tìm kiếm: {e}"
+
+    results = [
+        {
+            "Trình duyệt": row[0],
+            "Nguồn": row[1],
+            "Loại": row[2],
+            "URL": row[3],
+            "Tiêu đề": row[4],
+            "Số lần truy cập": row[5],
+            "Thời gian": row[6],
+            "Dấu thời gian": row[7],
+        }
+        for row in rows[:limit]
+    ]
+    return results, len(rows) > limit, None
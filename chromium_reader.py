@@ -0,0 +1,223 @@
+import re
+from artifact_reader import (
+    Artifact,
+    iter_artifacts,
+    read_artifacts,
+    calculate_total_records as calculate_artifact_records,
+    estimate_total_records as estimate_artifact_records,
+)
+from filters import cookie_host_sql, url_host_sql
+from timeconv import (
+    chrome_from_unix_micros,
+    chrome_time_sql,
+    chrome_unix_micros_sql,
+    local_seconds_sql,
+    unix_seconds_from_micros,
+    unix_seconds_micros_sql,
+)
+
+# Thư mục "User Data" của từng trình duyệt nhân Chromium, tính từ thư mục home.
+# Thêm một trình duyệt mới chỉ cần thêm một dòng vào đây.
+BROWSERS = {
+    "edge": ("Microsoft Edge", ("AppData", "Local", "Microsoft", "Edge", "User Data")),
+    "brave": (
+        "Brave",
+        ("AppData", "Local", "BraveSoftware", "Brave-Browser", "User Data"),
+    ),
+    "chrome": ("Google Chrome", ("AppData", "Local", "Google", "Chrome", "User Data")),
+    "vivaldi": ("Vivaldi", ("AppData", "Local", "Vivaldi", "User Data")),
+}
+
+# Thư mục profile người dùng: "Default", "Profile 1", "Profile 2"...
+PROFILE_PATTERN = re.compile(r"^(Default|Profile (\d+))$")
+
+# Vị trí file cơ sở dữ liệu bên trong thư mục profile.
+DB_FILES = {
+    "History": ("History",),
+    "Cookies": ("Network", "Cookies"),
+    "Logins": ("Login Data",),
+    "Autofill": ("Web Data",),
+}
+
+ARTIFACTS = [
+    Artifact(
+        "history",
+        "History",
+        "Lịch sử",
+        source="urls JOIN visits ON urls.id = visits.url",
+        tables=("urls", "visits"),
+        missing_error="Bảng urls hoặc visits không tồn tại.",
+        key="visits.id",
+        url="urls.url",
+        title=("urls.title",),
+        title_default="Không có tiêu đề",
+        visit_count="urls.visit_count",
+        time="visits.visit_time",
+        convert_time=chrome_time_sql,
+        unix_time=chrome_unix_micros_sql,
+        native_time=chrome_from_unix_micros,
+        watermark="visits.id",
+        host=url_host_sql("urls.url"),
+    ),
+    Artifact(
+        "downloads",
+        "History",
+        "Tải xuống",
+        source="downloads",
+        tables=("downloads",),
+        missing_error="Bảng downloads không tồn tại.",
+        key="id",
+        url="referrer",
+        url_default="Không có nguồn",
+        title=("target_path",),
+        title_default="Không có đường dẫn",
+        time="start_time",
+        convert_time=chrome_time_sql,
+        unix_time=chrome_unix_micros_sql,
+        native_time=chrome_from_unix_micros,
+        watermark="id",
+        host=url_host_sql("referrer"),
+    ),
+    Artifact(
+        "cookies",
+        "Cookies",
+        "Cookie",
+        source="cookies",
+        tables=("cookies",),
+        missing_error="Bảng cookies không tồn tại.",
+        key="rowid",
+        url="host_key",
+        title=("name",),
+        title_format="Cookie: {}",
+        time="expires_utc",
+        convert_time=chrome_time_sql,
+        unix_time=chrome_unix_micros_sql,
+        native_time=chrome_from_unix_micros,
+        order_by_time=False,
+        watermark="creation_utc",
+        timeline_time="creation_utc",
+        host=cookie_host_sql("host_key"),
+    ),
+    Artifact(
+        "logins",
+        "Logins",
+        "Đăng nhập",
+        source="logins",
+        tables=("logins",),
+        missing_error="Bảng logins không tồn tại.",
+        key="id",
+        url="origin_url",
+        title=("username_value",),
+        title_format="Tên người dùng: {}",
+        time="date_created",
+        convert_time=chrome_time_sql,
+        unix_time=chrome_unix_micros_sql,
+        native_time=chrome_from_unix_micros,
+        order_by_time=False,
+        watermark="id",
+        host=url_host_sql("origin_url"),
+    ),
+    Artifact(
+        "autofill",
+        "Autofill",
+        "Tự động điền",
+        source="autofill",
+        tables=("autofill",),
+        missing_error="Bảng autofill không tồn tại.",
+        key="rowid",
+        url_default="Không có URL",
+        title=("name", "value"),
+        title_format="{}: {}",
+        # Khác các bảng khác, autofill lưu thời gian dạng số giây Unix.
+        time="date_created",
+        convert_time=local_seconds_sql,
+        unix_time=unix_seconds_micros_sql,
+        native_time=unix_seconds_from_micros,
+        order_by_time=False,
+        watermark="date_created",
+    ),
+]
+
+
+def get_db_path(browser, user_home, profile="Default", db_type="History"):
+    """Lấy đường dẫn cơ sở dữ liệu của một profile trình duyệt nhân Chromium."""
+    if browser not in BROWSERS:
+        return None, f"Trình duyệt không được hỗ trợ: {browser}"
+    db_file = DB_FILES.get(db_type)
+    if not db_file:
+        return None, f"Loại cơ sở dữ liệu không được hỗ trợ cho {browser}: {db_type}"
+    return user_home.joinpath(*BROWSERS[browser][1], profile, *db_file), None
+
+
+def list_profiles(browser, user_home):
+    """Liệt kê các profile của trình duyệt, "Default" trước rồi theo số thứ tự."""
+    if browser not in BROWSERS:
+        return [], f"Trình duyệt không được hỗ trợ: {browser}"
+    user_data = user_home.joinpath(*BROWSERS[browser][1])
+    if not user_data.exists():
+        return [], f"Thư mục dữ liệu {BROWSERS[browser][0]} không tồn tại."
+    profiles = []
+    for entry in user_data.iterdir():
+        match = PROFILE_PATTERN.match(entry.name)
+        if match and entry.is_dir():
+            profiles.append((int(match.group(2) or 0), entry.name))
+    return [name for _, name in sorted(profiles)], None
+
+
+def read_chromium_data(
+    conn,
+    cursor,
+    db_type,
+    limit,
+    data_type="all",
+    page=1,
+    items_per_page=20,
+    page_cursor=None,
+    filters=None,
+):
+    """Đọc dữ liệu từ cơ sở dữ liệu của trình duyệt nhân Chromium (Edge, Brave, Chrome...)."""
+    offset = (page - 1) * items_per_page
+    return read_artifacts(
+        cursor,
+        ARTIFACTS,
+        db_type,
+        data_type,
+        items_per_page,
+        offset,
+        page_cursor,
+        filters,
+    )
+
+
+def iter_chromium_data(
+    cursor,
+    db_type,
+    data_type="all",
+    limit=None,
+    batch_size=1000,
+    typed=False,
+    watermarks=None,
+    filters=None,
+):
+    """Duyệt toàn bộ bản ghi Chromium theo từng khối, dùng cho xuất dữ liệu."""
+    return iter_artifacts(
+        cursor,
+        ARTIFACTS,
+        db_type,
+        data_type,
+        limit,
+        batch_size,
+        typed,
+        watermarks,
+        filters,
+    )
+
+
+def calculate_total_records(cursor, db_type, data_type, filters=None):
+    """Tính tổng số bản ghi cho trình duyệt nhân Chromium."""
+    return calculate_artifact_records(cursor, ARTIFACTS, db_type, data_type, filters)
+
+
+def estimate_total_records(cursor, db_type, data_type, filters=None):
+    """Ước lượng nhanh tổng số bản ghi cho trình duyệt nhân Chromium."""
+    return estimate_artifact_records(cursor, ARTIFACTS, db_type, data_type, filters)
@@ -0,0 +1,135 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+from batch import SOURCE_COLUMNS, encode_rows, open_task_rows
+from collector import DATA_TYPES, SUPPORTED_BROWSERS, plan_tasks
+from exporters import EXPORT_FORMATS, get_exporter
+from records import record_type
+from snapshot_cache import ACCESS_MODES
+
+# Dòng lệnh nhẹ đọc thẳng profile của người dùng hiện tại (hoặc --home), không qua Flask:
+# chỉ sqlite3 và thư viện chuẩn được nạp khi khởi động, thư viện tùy chọn (zstandard,
+# pyarrow) chỉ khi chọn định dạng tương ứng. Đo thời gian khởi động bằng benchmarks.startup.
+
+
+def iter_rows(tasks, typed, mode, limit, errors):
+    """Duyệt lần lượt bản ghi của các việc, thêm cột trình duyệt và profile.
+
+    Mỗi nguồn được mở khi tới lượt và đóng ngay khi duyệt xong; lỗi được gom vào errors.
+    """
+    for task in tasks:
+        if not task.db_path or not task.db_path.exists():
+            errors.append(
+                f"{task.browser}/{task.profile} {task.data_type}: không có dữ liệu"
+            )
+            continue
+        rows, task_errors, close = open_task_rows(task, typed, mode=mode, limit=limit)
+        try:
+            for row in rows or ():
+                tagged_record = record_type((*SOURCE_COLUMNS, *row.columns))
+                yield tagged_record((task.browser, task.profile, *row))
+        finally:
+            close()
+        errors.extend(
+            f"{task.browser}/{task.profile} {task.data_type}: {error}"
+            for error in task_errors
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Trích xuất nhanh dữ liệu trình duyệt của người dùng hiện tại ra "
+        "stdout hoặc file, không cần chạy ứng dụng web."
+    )
+    parser.add_argument(
+        "-b",
+        "--browser",
+        dest="browsers",
+        action="append",
+        choices=SUPPORTED_BROWSERS,
+        help="Trình duyệt (lặp lại được, mặc định tất cả)",
+    )
+    parser.add_argument(
+        "-t",
+        "--data-type",
+        dest="data_types",
+        action="append",
+        choices=DATA_TYPES,
+        help="Loại dữ liệu (lặp lại được, mặc định tất cả)",
+    )
+    parser.add_argument(
+        "-p", "--profile", default=None, help="Chỉ đọc profile này (ví dụ Default)"
+    )
+    parser.add_argument(
+        "-n",
+        "--limit",
+        type=int,
+        default=None,
+        help="Số bản ghi tối đa của mỗi loại dữ liệu trong mỗi profile",
+    )
+    parser.add_argument("-f", "--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument(
+        "-o", "--output", type=Path, default=None, help="File kết quả (mặc định stdout)"
+    )
+    parser.add_argument(
+        "--home",
+        type=Path,
+        default=None,
+        help="Thư mục home chứa AppData (mặc định thư mục home hiện tại)",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=ACCESS_MODES,
+        default="copy",
+        help="Cách mở file nguồn (xem batch.py --mode)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit phải lớn hơn 0.")
+    exporter, error = get_exporter(args.format)
+    if not exporter:
+        parser.error(error)
+
+    tasks, plan_errors = plan_tasks(
+        args.browsers or SUPPORTED_BROWSERS,
+        args.data_types or DATA_TYPES,
+        args.home or Path.home(),
+    )
+    if args.profile:
+        tasks = [task for task in tasks if task.profile == args.profile]
+    errors = [f"{item['browser']}: {item['error']}" for item in plan_errors]
+
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    rows = counted(iter_rows(tasks, exporter[3], args.mode, args.limit, errors))
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in encode_rows(rows, args.format):
+            out.write(chunk)
+        out.flush()
+    except BrokenPipeError:
+        # Bên đọc (ví dụ head) đã đóng ống: dừng êm, không in traceback khi thoát.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if args.output:
+            out.close()
+
+    for error in errors:
+        print(error, file=sys.stderr)
+    print(
+        f"Đã ghi {count} bản ghi từ {len(tasks)} việc ({len(errors)} lỗi).",
+        file=sys.stderr,
+    )
+    return 0 if count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+from collections import namedtuple
+from chromium_reader import (
+    BROWSERS as CHROMIUM_BROWSERS,
+    get_db_path as get_chromium_db_path,
+    list_profiles as list_chromium_profiles,
+)
+from firefox_reader import (
+    DB_FILES as FIREFOX_DB_FILES,
+    list_profiles as list_firefox_profiles,
+)
+
+SUPPORTED_BROWSERS = list(CHROMIUM_BROWSERS) + ["firefox"]
+DATA_TYPES = ["history", "downloads", "cookies", "logins", "autofill"]
+# Cơ sở dữ liệu chứa từng loại dữ liệu ("all" đọc lịch sử và tải xuống).
+DB_TYPES = {
+    "history": "History",
+    "downloads": "History",
+    "cookies": "Cookies",
+    "logins": "Logins",
+    "autofill": "Autofill",
+    "all": "History",
+}
+# Việc đọc chủ yếu nằm trong SQLite và sao chép file (nhả GIL) nên dùng luồng là đủ.
+MAX_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+# Một việc trích xuất: một loại dữ liệu của một profile trình duyệt.
+CollectTask = namedtuple(
+    "CollectTask", ["browser", "profile", "data_type", "db_type", "db_path"]
+)
+
+
+def get_db_type(browser, data_type):
+    """Xác định loại cơ sở dữ liệu chứa data_type của trình duyệt."""
+    db_type = DB_TYPES.get(data_type, "History")
+    if browser == "firefox" and db_type == "Autofill":
+        return "Formhistory"
+    return db_type
+
+
+def plan_tasks(browsers, data_types, user_home, os_type="windows"):
+    """Liệt kê mọi profile của các trình duyệt và tạo việc cho từng loại dữ liệu.
+
+    Trả về (danh sách việc, danh sách lỗi của các trình duyệt không liệt kê được).
+    """
+    tasks = []
+    errors = []
+    for browser in browsers:
+        if browser == "firefox":
+            profile_dirs, error = list_firefox_profiles(user_home, os_type)
+            profiles = [(p.name, p) for p in profile_dirs]
+        elif browser in CHROMIUM_BROWSERS:
+            names, error = list_chromium_profiles(browser, user_home)
+            profiles = [(name, None) for name in names]
+        else:
+            profiles, error = [], f"Trình duyệt không được hỗ trợ: {browser}"
+
+        if error:
+            errors.append({"browser": browser, "error": error})
+            continue
+
+        for profile, profile_dir in profiles:
+            for data_type in data_types:
+                db_type = get_db_type(browser, data_type)
+                if profile_dir is not None:
+                    db_file = FIREFOX_DB_FILES.get(db_type)
+                    db_path = profile_dir / db_file if db_file else None
+                else:
+                    db_path, _ = get_chromium_db_path(
+                        browser, user_home, profile, db_type
+                    )
+                tasks.append(CollectTask(browser, profile, data_type, db_type, db_path))
+    return tasks, errors
+
+
+def run_tasks(tasks, worker, max_workers=MAX_WORKERS):
+    """Chạy song song worker(task) -> (dữ liệu, lỗi) trên một pool luồng có giới hạn.
+
+    Kết quả giữ đúng thứ tự việc; lỗi của một việc không làm dừng các việc khác.
+    """
+    if not tasks:
+        return []
+
+    def run(task):
+        try:
+            data, error = worker(task)
+        except Exception as e:
+            data, error = None, f"Lỗi không xác định: {e}"
+        result = {
+            "browser": task.browser,
+            "profile": task.profile,
+            "data_type": task.data_type,
+        }
+        if data:
+            result["data"] = data
+        else:
+            result["error"] = error or "Không thể trích xuất dữ liệu."
+        return result
+
+    # Nạp muộn: dòng lệnh (cli.py) dùng plan_tasks mà không cần pool luồng.
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as pool:
+        return list(pool.map(run, tasks))
@@ -0,0 +1,140 @@
+import ipaddress
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+# Danh sách hậu tố công khai (https://publicsuffix.org/list/, MPL 2.0) đi kèm mã nguồn;
+# đặt PUBLIC_SUFFIX_LIST để dùng bản mới hơn.
+DEFAULT_SUFFIX_LIST = (
+    Path(__file__).resolve().parent / "data" / "public_suffix_list.dat"
+)
+SUFFIX_LIST_PATH = Path(os.environ.get("PUBLIC_SUFFIX_LIST") or DEFAULT_SUFFIX_LIST)
+# Số host khác nhau được nhớ kết quả; dữ liệu thật lặp lại rất nhiều trên ít host.
+CACHE_SIZE = 1 << 16
+
+# Khóa đánh dấu trong nút của cây; là số nên không trùng với nhãn tên miền.
+_RULE = 0
+_EXCEPTION = 1
+_WILDCARD = "*"
+
+
+class SuffixTrie:
+    """Cây quy tắc hậu tố công khai theo nhãn đảo ngược ("uk" -> "co" -> ...).
+
+    Tra một host chỉ đi qua tối đa số nhãn của host, không phụ thuộc số quy tắc. Quy tắc
+    "*.ck" là nút con "*" và quy tắc ngoại lệ "!www.ck" được đánh dấu _EXCEPTION.
+    """
+
+    def __init__(self, rules=()):
+        self.root = {}
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule):
+        rule = rule.lower()
+        exception = rule.startswith("!")
+        labels = rule.lstrip("!").split(".")
+        self._insert(labels, exception)
+        # Host trong cơ sở dữ liệu trình duyệt ở dạng punycode ("xn--..."), quy tắc thì không.
+        if not rule.isascii():
+            try:
+                labels = [label.encode("idna").decode("ascii") for label in labels]
+            except UnicodeError:
+                return
+            self._insert(labels, exception)
+
+    def _insert(self, labels, exception):
+        node = self.root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node[_EXCEPTION if exception else _RULE] = True
+
+    def suffix_length(self, labels):
+        """Số nhãn của hậu tố công khai dài nhất khớp với labels (thứ tự từ phải sang trái)."""
+        length = 1  # quy tắc mặc định "*": nhãn cuối luôn là hậu tố công khai
+        node = self.root
+        for depth, label in enumerate(labels):
+            child = node.get(label)
+            if child is not None and _EXCEPTION in child:
+                return depth
+            if _WILDCARD in node:
+                length = depth + 1
+            if child is None:
+                break
+            if _RULE in child:
+                length = depth + 1
+            node = child
+        return length
+
+    def registrable_domain(self, host):
+        """Hậu tố công khai cộng một nhãn, hoặc None nếu host chính là hậu tố công khai."""
+        labels = host.split(".")
+        length = self.suffix_length(reversed(labels))
+        if len(labels) <= length:
+            return None
+        return ".".join(labels[-length - 1 :])
+
+    @classmethod
+    def load(cls, path):
+        """Dựng cây từ file danh sách (mỗi dòng một quy tắc, chú thích bắt đầu bằng "//").
+
+        Thiếu file thì chỉ còn quy tắc mặc định (tên miền = hai nhãn cuối).
+        """
+        trie = cls()
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    rule = line.strip().split(maxsplit=1)[:1]
+                    if rule and not rule[0].startswith("//"):
+                        trie.add(rule[0])
+        except OSError:
+            pass
+        return trie
+
+
+_trie = None
+_trie_lock = threading.Lock()
+
+
+def suffix_trie():
+    """Cây hậu tố dùng chung, được dựng một lần ở lần tra đầu tiên."""
+    global _trie
+    if _trie is None:
+        with _trie_lock:
+            if _trie is None:
+                _trie = SuffixTrie.load(SUFFIX_LIST_PATH)
+    return _trie
+
+
+def normalize_host(value):
+    """Bỏ thông tin đăng nhập, cổng, dấu ngoặc IPv6 và dấu chấm đầu/cuối; về chữ thường."""
+    host = value.rpartition("@")[2]
+    if host.startswith("["):
+        return host[1:].partition("]")[0].lower()
+    return host.partition(":")[0].strip(".").lower()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def registrable_domain(host):
+    """Tên miền đăng ký được (eTLD+1) của host, ví dụ ".ads.example.co.uk" -> "example.co.uk".
+
+    host có thể kèm cổng hoặc dấu chấm đầu như cột host của cookie. Địa chỉ IP và host
+    không có tên miền đăng ký (ví dụ "localhost") được giữ nguyên.
+    """
+    if not host:
+        return None
+    host = normalize_host(host)
+    if not host:
+        return None
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    return suffix_trie().registrable_domain(host) or host
+
+
+def registrable_domains(hosts):
+    """Ánh xạ hàng loạt host -> tên miền đăng ký được; mỗi host khác nhau chỉ tra một lần."""
+    return {host: registrable_domain(host) for host in set(hosts)}
@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+import zlib
+from records import COLUMNS, TYPED_COLUMNS, as_dict
+
+
+def iter_csv(rows, chunk_rows=1000, columns=COLUMNS, header=True):
+    """Sinh từng khối CSV (UTF-8 BOM) từ các bản ghi, bộ nhớ không phụ thuộc số dòng.
+
+    header=False bỏ BOM và dòng tiêu đề để ghép nhiều phần thành một file.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        buffer.write("﻿")
+        writer.writerow(columns)
+    fields = tuple(columns)
+    pending = 0
+    for row in rows:
+        # Bản ghi đã đúng thứ tự cột được ghi thẳng; csv ghi None thành ô trống.
+        if getattr(row, "columns", None) == fields:
+            writer.writerow(row)
+        else:
+            writer.writerow([row[col] for col in columns])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _iter_ndjson_lines(rows, chunk_rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(as_dict(row), ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            lines.append("")
+            yield "\n".join(lines).encode("utf-8")
+            lines = []
+    if lines:
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+
+
+def iter_ndjson_gzip(rows, chunk_rows=5000):
+    """Sinh NDJSON nén gzip theo từng khối."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in _iter_ndjson_lines(rows, chunk_rows):
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_ndjson_zstd(rows, chunk_rows=5000):
+    """Sinh NDJSON nén zstd theo từng khối (cần thư viện zstandard)."""
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor().compressobj()
+    for chunk in _iter_ndjson_lines(rows, chunk_rows):
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _DrainSink(io.RawIOBase):
+    """File chỉ ghi, giữ tạm các byte đã ghi để gửi dần ra phản hồi."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(pa):
+    return pa.schema(
+        [
+            ("Loại", pa.string()),
+            ("URL", pa.string()),
+            ("Tiêu đề", pa.string()),
+            ("Số lần truy cập", pa.int64()),
+            ("Thời gian", pa.string()),
+            ("Tên miền", pa.string()),
+            ("Dấu thời gian", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+
+def _iter_arrow_batches(pa, schema, rows, chunk_rows):
+    columns = {name: [] for name in TYPED_COLUMNS}
+    count = 0
+    for row in rows:
+        for name in TYPED_COLUMNS:
+            columns[name].append(row[name])
+        count += 1
+        if count >= chunk_rows:
+            yield pa.record_batch([columns[name] for name in TYPED_COLUMNS], schema)
+            columns = {name: [] for name in TYPED_COLUMNS}
+            count = 0
+    if count:
+        yield pa.record_batch([columns[name] for name in TYPED_COLUMNS], schema)
+
+
+def iter_parquet(rows, chunk_rows=65536):
+    """Sinh file Parquet, mỗi khối chunk_rows bản ghi là một row group (cần pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in _iter_arrow_batches(pa, schema, rows, chunk_rows):
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_arrow(rows, chunk_rows=65536):
+    """Sinh luồng Arrow IPC theo từng record batch (cần pyarrow)."""
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa)
+    sink = _DrainSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in _iter_arrow_batches(pa, schema, rows, chunk_rows):
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+# định dạng -> (hàm sinh, mimetype, đuôi file, có kiểu, module bắt buộc)
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv", "csv", False, None),
+    "ndjson.gz": (iter_ndjson_gzip, "application/gzip", "ndjson.gz", True, None),
+    "ndjson.zst": (
+        iter_ndjson_zstd,
+        "application/zstd",
+        "ndjson.zst",
+        True,
+        "zstandard",
+    ),
+    "parquet": (
+        iter_parquet,
+        "application/vnd.apache.parquet",
+        "parquet",
+        True,
+        "pyarrow",
+    ),
+    "arrow": (
+        iter_arrow,
+        "application/vnd.apache.arrow.stream",
+        "arrows",
+        True,
+        "pyarrow",
+    ),
+}
+
+
+def get_exporter(export_format):
+    """Lấy bộ xuất cho định dạng, trả về (bộ xuất, lỗi) nếu thiếu thư viện tùy chọn."""
+    exporter = EXPORT_FORMATS.get(export_format)
+    if not exporter:
+        return None, f"Định dạng xuất không được hỗ trợ: {export_format}"
+    required = exporter[4]
+    if required:
+        try:
+            __import__(required)
+        except ImportError:
+            return None, f"Định dạng {export_format} cần cài đặt thư viện {required}."
+    return exporter, None
@@ -0,0 +1,133 @@
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+FILTER_FIELDS = ("since", "until", "host", "url", "min_visits")
+
+
+def escape_like(text):
+    """Thoát ký tự đặc biệt của LIKE (dùng kèm ESCAPE '\\')."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def url_host_sql(column):
+    """Biểu thức SQL lấy phần host[:port] (chữ thường) của URL dạng scheme://host/..."""
+    rest = f"substr({column}, instr({column}, '://') + 3)"
+    return f"lower(substr({rest}, 1, instr({rest} || '/', '/') - 1))"
+
+
+def cookie_host_sql(column):
+    """Biểu thức SQL lấy host từ cột host của cookie (".example.com" hoặc "example.com")."""
+    return f"ltrim({column}, '.')"
+
+
+def host_filter(host_sql):
+    """Bộ lọc host trên một biểu thức host[:port], khớp cả tên miền con."""
+
+    def build(domain):
+        # ".host:" khớp "%.domain:%" khi host là domain hoặc tên miền con của nó, có
+        # hay không có cổng; dấu chấm đầu tránh khớp "notexample.com" với "example.com".
+        return (
+            f"('.' || {host_sql} || ':') LIKE ? ESCAPE '\\'",
+            [f"%.{escape_like(domain)}:%"],
+        )
+
+    return build
+
+
+def rev_host_filter(column):
+    """Bộ lọc host trên cột host đảo ngược của Firefox, dùng được chỉ mục moz_places_hostindex.
+
+    "example.com" được lưu là "moc.elpmaxe." nên domain và mọi tên miền con nằm trong
+    khoảng ["moc.elpmaxe.", "moc.elpmaxe/").
+    """
+
+    def build(domain):
+        rev = domain[::-1] + "."
+        return f"({column} >= ? AND {column} < ?)", [rev, rev[:-1] + "/"]
+
+    return build
+
+
+def _parse_time(value):
+    """Chuyển ngày/giờ ISO (mặc định UTC) thành microseconds Unix."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp()) * 1000000 + moment.microsecond
+
+
+def _normalize_host(value):
+    value = value.strip().lower()
+    if "://" in value:
+        value = urlsplit(value).hostname or ""
+    return value.split("/")[0].strip(".")
+
+
+class Filters:
+    """Bộ lọc phía máy chủ, được các module đọc dịch thành mệnh đề WHERE có tham số.
+
+    since/until là microseconds Unix (UTC), until không bao gồm; host khớp cả tên miền con;
+    url là chuỗi con của URL (không phân biệt hoa thường ASCII); min_visits là số lần truy cập
+    tối thiểu.
+    """
+
+    def __init__(self, since=None, until=None, host=None, url=None, min_visits=None):
+        self.since = since
+        self.until = until
+        self.host = host
+        self.url = url
+        self.min_visits = min_visits
+
+    def __bool__(self):
+        return any(value is not None for value in self.to_dict().values())
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FILTER_FIELDS}
+
+    def key(self):
+        """Khóa ổn định để lưu số bản ghi đã đếm theo từng bộ lọc."""
+        return tuple(self.to_dict().values())
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**{field: (values or {}).get(field) for field in FILTER_FIELDS})
+
+    def matches(self, url, unix_time, visit_count):
+        """Kiểm tra một bản ghi ngoài SQLite (ví dụ logins.json) theo cùng ngữ nghĩa."""
+        if self.since is not None and (unix_time is None or unix_time < self.since):
+            return False
+        if self.until is not None and (unix_time is None or unix_time >= self.until):
+            return False
+        if self.host:
+            host = (urlsplit(url or "").hostname or "").lower()
+            if host != self.host and not host.endswith("." + self.host):
+                return False
+        if self.url and self.url.lower() not in (url or "").lower():
+            return False
+        if self.min_visits is not None and (visit_count or 0) < self.min_visits:
+            return False
+        return True
+
+
+def parse_filters(values):
+    """Đọc bộ lọc từ tham số yêu cầu (form hoặc query), trả về (bộ lọc, lỗi)."""
+    try:
+        since = values.get("since")
+        until = values.get("until")
+        min_visits = values.get("min_visits")
+        filters = Filters(
+            since=_parse_time(since) if since else None,
+            until=_parse_time(until) if until else None,
+            host=_normalize_host(values.get("host") or "") or None,
+            url=values.get("url") or None,
+            min_visits=int(min_visits) if min_visits else None,
+        )
+    except ValueError:
+        return None, "Bộ lọc không hợp lệ, vui lòng kiểm tra lại."
+    if (
+        filters.since is not None
+        and filters.until is not None
+        and filters.since >= filters.until
+    ):
+        return None, "Khoảng thời gian lọc không hợp lệ."
+    return filters, None
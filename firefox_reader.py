@@ -1,54 +1,131 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
-import pandas as pd
-import unicodedata
+from urllib.parse import urlsplit
+from artifact_reader import (
+    Artifact,
+    iter_artifacts,
+    read_artifacts,
+    calculate_total_records as calculate_artifact_records,
+    estimate_total_records as estimate_artifact_records,
+)
+from domains import registrable_domain
+from filters import cookie_host_sql, rev_host_filter, url_host_sql
+from metrics import metrics
+from records import DisplayRecord, TypedRecord
+from timeconv import (
+    firefox_from_unix_micros,
+    firefox_time_sql,
+    firefox_unix_micros_sql,
+    local_seconds_sql,
+    unix_seconds_from_micros,
+    unix_seconds_micros_sql,
+)
+from sanitize import clean_string
 
-def convert_firefox_time(firefox_time):
-    """Chuyển đổi thời gian Firefox (microseconds từ 1970-01-01)."""
-    if firefox_time is None or firefox_time <= 0:
-        return ""
-    try:
-        epoch_start = datetime(1970, 1, 1)
-        delta = firefox_time / 1000000
-        result = epoch_start + timedelta(seconds=delta)
-        if result.year < 2000 or result.year > 2030:
-            return ""
-        return result.strftime("%m/%d/%Y %H:%M:%S")
-    except (ValueError, OverflowError, TypeError):
-        return ""
+# Thư mục chứa các profile Firefox theo hệ điều hành, tính từ thư mục home.
+PROFILES_DIRS = {
+    "windows": ("AppData", "Roaming", "Mozilla", "Firefox", "Profiles"),
+}
 
-def clean_string(s):
-    """Làm sạch chuỗi để tránh lỗi ký tự trong CSV."""
-    if pd.isna(s):
-        return "Không xác định"
-    s = unicodedata.normalize('NFKC', str(s))
-    return ''.join(c for c in s if c.isprintable())
+# Vị trí file cơ sở dữ liệu bên trong thư mục profile Firefox.
+DB_FILES = {
+    "History": "places.sqlite",
+    "Cookies": "cookies.sqlite",
+    "Formhistory": "formhistory.sqlite",
+    "Logins": "logins.json",
+}
 
-def table_exists(cursor, table_name):
-    """Kiểm tra bảng tồn tại trong cơ sở dữ liệu."""
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-    return cursor.fetchone() is not None
+ARTIFACTS = [
+    Artifact(
+        "history", "History", "Lịch sử",
+        source="moz_places", tables=("moz_places",), where="url IS NOT NULL",
+        missing_error="Bảng moz_places không tồn tại.",
+        key="id", url="url", title=("title",), title_default="Không có tiêu đề",
+        visit_count="visit_count", time="last_visit_date", convert_time=firefox_time_sql,
+        unix_time=firefox_unix_micros_sql, nullable_time=True, watermark="last_visit_date",
+        native_time=firefox_from_unix_micros, host=url_host_sql("url"),
+        host_filter=rev_host_filter("rev_host"),
+    ),
+    Artifact(
+        "downloads", "History", "Tải xuống",
+        source="moz_downloads", tables=("moz_downloads",),
+        missing_error="Bảng moz_downloads không tồn tại hoặc Firefox không có dữ liệu tải xuống.",
+        key="id", url="source", url_default="Không có nguồn",
+        title=("name",), title_default="Không có tên file",
+        time="startTime", convert_time=firefox_time_sql, unix_time=firefox_unix_micros_sql,
+        nullable_time=True, watermark="id",
+        native_time=firefox_from_unix_micros, host=url_host_sql("source"),
+    ),
+    Artifact(
+        "cookies", "Cookies", "Cookie",
+        source="moz_cookies", tables=("moz_cookies",),
+        missing_error="Bảng moz_cookies không tồn tại.",
+        key="id", url="host", title=("name",), title_format="Cookie: {}",
+        time="expiry", convert_time=local_seconds_sql, unix_time=unix_seconds_micros_sql,
+        order_by_time=False, watermark="creationTime",
+        native_time=unix_seconds_from_micros, host=cookie_host_sql("host"),
+        timeline_time="creationTime", timeline_unix_time=firefox_unix_micros_sql,
+    ),
+    Artifact(
+        "autofill", "Formhistory", "Tự động điền",
+        source="moz_formhistory", tables=("moz_formhistory",),
+        missing_error="Bảng moz_formhistory không tồn tại.",
+        key="id", url_default="Không có URL", title=("fieldname", "value"), title_format="{}: {}",
+        time_default="Không có thời gian", order_by_time=False, watermark="id",
+    ),
+]
 
-def read_firefox_data(db_path, db_type, conn, cursor, limit, data_type="all", page=1, items_per_page=20):
-    """Đọc dữ liệu từ cơ sở dữ liệu Firefox."""
+def list_profiles(user_home, os_type="windows"):
+    """Liệt kê mọi thư mục profile Firefox, trả về (danh sách đường dẫn, lỗi)."""
+    profiles_dir = PROFILES_DIRS.get(os_type)
+    if profiles_dir:
+        profiles_dir = user_home.joinpath(*profiles_dir)
+    if not profiles_dir or not profiles_dir.exists():
+        return [], "Thư mục profile Firefox không tồn tại."
+    return sorted(p for p in profiles_dir.iterdir() if p.is_dir()), None
+
+
+def read_firefox_logins(db_path, typed=False, watermarks=None, limit=None, filters=None):
+    """Đọc danh sách đăng nhập từ logins.json.
+
+    watermarks bật chế độ gia tăng theo id đăng nhập, giống iter_artifacts; filters được
+    áp dụng trong Python vì file JSON không có chỉ mục.
+    """
     all_data = []
-    errors = []
+    with open(db_path, 'r', encoding='utf-8') as f:
+        logins_data = json.load(f)
+    if "logins" in logins_data:
+        logins = logins_data["logins"]
+        if filters:
+            logins = [l for l in logins if filters.matches(l.get("hostname"), l["timeCreated"] * 1000 if l.get("timeCreated") else None, None)]
+        if watermarks is not None:
+            mark = watermarks.get("logins")
+            logins = sorted((l for l in logins if mark is None or l.get("id", 0) > mark), key=lambda l: l.get("id", 0))[:limit]
+            if logins:
+                watermarks["logins"] = logins[-1].get("id", 0)
+        for login in logins:
+            values = (
+                "Đăng nhập",
+                clean_string(login.get("hostname", "Không có URL")),
+                f"Tên người dùng: {clean_string(login.get('username', 'Không có tên'))}",
+                None,
+                datetime.fromtimestamp(login.get("timeCreated", 0) / 1000).strftime("%m/%d/%Y %H:%M:%S") if login.get("timeCreated") else "Không có thời gian",
+                registrable_domain(urlsplit(login.get("hostname") or "").netloc)
+            )
+            if typed:
+                all_data.append(TypedRecord((*values, login["timeCreated"] * 1000 if login.get("timeCreated") else None)))
+            else:
+                all_data.append(DisplayRecord(values))
+    metrics.inc("rows_total", len(all_data), artifact="logins")
+    return all_data
+
+def read_firefox_data(db_path, db_type, conn, cursor, limit, data_type="all", page=1, items_per_page=20, page_cursor=None, filters=None):
+    """Đọc dữ liệu từ cơ sở dữ liệu Firefox, phân trang theo con trỏ khóa (keyset)."""
     offset = (page - 1) * items_per_page
-    max_total_records = items_per_page
 
     if db_type == "Logins":
         try:
-            with open(db_path, 'r', encoding='utf-8') as f:
-                logins_data = json.load(f)
-            if "logins" in logins_data:
-                for login in logins_data["logins"]:
-                    all_data.append({
-                        "Loại": "Đăng nhập",
-                        "URL": login.get("hostname", "Không có URL"),
-                        "Tiêu đề": f"Tên người dùng: {login.get('username', 'Không có tên')}",
-                        "Số lần truy cập": None,
-                        "Thời gian": datetime.fromtimestamp(login.get("timeCreated", 0) / 1000).strftime("%m/%d/%Y %H:%M:%S") if login.get("timeCreated") else "Không có thời gian"
-                    })
+            all_data = read_firefox_logins(db_path, filters=filters)
             total_records = len(all_data)
             all_data = all_data[offset:offset + items_per_page]
             total_pages = (total_records + items_per_page - 1) // items_per_page
@@ -62,94 +139,22 @@ def read_firefox_data(db_path, db_type, conn, cursor, limit, data_type="all", pa
         except Exception as e:
             return None, f"Lỗi khi đọc logins.json: {e}"
 
-    if db_type == "History":
-        if data_type in ["all", "history"] and table_exists(cursor, "moz_places"):
-            cursor.execute("""
-                SELECT url, title, visit_count, last_visit_date
-                FROM moz_places
-                WHERE url IS NOT NULL
-                ORDER BY last_visit_date DESC
-                LIMIT ? OFFSET ?
-            """, (max_total_records, offset))
-            all_data.extend([{
-                "Loại": "Lịch sử",
-                "URL": clean_string(row[0]),
-                "Tiêu đề": clean_string(row[1]) or "Không có tiêu đề",
-                "Số lần truy cập": row[2],
-                "Thời gian": convert_firefox_time(row[3])
-            } for row in cursor.fetchall()])
-        elif data_type == "history":
-            errors.append("Bảng moz_places không tồn tại.")
-
-        if data_type in ["all", "downloads"] and table_exists(cursor, "moz_downloads"):
-            cursor.execute("""
-                SELECT name, source, startTime
-                FROM moz_downloads
-                ORDER BY startTime DESC
-                LIMIT ? OFFSET ?
-            """, (max_total_records, offset))
-            all_data.extend([{
-                "Loại": "Tải xuống",
-                "URL": clean_string(row[1]) or "Không có nguồn",
-                "Tiêu đề": clean_string(row[0]) or "Không có tên file",
-                "Số lần truy cập": None,
-                "Thời gian": convert_firefox_time(row[2])
-            } for row in cursor.fetchall()])
-        elif data_type == "downloads":
-            errors.append("Bảng moz_downloads không tồn tại hoặc Firefox không có dữ liệu tải xuống.")
-
-    if db_type == "Cookies":
-        if data_type in ["all", "cookies"] and table_exists(cursor, "moz_cookies"):
-            cursor.execute("""
-                SELECT name, value, host, path, expiry
-                FROM moz_cookies
-                LIMIT ? OFFSET ?
-            """, (max_total_records, offset))
-            all_data.extend([{
-                "Loại": "Cookie",
-                "URL": clean_string(row[2]),
-                "Tiêu đề": f"Cookie: {clean_string(row[0])}",
-                "Số lần truy cập": None,
-                "Thời gian": datetime.fromtimestamp(row[4]).strftime("%m/%d/%Y %H:%M:%S") if row[4] else "Không có thời gian"
-            } for row in cursor.fetchall()])
-        elif data_type == "cookies":
-            errors.append("Bảng moz_cookies không tồn tại.")
+    return read_artifacts(cursor, ARTIFACTS, db_type, data_type, items_per_page, offset, page_cursor, filters)
 
-    if db_type == "Formhistory":
-        if data_type in ["all", "autofill"] and table_exists(cursor, "moz_formhistory"):
-            cursor.execute("""
-                SELECT fieldname, value
-                FROM moz_formhistory
-                LIMIT ? OFFSET ?
-            """, (max_total_records, offset))
-            all_data.extend([{
-                "Loại": "Tự động điền",
-                "URL": "Không có URL",
-                "Tiêu đề": f"{clean_string(row[0])}: {clean_string(row[1])}",
-                "Số lần truy cập": None,
-                "Thời gian": "Không có thời gian"
-            } for row in cursor.fetchall()])
-        elif data_type == "autofill":
-            errors.append("Bảng moz_formhistory không tồn tại.")
-
-    return all_data, errors
+def iter_firefox_data(db_path, db_type, cursor, data_type="all", limit=None, batch_size=1000, typed=False, watermarks=None, filters=None):
+    """Duyệt toàn bộ bản ghi Firefox theo từng khối, dùng cho xuất dữ liệu."""
+    if db_type == "Logins":
+        try:
+            logins = read_firefox_logins(db_path, typed, watermarks, limit, filters)
+        except Exception as e:
+            return iter(()), [f"Lỗi khi đọc logins.json: {e}"]
+        return iter(logins[:limit] if limit else logins), []
+    return iter_artifacts(cursor, ARTIFACTS, db_type, data_type, limit, batch_size, typed, watermarks, filters)
 
-def calculate_total_records(cursor, db_type, data_type):
+def calculate_total_records(cursor, db_type, data_type, filters=None):
     """Tính tổng số bản ghi cho Firefox."""
-    total_records = 0
-    if db_type == "History":
-        if data_type in ["all", "history"] and table_exists(cursor, "moz_places"):
-            cursor.execute("SELECT COUNT(*) FROM moz_places WHERE url IS NOT NULL")
-            total_records += cursor.fetchone()[0]
-        if data_type in ["all", "downloads"] and table_exists(cursor, "moz_downloads"):
-            cursor.execute("SELECT COUNT(*) FROM moz_downloads")
-            total_records += cursor.fetchone()[0]
-    if db_type == "Cookies":
-        if data_type in ["all", "cookies"] and table_exists(cursor, "moz_cookies"):
-            cursor.execute("SELECT COUNT(*) FROM moz_cookies")
-            total_records += cursor.fetchone()[0]
-    if db_type == "Formhistory":
-        if data_type in ["all", "autofill"] and table_exists(cursor, "moz_formhistory"):
-            cursor.execute("SELECT COUNT(*) FROM moz_formhistory")
-            total_records += cursor.fetchone()[0]
-    return total_records
\ No newline at end of file
+    return calculate_artifact_records(cursor, ARTIFACTS, db_type, data_type, filters)
+
+def estimate_total_records(cursor, db_type, data_type, filters=None):
+    """Ước lượng nhanh tổng số bản ghi cho Firefox (sqlite_stat1 hoặc max(rowid))."""
+    return estimate_artifact_records(cursor, ARTIFACTS, db_type, data_type, filters)
\ No newline at end of file
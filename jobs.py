@@ -0,0 +1,324 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shared_cache import ensure_private_dir
+from snapshot_cache import DEFAULT_CACHE_DIR
+
+# Trạng thái và file kết quả nằm trong thư mục bộ nhớ đệm dùng chung để mọi worker
+# Gunicorn trên máy đều theo dõi, hủy và tải được việc do worker khác chạy.
+DEFAULT_JOBS_DIR = DEFAULT_CACHE_DIR / "jobs"
+# Việc trích xuất chủ yếu chờ SQLite và ghi file nên vài luồng là đủ cho nhiều người dùng.
+DEFAULT_WORKERS = min(4, (os.cpu_count() or 1) + 2)
+DEFAULT_MAX_PENDING = 32
+DEFAULT_TTL = 60 * 60  # giây, thời gian giữ kết quả sau khi việc kết thúc
+# Chu kỳ (giây) đọc lại trạng thái của việc do worker khác chạy.
+POLL_INTERVAL = 0.5
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "error"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Được ném từ bên trong việc khi người dùng đã yêu cầu hủy."""
+
+
+class Job:
+    """Trạng thái của một việc chạy nền: giai đoạn, số bản ghi đã xử lý và kết quả.
+
+    Mỗi lần cập nhật, trạng thái được ghi ra state_path (JSON). Việc do worker khác chạy
+    được đọc lại từ file đó (owned=False): wait thăm dò file, còn yêu cầu hủy là file
+    cancel_path mà worker chạy việc kiểm tra trong check.
+    """
+
+    # Thuộc tính được lưu trong file trạng thái.
+    STATE_FIELDS = (
+        "kind",
+        "status",
+        "stage",
+        "rows",
+        "error",
+        "result_path",
+        "mimetype",
+        "filename",
+        "created",
+        "finished",
+        "version",
+    )
+
+    def __init__(self, job_id, kind, jobs_dir, owned=True):
+        self.id = job_id
+        self.kind = kind
+        self.state_path = Path(jobs_dir) / f"{job_id}.json"
+        self.cancel_path = Path(jobs_dir) / f"{job_id}.cancel"
+        self.owned = owned
+        self.status = QUEUED
+        self.stage = "Đang chờ"
+        self.rows = 0
+        self.error = None
+        self.result_path = None
+        self.mimetype = None
+        self.filename = None
+        self.created = time.time()
+        self.finished = None
+        self.version = 0
+        self.cancel_event = threading.Event()
+        self.changed = threading.Condition()
+
+    @property
+    def cancelled(self):
+        if not self.cancel_event.is_set() and self.cancel_path.exists():
+            self.cancel_event.set()
+        return self.cancel_event.is_set()
+
+    def check(self):
+        """Dừng việc nếu đã có yêu cầu hủy; gọi định kỳ trong vòng lặp xử lý."""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def update(self, **changes):
+        """Cập nhật tiến độ và đánh thức các luồng đang theo dõi (xem wait)."""
+        with self.changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.save()
+            self.changed.notify_all()
+
+    def wait(self, version, timeout=None):
+        """Chờ tới khi trạng thái khác version hoặc hết thời gian, trả về version mới."""
+        if not self.owned:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.version == version:
+                if not self.reload():
+                    # File trạng thái đã bị dọn: kết thúc việc để người theo dõi dừng chờ.
+                    self.status = FAILED
+                    self.stage = "Lỗi"
+                    self.error = "Việc không còn tồn tại."
+                    self.finished = self.finished or time.time()
+                    self.version = (self.version or 0) + 1
+                    break
+                remaining = POLL_INTERVAL
+                if deadline is not None:
+                    remaining = min(remaining, deadline - time.monotonic())
+                    if remaining <= 0:
+                        break
+                time.sleep(remaining)
+            return self.version
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def save(self):
+        """Ghi trạng thái qua file tạm rồi đổi tên để worker khác không đọc phải file dở."""
+        state = {name: getattr(self, name) for name in self.STATE_FIELDS}
+        state["result_path"] = state["result_path"] and str(state["result_path"])
+        temp_path = self.state_path.with_suffix(".json.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.state_path)
+        except OSError:
+            pass
+
+    def reload(self):
+        """Đọc lại trạng thái từ file; trả về False nếu file không còn."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        for name in self.STATE_FIELDS:
+            setattr(self, name, state.get(name))
+        return True
+
+    @classmethod
+    def load(cls, job_id, jobs_dir):
+        """Việc do worker khác chạy, đọc từ file trạng thái; None nếu không có."""
+        job = cls(job_id, None, jobs_dir, owned=False)
+        return job if job.reload() else None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "rows": self.rows,
+            "error": self.error,
+            "filename": self.filename,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """Hàng đợi việc chạy nền trên một pool luồng có giới hạn, không cần broker ngoài.
+
+    Việc là hàm work(job, output_path) ghi kết quả vào output_path và trả về
+    (mimetype, tên file); kết quả được giữ ttl giây sau khi việc kết thúc. Việc chạy trong
+    worker đã nhận nó, nhưng trạng thái và kết quả nằm trong jobs_dir nên get và cancel
+    dùng được từ mọi worker dùng chung thư mục.
+    """
+
+    def __init__(
+        self,
+        jobs_dir=DEFAULT_JOBS_DIR,
+        max_workers=DEFAULT_WORKERS,
+        max_pending=DEFAULT_MAX_PENDING,
+        ttl=DEFAULT_TTL,
+    ):
+        self.jobs_dir = Path(jobs_dir)
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, work):
+        """Đưa việc vào hàng đợi, trả về (việc, lỗi)."""
+        self._prune()
+        with self._lock:
+            pending = sum(
+                1 for job in self._jobs.values() if job.status not in FINISHED
+            )
+            if pending >= self.max_pending:
+                return None, "Hàng đợi đang đầy, vui lòng thử lại sau."
+            try:
+                ensure_private_dir(self.jobs_dir)
+            except OSError as e:
+                return None, f"Không thể tạo thư mục việc: {e}"
+            job = Job(uuid.uuid4().hex, kind, self.jobs_dir)
+            job.save()
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, work)
+        return job, None
+
+    def get(self, job_id):
+        """Việc của worker này, hoặc việc của worker khác đọc từ jobs_dir."""
+        # Mã việc là chuỗi hex của uuid; chặn mọi đường dẫn khác trước khi chạm tới file.
+        if not job_id.isalnum():
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job or Job.load(job_id, self.jobs_dir)
+
+    def cancel(self, job_id):
+        """Yêu cầu hủy việc; việc đang chờ bị hủy ngay, việc đang chạy dừng ở lần check kế tiếp."""
+        job = self.get(job_id)
+        if not job:
+            return None
+        if not job.owned:
+            # Worker chạy việc thấy file này ở lần check kế tiếp.
+            if job.status not in FINISHED:
+                job.cancel_path.touch()
+            return job
+        job.cancel_event.set()
+        with job.changed:
+            if job.status == QUEUED:
+                job.update(status=CANCELLED, stage="Đã hủy", finished=time.time())
+        return job
+
+    def _run(self, job, work):
+        with job.changed:
+            if job.status != QUEUED:
+                return
+            if job.cancelled:
+                # Bị hủy từ worker khác khi còn chờ.
+                job.update(status=CANCELLED, stage="Đã hủy", finished=time.time())
+                self._remove(job.cancel_path)
+                return
+            job.update(status=RUNNING, stage="Đang bắt đầu")
+
+        output_path = self.jobs_dir / f"{job.id}.part"
+        try:
+            mimetype, filename = work(job, output_path)
+            result_path = self.jobs_dir / job.id
+            os.replace(output_path, result_path)
+            job.update(
+                status=DONE,
+                stage="Hoàn tất",
+                result_path=result_path,
+                mimetype=mimetype,
+                filename=filename,
+                finished=time.time(),
+            )
+        except JobCancelled:
+            job.update(status=CANCELLED, stage="Đã hủy", finished=time.time())
+        except Exception as e:
+            job.update(status=FAILED, stage="Lỗi", error=str(e), finished=time.time())
+        finally:
+            self._remove(output_path)
+            self._remove(job.cancel_path)
+
+    def _prune(self):
+        """Xóa các việc đã kết thúc quá ttl cùng file kết quả của chúng.
+
+        Việc của worker khác cũng được dọn qua file trạng thái; file không được cập nhật
+        quá ttl (worker chạy việc đã dừng) bị xóa dù việc chưa kết thúc.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [
+                job
+                for job in self._jobs.values()
+                if job.finished and now - job.finished > self.ttl
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+            owned = set(self._jobs)
+        for job in expired:
+            self._remove_job(job)
+        try:
+            state_paths = list(self.jobs_dir.glob("*.json"))
+        except OSError:
+            return
+        for state_path in state_paths:
+            if state_path.stem in owned:
+                continue
+            job = Job.load(state_path.stem, self.jobs_dir)
+            try:
+                stale = now - state_path.stat().st_mtime > self.ttl
+            except OSError:
+                continue
+            if job and (stale or (job.finished and now - job.finished > self.ttl)):
+                self._remove_job(job)
+
+    def shutdown(self):
+        """Hủy mọi việc của hàng đợi này.
+
+        Trạng thái và kết quả của việc đã kết thúc được giữ lại: worker khác vẫn phục vụ
+        được chúng và _prune của các worker đó xóa chúng sau ttl.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self.cancel(job.id)
+        self._pool.shutdown(wait=True)
+        for job in jobs:
+            if job.status not in FINISHED:
+                self._remove_job(job)
+
+    def _remove_job(self, job):
+        if job.result_path:
+            self._remove(job.result_path)
+        self._remove(job.cancel_path)
+        self._remove(job.state_path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+job_queue = JobQueue()
+atexit.register(job_queue.shutdown)
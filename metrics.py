@@ -0,0 +1,177 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+PREFIX = "browser_data"
+# Ngưỡng (giây) của biểu đồ thời gian, từ truy vấn một trang tới sao chép file lớn.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Tên chỉ số -> (kiểu, mô tả, tên nhãn). Nhãn không được gán có giá trị "".
+METRICS = {
+    "stage_seconds": (
+        "histogram",
+        "Thời gian xử lý theo giai đoạn (giây).",
+        ("stage", "browser", "artifact"),
+    ),
+    "rows_total": (
+        "counter",
+        "Số bản ghi các module đọc đã tạo ra.",
+        ("browser", "artifact"),
+    ),
+    "snapshot_requests_total": (
+        "counter",
+        "Số lần lấy bản sao cơ sở dữ liệu, theo kết quả hit/miss của bộ nhớ đệm.",
+        ("browser", "result"),
+    ),
+    "copied_bytes_total": (
+        "counter",
+        "Số byte cơ sở dữ liệu đã sao chép sang thư mục tạm.",
+        ("browser",),
+    ),
+    "output_bytes_total": (
+        "counter",
+        "Số byte đã ghi ra file xuất dữ liệu.",
+        ("format",),
+    ),
+}
+
+# Nhãn chung của phạm vi hiện tại (ví dụ browser) và thời gian theo giai đoạn của yêu cầu
+# đang xử lý, dùng cho header Server-Timing.
+_labels = ContextVar("metrics_labels", default={})
+_timings = ContextVar("metrics_timings", default=None)
+_started = ContextVar("metrics_started", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Biểu đồ thời gian và bộ đếm trong bộ nhớ của tiến trình, xuất theo định dạng Prometheus.
+
+    Chỉ đo ở mức giai đoạn (một truy vấn, một khối fetchmany), không đo từng bản ghi, nên
+    chi phí không đáng kể trên đường xử lý chính.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._values = {name: {} for name in METRICS}
+        self._lock = threading.Lock()
+
+    def _key(self, name, labels):
+        scope = {**_labels.get(), **labels}
+        return tuple(str(scope.get(label, "")) for label in METRICS[name][2])
+
+    def observe(self, name, value, **labels):
+        """Ghi một giá trị vào biểu đồ name."""
+        key = self._key(name, labels)
+        with self._lock:
+            series = self._values[name].get(key)
+            if series is None:
+                series = self._values[name][key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def inc(self, name, amount=1, **labels):
+        """Tăng bộ đếm name."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[name][key] = self._values[name].get(key, 0) + amount
+
+    @contextmanager
+    def timed(self, stage, **labels):
+        """Đo thời gian khối lệnh vào stage_seconds và cộng vào Server-Timing của yêu cầu."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe("stage_seconds", elapsed, stage=stage, **labels)
+            timings = _timings.get()
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + elapsed
+
+    @contextmanager
+    def labels(self, **values):
+        """Gán nhãn chung (ví dụ browser) cho mọi phép đo bên trong khối lệnh."""
+        token = _labels.set({**_labels.get(), **values})
+        try:
+            yield
+        finally:
+            _labels.reset(token)
+
+    def current_labels(self):
+        """Nhãn chung hiện tại, để truyền tiếp cho bộ sinh chạy sau khi khối lệnh kết thúc."""
+        return dict(_labels.get())
+
+    def start_request(self):
+        """Bắt đầu ghi thời gian theo giai đoạn cho yêu cầu hiện tại."""
+        _timings.set({})
+        _started.set(time.perf_counter())
+
+    def server_timing(self):
+        """Giá trị header Server-Timing (mili giây) của yêu cầu hiện tại, hoặc None."""
+        timings = _timings.get()
+        started = _started.get()
+        if timings is None or started is None:
+            return None
+        entries = {**timings, "total": time.perf_counter() - started}
+        return ", ".join(
+            f"{stage};dur={elapsed * 1000:.2f}" for stage, elapsed in entries.items()
+        )
+
+    def render(self):
+        """Xuất mọi chỉ số theo định dạng văn bản của Prometheus."""
+        with self._lock:
+            values = {
+                name: {
+                    key: (
+                        [list(value[0]), value[1], value[2]]
+                        if isinstance(value, list)
+                        else value
+                    )
+                    for key, value in series.items()
+                }
+                for name, series in self._values.items()
+            }
+        lines = []
+        for name, (kind, description, label_names) in METRICS.items():
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for key, value in sorted(values[name].items()):
+                if kind == "counter":
+                    labels = _format_labels(label_names, key)
+                    lines.append(f"{metric}{labels} {_format_number(value)}")
+                    continue
+                buckets, total, count = value
+                cumulative = 0
+                for bound, bucket in zip(self.buckets, buckets):
+                    cumulative += bucket
+                    labels = _format_labels(label_names, key, f'le="{bound}"')
+                    lines.append(f"{metric}_bucket{labels} {cumulative}")
+                labels = _format_labels(label_names, key, 'le="+Inf"')
+                lines.append(f"{metric}_bucket{labels} {count}")
+                labels = _format_labels(label_names, key)
+                lines.append(f"{metric}_sum{labels} {_format_number(total)}")
+                lines.append(f"{metric}_count{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
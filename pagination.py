@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+import sqlite3
+
+END = "end"
+
+
+def encode_cursor(direction, keys):
+    """Mã hóa con trỏ phân trang thành chuỗi an toàn cho URL."""
+    payload = json.dumps({"d": direction, "k": keys}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Giải mã con trỏ phân trang, trả về (cursor, lỗi)."""
+    if not token:
+        return None, None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        return None, "Con trỏ phân trang không hợp lệ."
+    if (
+        not isinstance(cursor, dict)
+        or cursor.get("d") not in ("next", "prev")
+        or not isinstance(cursor.get("k"), dict)
+    ):
+        return None, "Con trỏ phân trang không hợp lệ."
+    for key in cursor["k"].values():
+        if key != END and not (isinstance(key, list) and len(key) in (2, 3)):
+            return None, "Con trỏ phân trang không hợp lệ."
+    return cursor, None
+
+
+def estimate_table_rows(cursor, table):
+    """Ước lượng nhanh số dòng của bảng từ sqlite_stat1, hoặc max(rowid) nếu chưa có thống kê."""
+    try:
+        cursor.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1",
+            (table,),
+        )
+        row = cursor.fetchone()
+        if row and row[0]:
+            return int(row[0].split()[0])
+    except (sqlite3.Error, ValueError):
+        pass
+    cursor.execute(f"SELECT max(rowid) FROM {table}")
+    return cursor.fetchone()[0] or 0
+
+
+class Seek:
+    """Mệnh đề WHERE/ORDER BY phân trang theo khóa (time, id) thay cho OFFSET.
+
+    Không có time_col thì sắp xếp theo id tăng dần; ngược lại theo (time, id) giảm dần.
+    Với cột thời gian có thể NULL, các dòng NULL nằm cuối giống ORDER BY ... DESC của SQLite.
+    inclusive=True lấy cả dòng có đúng khóa của con trỏ.
+    """
+
+    def __init__(
+        self,
+        page_cursor,
+        artifact,
+        time_col,
+        id_col,
+        offset=0,
+        nullable=False,
+        inclusive=False,
+    ):
+        self.time_col = time_col
+        self.id_col = id_col
+        self.key = None
+        self.backward = False
+        self.skip = False
+        self.offset = offset
+        if page_cursor:
+            key = page_cursor["k"].get(artifact, END)
+            self.skip = key == END
+            self.key = None if self.skip else key
+            self.backward = page_cursor["d"] == "prev"
+            self.offset = 0
+
+        condition, self.params = self._condition(nullable, inclusive)
+        self.where = f"AND {condition}" if condition else ""
+        self.order = self._order()
+
+    def _condition(self, nullable, inclusive):
+        if self.key is None:
+            return "", []
+        key_time, key_id = self.key[:2]
+        eq = "=" if inclusive else ""
+        if not self.time_col:
+            return f"{self.id_col} {'<' if self.backward else '>'}{eq} ?", [key_id]
+
+        t, i = self.time_col, self.id_col
+        if not self.backward:
+            if key_time is None:
+                return f"({t} IS NULL AND {i} <{eq} ?)", [key_id]
+            condition = f"({t}, {i}) <{eq} (?, ?)"
+            if nullable:
+                condition = f"({condition} OR {t} IS NULL)"
+            return condition, [key_time, key_id]
+
+        if key_time is None:
+            return f"({t} IS NOT NULL OR {i} >{eq} ?)", [key_id]
+        return f"({t}, {i}) >{eq} (?, ?)", [key_time, key_id]
+
+    def _order(self):
+        if not self.time_col:
+            return f"ORDER BY {self.id_col} {'DESC' if self.backward else 'ASC'}"
+        direction = "ASC" if self.backward else "DESC"
+        return f"ORDER BY {self.time_col} {direction}, {self.id_col} {direction}"
+
+    def arrange(self, rows):
+        """Đưa các dòng đọc theo chiều ngược về lại thứ tự hiển thị."""
+        if self.backward:
+            rows.reverse()
+        return rows
+
+    def bounds(self, rows, time_index, id_index):
+        """Khóa của dòng đầu/cuối trang để tạo con trỏ trước/sau."""
+        if not rows:
+            return {"first": None, "last": None, "count": 0}
+        first, last = rows[0], rows[-1]
+        return {
+            "first": [first[time_index] if self.time_col else None, first[id_index]],
+            "last": [last[time_index] if self.time_col else None, last[id_index]],
+            "count": len(rows),
+        }
+
+
+def page_cursors(bounds, page_cursor, items_per_page, page):
+    """Tạo con trỏ trang sau/trang trước từ khóa biên của từng loại dữ liệu."""
+    backward = bool(page_cursor) and page_cursor["d"] == "prev"
+    next_keys = {}
+    has_next = backward
+    for artifact, bound in bounds.items():
+        full = bound["count"] >= items_per_page
+        has_next = has_next or full
+        keep = bound["count"] > 0 if backward else full
+        next_keys[artifact] = bound["last"] if keep else END
+
+    prev_keys = {
+        artifact: bound["first"] if bound["count"] else END
+        for artifact, bound in bounds.items()
+    }
+    return (
+        encode_cursor("next", next_keys) if has_next and bounds else None,
+        encode_cursor("prev", prev_keys) if page > 1 and bounds else None,
+    )
@@ -0,0 +1,88 @@
+# "Tên miền" là tên miền đăng ký được (eTLD+1) của bản ghi, xem domains.
+COLUMNS = ["Loại", "URL", "Tiêu đề", "Số lần truy cập", "Thời gian", "Tên miền"]
+# Các định dạng có kiểu thêm dấu thời gian dạng microseconds Unix (UTC).
+TYPED_COLUMNS = COLUMNS + ["Dấu thời gian"]
+
+_RECORD_TYPES = {}
+
+
+class Record(tuple):
+    """Bản ghi gọn dựa trên tuple: giá trị theo thứ tự columns, không lưu tên cột mỗi dòng.
+
+    Vẫn đọc được theo tên cột như dict (record["URL"], get, keys, {**record}) nên các
+    bộ xuất và kho vụ việc dùng chung một kiểu bản ghi. Mỗi tập cột có một lớp con
+    riêng, lấy qua record_type.
+    """
+
+    __slots__ = ()
+    columns = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self.columns
+
+    def items(self):
+        return zip(self.columns, self)
+
+    def to_dict(self):
+        return dict(zip(self.columns, self))
+
+    def __reduce__(self):
+        return _rebuild, (self.columns, tuple(self))
+
+    def extend(self, columns, values):
+        """Bản ghi mới có thêm các cột ở cuối (ví dụ "Nguồn" của dòng thời gian)."""
+        return record_type((*self.columns, *columns))((*self, *values))
+
+
+def record_type(columns):
+    """Lớp bản ghi cho một tập cột, được tạo một lần rồi dùng lại."""
+    columns = tuple(columns)
+    cls = _RECORD_TYPES.get(columns)
+    if cls is None:
+        cls = type(
+            "Record",
+            (Record,),
+            {
+                "__slots__": (),
+                "columns": columns,
+                "_index": {name: i for i, name in enumerate(columns)},
+            },
+        )
+        _RECORD_TYPES[columns] = cls
+    return cls
+
+
+def _rebuild(columns, values):
+    return record_type(columns)(values)
+
+
+DisplayRecord = record_type(COLUMNS)
+TypedRecord = record_type(TYPED_COLUMNS)
+
+
+def as_dict(row):
+    """Chuyển bản ghi về dict (giữ nguyên nếu đã là dict)."""
+    return row.to_dict() if isinstance(row, Record) else row
+
+
+def to_columnar(rows):
+    """Dạng cột của một danh sách bản ghi: (tên cột, danh sách mảng giá trị).
+
+    Tên cột lấy từ bản ghi đầu tiên; mọi bản ghi trong một trang có cùng tập cột.
+    """
+    if not rows:
+        return list(COLUMNS), []
+    if not isinstance(rows[0], Record):
+        columns = list(rows[0])
+        return columns, [[row.get(name) for name in columns] for row in rows]
+    return list(rows[0].columns), [tuple(row) for row in rows]
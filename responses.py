@@ -0,0 +1,47 @@
+import gzip
+import hashlib
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Phản hồi nhỏ hơn ngưỡng này không đáng nén (header và CPU tốn hơn phần tiết kiệm được).
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(data):
+    """Mã hóa JSON thành bytes UTF-8: orjson nếu có, nếu không thì json gọn không thoát Unicode.
+
+    Không thoát Unicode giữ nguyên chữ tiếng Việt thay vì \\uXXXX nên phản hồi nhỏ hơn đáng kể.
+    """
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(*parts):
+    """ETag từ các thành phần ổn định (dấu vân tay nguồn, tham số truy vấn...)."""
+    key = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def compress(body, accept_encodings):
+    """Nén body theo Accept-Encoding của máy khách, trả về (body, Content-Encoding hoặc None).
+
+    accept_encodings là request.accept_encodings của werkzeug; brotli chỉ dùng khi đã cài.
+    """
+    if len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    if brotli and accept_encodings["br"]:
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if accept_encodings["gzip"]:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+    return body, None
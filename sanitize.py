@@ -0,0 +1,40 @@
+import unicodedata
+from functools import lru_cache
+
+MISSING_VALUE = "Không xác định"
+# Chỉ ghi nhớ chuỗi ngắn (host, tên cookie, tên trường...) để bộ nhớ đệm có giới hạn.
+MEMO_MAX_LENGTH = 256
+MEMO_SIZE = 65536
+
+
+class _NonPrintableTable(dict):
+    """Bảng str.translate tự điền: bỏ ký tự không in được, ghi nhớ kết quả theo mã ký tự."""
+
+    def __missing__(self, codepoint):
+        value = codepoint if chr(codepoint).isprintable() else None
+        self[codepoint] = value
+        return value
+
+
+_STRIP_TABLE = _NonPrintableTable()
+
+
+def _clean_text(s):
+    return unicodedata.normalize("NFKC", s).translate(_STRIP_TABLE)
+
+
+_clean_text_cached = lru_cache(maxsize=MEMO_SIZE)(_clean_text)
+
+
+def clean_string(s):
+    """Làm sạch chuỗi để tránh lỗi ký tự trong CSV."""
+    if s is None or (isinstance(s, float) and s != s):
+        return MISSING_VALUE
+    if not isinstance(s, str):
+        s = str(s)
+    # Chuỗi ASCII in được không thay đổi qua NFKC nên trả về ngay.
+    if s.isascii() and s.isprintable():
+        return s
+    if len(s) <= MEMO_MAX_LENGTH:
+        return _clean_text_cached(s)
+    return _clean_text(s)
@@ -0,0 +1,204 @@
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Kết quả đã tính được giữ tối đa chừng này giây kể từ lần ghi cuối.
+DEFAULT_RESULT_TTL = 60 * 60
+# Thời gian chờ (giây) khi worker khác đang ghi vào kho kết quả.
+BUSY_TIMEOUT = 5
+SECRET_SIZE = 32
+# Không đi theo liên kết tượng trưng khi mở file bí mật (không có trên Windows).
+O_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+
+def ensure_private_dir(path):
+    """Tạo thư mục chỉ người dùng hiện tại truy cập được, hoặc kiểm tra thư mục có sẵn.
+
+    Thư mục mặc định nằm trong thư mục tạm dùng chung nên người dùng khác có thể tạo sẵn
+    nó để đọc hay cài khóa bí mật và bản sao: báo PermissionError nếu thư mục là liên kết
+    tượng trưng hoặc không thuộc người dùng hiện tại. Thư mục của mình mà quyền quá rộng
+    thì được thu hẹp về 0700. Windows không có uid nên chỉ tạo thư mục.
+    """
+    path = Path(path)
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return path
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(
+            f"Thư mục bộ nhớ đệm không thuộc người dùng hiện tại: {path}. "
+            "Đặt SNAPSHOT_CACHE_DIR tới một thư mục riêng."
+        )
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+class FileLock:
+    """Khóa tư vấn giữa các tiến trình (flock) trên một file khóa, dạng chia sẻ hoặc độc quyền.
+
+    Các worker Gunicorn trên cùng máy dùng khóa này để phối hợp qua thư mục chung. Không
+    có fcntl (Windows) thì khóa không làm gì: khi đó ứng dụng chạy trong một tiến trình và
+    khóa trong tiến trình là đủ.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self, shared=False, blocking=True):
+        """Lấy (hoặc chuyển) khóa; trả về False nếu blocking=False và khóa đang bị giữ."""
+        if fcntl is None:
+            return True
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        while True:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(self._fd, flags)
+            except BlockingIOError:
+                # Không giữ file khóa mở khi không lấy được khóa, tránh rò rỉ mô tả file.
+                self.release()
+                return False
+            # Tiến trình khác có thể đã xóa file khóa giữa lúc mở và lúc khóa: mở lại.
+            try:
+                if os.fstat(self._fd).st_ino == os.stat(self.path).st_ino:
+                    return True
+            except FileNotFoundError:
+                pass
+            self.release()
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def remove(self):
+        """Xóa file khóa rồi nhả khóa; chỉ gọi khi đang giữ khóa độc quyền."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        self.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def load_secret(path, size=SECRET_SIZE):
+    """Khóa bí mật dùng chung cho mọi worker trên máy: đọc từ path, tạo mới nếu chưa có.
+
+    path phải nằm trong thư mục riêng (xem ensure_private_dir); file được tạo độc quyền
+    với quyền 0600 và không bao giờ đi theo liên kết tượng trưng.
+    """
+    ensure_private_dir(path.parent)
+    with FileLock(f"{path}.lock"):
+        try:
+            with os.fdopen(os.open(path, os.O_RDONLY | O_NOFOLLOW), "rb") as f:
+                secret = f.read()
+            if len(secret) == size:
+                return secret
+            # File hỏng (ví dụ ghi dở): tạo lại.
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        secret = os.urandom(size)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | O_NOFOLLOW, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(secret)
+        return secret
+
+
+class ResultStore:
+    """Kho kết quả đã tính (số bản ghi, thống kê, trang xem trước) dùng chung giữa các worker.
+
+    Lưu trong một file SQLite (WAL) cạnh các bản sao, khóa theo (phạm vi, khóa) với
+    phạm vi là dấu vân tay nguồn hoặc ETag nên không bao giờ trả về kết quả cũ. Giá trị
+    được mã hóa JSON. Đây là bộ nhớ đệm: lỗi SQLite chỉ làm mất kết quả, không làm hỏng
+    yêu cầu.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_RESULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            ensure_private_dir(self.path.parent)
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "scope TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "updated REAL NOT NULL, PRIMARY KEY (scope, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_updated ON results (updated)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _key(self, key):
+        return json.dumps(key, ensure_ascii=False, separators=(",", ":"), default=str)
+
+    def get(self, scope, key):
+        """Giá trị đã lưu, hoặc None nếu chưa có hoặc đã quá ttl."""
+        try:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT value FROM results WHERE scope = ? AND key = ? AND updated > ?",
+                    (scope, self._key(key), time.time() - self.ttl),
+                )
+                .fetchone()
+            )
+        except (sqlite3.Error, OSError):
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, scope, key, value):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (scope, self._key(key), value, time.time()),
+                )
+        except (sqlite3.Error, OSError):
+            pass
+
+    def prune(self):
+        """Xóa các kết quả quá ttl."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM results WHERE updated <= ?", (time.time() - self.ttl,)
+                )
+        except (sqlite3.Error, OSError):
+            pass
+
+    def clear(self):
+        """Xóa mọi kết quả (của mọi worker)."""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM results")
+        except (sqlite3.Error, OSError):
+            pass
@@ -0,0 +1,387 @@
+import atexit
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from metrics import metrics
+from shared_cache import FileLock, ResultStore, ensure_private_dir
+
+# Thư mục dùng chung của mọi worker trên máy: bản sao, file khóa và kho kết quả.
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("SNAPSHOT_CACHE_DIR")
+    or Path(tempfile.gettempdir()) / "browser_data_snapshots"
+)
+DEFAULT_MAX_ENTRIES = 8
+DEFAULT_TTL = 15 * 60  # giây
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+# Cách lấy bản sao: "copy" sao chép file, "backup" chụp qua backup API của SQLite (đọc cả
+# nội dung còn trong -wal), "immutable" đọc thẳng file nguồn không sao chép (chỉ dành cho
+# dữ liệu ngoại tuyến không còn thay đổi: SQLite bỏ qua khóa và file -wal).
+ACCESS_MODES = ("copy", "backup", "immutable")
+DEFAULT_ACCESS_MODE = os.environ.get("SNAPSHOT_MODE", "copy")
+# Tinh chỉnh kết nối chỉ đọc: ánh xạ bộ nhớ thay cho read() và bộ đệm trang lớn hơn mặc định.
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+
+
+def copy_db_to_temp(db_path, temp_dir=None):
+    """Sao chép cơ sở dữ liệu sang thư mục tạm."""
+    temp_dir = Path(temp_dir or tempfile.gettempdir())
+    temp_db = temp_dir / f"browser_data_{os.urandom(4).hex()}.db"
+    try:
+        shutil.copy2(db_path, temp_db)
+        return temp_db, None
+    except Exception as e:
+        return None, f"Không thể sao chép cơ sở dữ liệu: {e}"
+
+
+def backup_db_to_temp(db_path, temp_dir=None):
+    """Chụp cơ sở dữ liệu sang thư mục tạm bằng backup API của SQLite.
+
+    Khác với sao chép file, bản chụp nhất quán và gồm cả các trang còn nằm trong -wal.
+    """
+    temp_dir = Path(temp_dir or tempfile.gettempdir())
+    temp_db = temp_dir / f"browser_data_{os.urandom(4).hex()}.db"
+    source = None
+    target = None
+    try:
+        source = sqlite3.connect(
+            f"{Path(db_path).absolute().as_uri()}?mode=ro", uri=True
+        )
+        target = sqlite3.connect(temp_db)
+        source.backup(target)
+        # Bản chụp chỉ được đọc: bỏ chế độ WAL để không sinh -wal/-shm cạnh nó.
+        target.execute("PRAGMA journal_mode = DELETE")
+        return temp_db, None
+    except sqlite3.Error as e:
+        if target:
+            target.close()
+            target = None
+        remove_db_files(temp_db)
+        return None, f"Không thể chụp cơ sở dữ liệu: {e}"
+    finally:
+        if source:
+            source.close()
+        if target:
+            target.close()
+
+
+def snapshot_db(db_path, mode=DEFAULT_ACCESS_MODE, temp_dir=None):
+    """Tạo file để đọc theo mode, trả về (đường dẫn, có_phải_bản_sao, lỗi)."""
+    if mode == "immutable":
+        return Path(db_path), False, None
+    if mode == "backup":
+        temp_db, error = backup_db_to_temp(db_path, temp_dir)
+        if temp_db:
+            return temp_db, True, None
+        # Trình duyệt đang chạy có thể khóa độc quyền file: quay về sao chép thô.
+    temp_db, error = copy_db_to_temp(db_path, temp_dir)
+    return temp_db, True, error
+
+
+def connect_db(path, immutable=False, check_same_thread=True):
+    """Mở kết nối chỉ đọc tới bản sao hoặc (immutable) thẳng tới file nguồn."""
+    if immutable:
+        conn = sqlite3.connect(
+            f"{Path(path).absolute().as_uri()}?mode=ro&immutable=1",
+            uri=True,
+            check_same_thread=check_same_thread,
+        )
+    else:
+        conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    return conn
+
+
+def remove_db_files(path):
+    """Xóa file cơ sở dữ liệu tạm cùng các file -wal, -shm, -journal đi kèm."""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(f"{path}{suffix}")
+        except OSError:
+            pass
+
+
+def source_fingerprint(db_path):
+    """Tính dấu vân tay của file nguồn từ đường dẫn, kích thước và mtime.
+
+    Giao dịch đã commit nhưng còn nằm trong file -wal không đổi kích thước hay mtime của
+    file chính, nên kích thước và mtime của -wal (nếu có) cũng được tính vào. Kích thước
+    trả về là tổng của cả hai.
+    """
+    stat = os.stat(db_path)
+    key = f"{os.path.abspath(db_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    size = stat.st_size
+    try:
+        wal = os.stat(f"{db_path}-wal")
+    except FileNotFoundError:
+        pass
+    else:
+        key = f"{key}|{wal.st_size}|{wal.st_mtime_ns}"
+        size += wal.st_size
+    return hashlib.sha1(key.encode("utf-8")).hexdigest(), size
+
+
+class Snapshot:
+    """Một bản sao của cơ sở dữ liệu nguồn, dùng chung giữa các yêu cầu.
+
+    owned=False nghĩa là path chính là file nguồn (chế độ immutable): không chiếm dung
+    lượng bộ nhớ đệm và không bao giờ bị xóa. file_lock (khóa chia sẻ, xem
+    SnapshotCache) được giữ suốt thời gian tiến trình còn dùng bản sao để worker khác
+    không xóa nó.
+    """
+
+    def __init__(
+        self, source, path, fingerprint, size, owned=True, file_lock=None, store=None
+    ):
+        self.source = os.path.abspath(source)
+        self.path = path
+        self.owned = owned
+        self.file_lock = file_lock
+        self.store = store
+        self.fingerprint = fingerprint
+        self.size = size
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.refs = 0
+        self.cached = True
+        self.stale = False
+        # Kết quả đã tính trên bản sao (tổng số bản ghi, thống kê /analytics) theo khóa,
+        # hợp lệ chừng nào dấu vân tay còn đúng; xem result và store_result.
+        self.results = {}
+        self.counting = set()
+        self.lock = threading.Lock()
+
+    def result(self, key):
+        """Kết quả đã tính cho key trong tiến trình này hoặc ở worker khác, hoặc None."""
+        value = self.results.get(key)
+        if value is None and self.store:
+            value = self.store.get(self.fingerprint, key)
+            if value is not None:
+                self.results[key] = value
+        return value
+
+    def store_result(self, key, value):
+        """Lưu kết quả cho key, dùng chung với các worker khác qua kho kết quả."""
+        self.results[key] = value
+        if self.store:
+            self.store.set(self.fingerprint, key, value)
+        return value
+
+    def connect(self, check_same_thread=True):
+        """Mở kết nối chỉ đọc tới bản sao (xem connect_db)."""
+        return connect_db(
+            self.path, immutable=not self.owned, check_same_thread=check_same_thread
+        )
+
+
+class SnapshotCache:
+    """Bộ nhớ đệm bản sao theo (đường dẫn, kích thước, mtime) với LRU/TTL và giới hạn dung lượng.
+
+    mode là một trong ACCESS_MODES, quyết định cách tạo bản sao cho mọi nguồn.
+
+    Bản sao nằm ở cache_dir/<dấu vân tay>.db và dùng chung giữa các worker trên máy: worker
+    đầu tiên sao chép dưới khóa độc quyền của <dấu vân tay>.lock, các worker khác chờ rồi
+    dùng lại file. Mỗi tiến trình giữ khóa chia sẻ khi còn dùng bản sao và chỉ xóa file khi
+    lấy được khóa độc quyền, tức là không worker nào khác còn dùng. LRU/TTL và giới hạn dung
+    lượng được tính trong từng tiến trình. Kết quả đã tính nằm trong kho results (xem
+    shared_cache.ResultStore).
+    """
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        ttl=DEFAULT_TTL,
+        max_bytes=DEFAULT_MAX_BYTES,
+        mode=DEFAULT_ACCESS_MODE,
+    ):
+        if mode not in ACCESS_MODES:
+            raise ValueError(f"Chế độ truy cập không được hỗ trợ: {mode}")
+        self.cache_dir = Path(cache_dir)
+        self.mode = mode
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.results = ResultStore(self.cache_dir / "results.sqlite")
+
+    def acquire(self, db_path):
+        """Lấy bản sao cho db_path, chỉ sao chép khi nguồn thay đổi. Phải gọi release() sau khi dùng."""
+        try:
+            fingerprint, size = source_fingerprint(db_path)
+        except OSError as e:
+            return None, f"Không thể đọc thông tin cơ sở dữ liệu: {e}"
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(fingerprint, threading.Lock())
+
+        # Chỉ một luồng sao chép cho mỗi dấu vân tay, các luồng khác chờ và dùng lại.
+        with key_lock:
+            with self._lock:
+                snapshot = self._entries.get(fingerprint)
+                if snapshot and os.path.exists(snapshot.path):
+                    metrics.inc("snapshot_requests_total", result="hit")
+                    return self._checkout(snapshot), None
+                if snapshot:
+                    self._drop(snapshot)
+
+            try:
+                ensure_private_dir(self.cache_dir)
+            except OSError as e:
+                return None, f"Không thể tạo thư mục bộ nhớ đệm: {e}"
+            file_lock = None
+            if self.mode == "immutable":
+                temp_db, owned, error = snapshot_db(db_path, self.mode)
+                metrics.inc("snapshot_requests_total", result="miss")
+            else:
+                temp_db, file_lock, error = self._shared_copy(
+                    db_path, fingerprint, size
+                )
+                owned = True
+            if not temp_db:
+                return None, error
+
+            with self._lock:
+                self._key_locks.pop(fingerprint, None)
+                snapshot = Snapshot(
+                    db_path,
+                    temp_db,
+                    fingerprint,
+                    size,
+                    owned,
+                    file_lock,
+                    self.results,
+                )
+                if owned and size > self.max_bytes:
+                    # Lớn hơn toàn bộ ngân sách: dùng một lần rồi xóa.
+                    snapshot.cached = False
+                else:
+                    for other in list(self._entries.values()):
+                        if other.source == snapshot.source:
+                            self._invalidate(other)
+                    self._entries[fingerprint] = snapshot
+                # Giữ tham chiếu trước khi dọn để bản sao mới không bị chọn loại bỏ.
+                self._checkout(snapshot)
+                self._evict()
+                return snapshot, None
+
+    def _shared_copy(self, db_path, fingerprint, size):
+        """Lấy bản sao dùng chung cho fingerprint, chỉ sao chép nếu chưa worker nào làm.
+
+        Trả về (đường dẫn, khóa chia sẻ đang giữ, lỗi).
+        """
+        path = self.cache_dir / f"{fingerprint}.db"
+        file_lock = FileLock(self.cache_dir / f"{fingerprint}.lock")
+        try:
+            while True:
+                # Độc quyền khi kiểm tra và sao chép để chỉ một worker sao chép mỗi nguồn.
+                file_lock.acquire()
+                if path.exists():
+                    result = "shared"
+                else:
+                    with metrics.timed("copy"):
+                        temp_db, _, error = snapshot_db(
+                            db_path, self.mode, self.cache_dir
+                        )
+                    if not temp_db:
+                        file_lock.release()
+                        return None, None, error
+                    os.replace(temp_db, path)
+                    metrics.inc("copied_bytes_total", size)
+                    result = "miss"
+                    # Bản sao mới: dịp dọn các kết quả đã quá hạn trong kho dùng chung.
+                    self.results.prune()
+                # Hạ xuống khóa chia sẻ; việc chuyển khóa không nguyên tử nên kiểm tra lại
+                # file còn đó (worker khác có thể vừa xóa bản sao cũ của nó).
+                file_lock.acquire(shared=True)
+                if path.exists():
+                    metrics.inc("snapshot_requests_total", result=result)
+                    return path, file_lock, None
+        except OSError as e:
+            file_lock.release()
+            return None, None, f"Không thể tạo bản sao dùng chung: {e}"
+
+    def retain(self, snapshot):
+        """Giữ thêm một tham chiếu tới bản sao (ví dụ cho luồng chạy nền)."""
+        with self._lock:
+            snapshot.refs += 1
+            snapshot.last_used = time.monotonic()
+
+    def release(self, snapshot):
+        """Trả lại bản sao; xóa ngay nếu nó không còn được lưu trong bộ nhớ đệm."""
+        with self._lock:
+            snapshot.refs = max(snapshot.refs - 1, 0)
+            snapshot.last_used = time.monotonic()
+            if snapshot.refs == 0 and (snapshot.stale or not snapshot.cached):
+                self._remove_file(snapshot)
+            self._evict()
+
+    def clear(self):
+        """Xóa mọi bản sao không còn được sử dụng."""
+        with self._lock:
+            for snapshot in list(self._entries.values()):
+                self._invalidate(snapshot)
+
+    def total_bytes(self):
+        return sum(s.size for s in self._entries.values() if s.owned)
+
+    def _checkout(self, snapshot):
+        snapshot.refs += 1
+        snapshot.last_used = time.monotonic()
+        if snapshot.cached:
+            self._entries.move_to_end(snapshot.fingerprint)
+        return snapshot
+
+    def _evict(self):
+        now = time.monotonic()
+        for snapshot in list(self._entries.values()):
+            if snapshot.refs == 0 and now - snapshot.last_used > self.ttl:
+                self._drop(snapshot)
+
+        # Duyệt theo thứ tự LRU, bỏ qua các bản sao đang được đọc.
+        for snapshot in list(self._entries.values()):
+            if (
+                len(self._entries) <= self.max_entries
+                and self.total_bytes() <= self.max_bytes
+            ):
+                break
+            if snapshot.refs == 0:
+                self._drop(snapshot)
+
+    def _invalidate(self, snapshot):
+        self._entries.pop(snapshot.fingerprint, None)
+        snapshot.stale = True
+        if snapshot.refs == 0:
+            self._remove_file(snapshot)
+
+    def _drop(self, snapshot):
+        self._entries.pop(snapshot.fingerprint, None)
+        self._remove_file(snapshot)
+
+    def _remove_file(self, snapshot):
+        if not snapshot.owned:
+            return
+        file_lock = snapshot.file_lock
+        if not file_lock:
+            remove_db_files(snapshot.path)
+            return
+        # Nhả khóa chia sẻ của tiến trình này; chỉ xóa khi không worker nào khác còn giữ.
+        file_lock.release()
+        if file_lock.acquire(blocking=False):
+            remove_db_files(snapshot.path)
+            file_lock.remove()
+
+
+snapshot_cache = SnapshotCache()
+atexit.register(snapshot_cache.clear)
@@ -1,7 +1,45 @@
-let currentPage = 1;
-const itemsPerPage = 20;
+const DEFAULT_PAGE_SIZE = 200;
+// Chiều cao hàng dùng tạm trước khi đo được hàng thật đầu tiên.
+const ESTIMATED_ROW_HEIGHT = 53;
+// Số hàng vẽ thêm trên và dưới vùng nhìn thấy để cuộn nhanh không lộ khoảng trắng.
+const OVERSCAN_ROWS = 10;
+// Còn ít hơn số hàng này phía dưới vùng nhìn thấy thì tải trước khối kế tiếp.
+const PREFETCH_ROWS = 100;
 
-async function fetchData(endpoint, page = 1, method = 'POST') {
+// Bảng cuộn ảo: chỉ giữ các hàng đang nhìn thấy trong DOM, bản ghi được tải theo khối
+// (một "trang" page_size bản ghi của /preview) và lưu theo chỉ số toàn cục.
+const grid = {
+    pageSize: DEFAULT_PAGE_SIZE,
+    rows: [],
+    // /preview trả về dạng cột: tên cột một lần, mỗi hàng là mảng giá trị theo thứ tự đó.
+    columnIndex: {},
+    // Token đã ký của truy vấn (trình duyệt, giới hạn, loại dữ liệu, bộ lọc) do /preview trả
+    // về: các khối sau gửi kèm nên worker nào của máy chủ cũng phục vụ được.
+    query: null,
+    total: 0,
+    totalIsEstimate: false,
+    loaded: new Set(),
+    loading: new Map(),
+    cursors: new Map(),
+    // Dòng thời gian gộp ("Tất cả") chỉ phân trang được bằng con trỏ, không theo offset.
+    offsetPaging: true,
+    hideVisitCount: false,
+    rowHeight: 0,
+    generation: 0,
+    renderQueued: false
+};
+
+// Chỉ cho phép liên kết http(s): URL trong dữ liệu trình duyệt có thể là javascript: hay data:.
+function safeHref(value) {
+    try {
+        const url = new URL(value);
+        return url.protocol === 'http:' || url.protocol === 'https:' ? url.href : null;
+    } catch {
+        return null;
+    }
+}
+
+async function fetchData(endpoint) {
     const form = document.getElementById('browser-form');
     const previewSpinner = document.getElementById('preview-spinner');
     const downloadSpinner = document.getElementById('download-spinner');
@@ -10,20 +48,19 @@ async function fetchData(endpoint, page = 1, method = 'POST') {
     else if (endpoint === '/download') downloadSpinner.classList.remove('hidden');
 
     try {
-        let response;
-        if (method === 'POST') {
-            const formData = new FormData(form);
-            response = await fetch(endpoint, {
-                method: 'POST',
-                body: formData,
-                credentials: 'same-origin'
-            });
-        } else {
-            response = await fetch(`${endpoint}?page=${page}`, {
-                method: 'GET',
-                credentials: 'same-origin'
-            });
+        const formData = new FormData(form);
+        if (endpoint === '/preview') {
+            formData.append('estimate', '1');
+            formData.append('shape', 'columns');
         }
+        if (endpoint === '/download' && document.getElementById('export_all').checked) {
+            formData.set('limit', '0');
+        }
+        const response = await fetch(endpoint, {
+            method: 'POST',
+            body: formData,
+            credentials: 'same-origin'
+        });
 
         if (response.status === 405) {
             throw new Error('Phương thức HTTP không được phép. Vui lòng kiểm tra phương thức gửi yêu cầu.');
@@ -45,7 +82,7 @@ async function fetchData(endpoint, page = 1, method = 'POST') {
                 return null;
             }
             Toastify({
-                text: `<span style="color: white; margin-right: 8px;">✔</span>${endpoint === '/preview' ? "Xem trước dữ liệu thành công!" : "Tải xuống CSV thành công!"}`,
+                text: `<span style="color: white; margin-right: 8px;">✔</span>${endpoint === '/preview' ? "Xem trước dữ liệu thành công!" : "Tải xuống thành công!"}`,
                 duration: 3000,
                 gravity: "top",
                 position: "right",
@@ -64,7 +101,7 @@ async function fetchData(endpoint, page = 1, method = 'POST') {
             a.click();
             window.URL.revokeObjectURL(url);
             Toastify({
-                text: `<span style="color: white; margin-right: 8px;">✔</span>Tải xuống CSV thành công!`,
+                text: `<span style="color: white; margin-right: 8px;">✔</span>Tải xuống thành công!`,
                 duration: 3000,
                 gravity: "top",
                 position: "right",
@@ -93,49 +130,209 @@ async function fetchData(endpoint, page = 1, method = 'POST') {
     }
 }
 
-async function previewData(page, usePost = false) {
-    const method = usePost ? 'POST' : 'GET';
-    const data = await fetchData('/preview', page, method);
+function showErrorToast(message) {
+    Toastify({
+        text: `<span style="color: white; margin-right: 8px;">✖</span>Lỗi: ${message}`,
+        duration: 3000,
+        gravity: "top",
+        position: "right",
+        backgroundColor: "#EF4444",
+        className: "rounded-toast",
+        stopOnFocus: true,
+        escapeMarkup: false
+    }).showToast();
+}
+
+function readPageSize() {
+    const input = document.getElementById('page_size');
+    const value = parseInt(input.value, 10);
+    if (Number.isNaN(value)) return DEFAULT_PAGE_SIZE;
+    return Math.min(Math.max(value, parseInt(input.min, 10)), parseInt(input.max, 10));
+}
+
+async function previewData() {
+    const pageSize = readPageSize();
+    document.getElementById('page_size').value = pageSize;
+    const data = await fetchData('/preview');
     if (!data) return;
 
-    currentPage = page < 1 ? 1 : page;
+    const dataType = document.getElementById('data_type').value;
+    grid.generation += 1;
+    grid.pageSize = pageSize;
+    grid.rows = [];
+    grid.loaded = new Set();
+    grid.loading = new Map();
+    grid.cursors = new Map();
+    grid.query = data.query || null;
+    grid.offsetPaging = dataType !== 'all';
+    grid.hideVisitCount = ['cookies', 'logins', 'autofill'].includes(dataType);
+    storePage(1, data);
+
     const dataTable = document.getElementById('data-table');
-    const tbody = document.getElementById('data-body');
     const pagination = document.getElementById('pagination');
-    const pageInfo = document.getElementById('page-info');
     const visitCountHeader = document.querySelector('.visit-count-header');
-
     dataTable.classList.remove('hidden');
-    tbody.innerHTML = '';
     pagination.classList.remove('hidden');
+    visitCountHeader.style.display = grid.hideVisitCount ? 'none' : '';
+    document.getElementById('table-viewport').scrollTop = 0;
+    renderGrid();
+}
 
-    const dataType = document.getElementById('data_type').value;
-    const hideVisitCount = ['cookies', 'logins', 'autofill'].includes(dataType);
-    visitCountHeader.style.display = hideVisitCount ? 'none' : '';
-
-    data.data.forEach((row, index) => {
-        const rowIndex = (currentPage - 1) * itemsPerPage + index + 1;
-        const tr = document.createElement('tr');
-        const urlDisplay = row['URL'] === "Không có URL" ? row['URL'] : `<a href="${row['URL']}" target="_blank" class="text-blue-600 hover:underline">${row['URL']}</a>`;
-        tr.innerHTML = `
-            <td class="px-6 py-4">${rowIndex}</td>
-            <td class="px-6 py-4">${row['Loại']}</td>
-            <td class="px-6 py-4 truncate max-w-xs">${row['Tiêu đề']}</td>
-            <td class="px-6 py-4 truncate max-w-md">${urlDisplay}</td>
-            <td class="px-6 py-4 visit-count-cell" style="display: ${hideVisitCount ? 'none' : ''}">${row['Số lần truy cập'] || '-'}</td>
-            <td class="px-6 py-4">${row['Thời gian'] || '-'}</td>
-        `;
-        tbody.appendChild(tr);
+function storePage(page, data) {
+    const offset = (page - 1) * grid.pageSize;
+    grid.columnIndex = Object.fromEntries(data.columns.map((name, index) => [name, index]));
+    data.rows.forEach((row, index) => {
+        grid.rows[offset + index] = row;
     });
+    grid.loaded.add(page);
+    if (data.next_cursor) grid.cursors.set(page + 1, data.next_cursor);
+
+    if (data.total_is_estimate) {
+        grid.total = Math.max(data.total_records, offset + data.rows.length);
+        grid.totalIsEstimate = true;
+    } else {
+        grid.total = data.total_records;
+        grid.totalIsEstimate = false;
+    }
+    // Khối thiếu hàng hoặc không còn con trỏ kế tiếp là khối cuối: biết chính xác tổng số.
+    if (data.rows.length < grid.pageSize || !data.next_cursor) {
+        grid.total = Math.min(grid.total, offset + data.rows.length);
+        grid.totalIsEstimate = false;
+    }
+}
+
+function loadPage(page) {
+    // Không có con trỏ thì lùi về khối gần nhất tải được; khối đó xong sẽ mở đường cho khối sau.
+    while (page > 1 && !grid.offsetPaging && !grid.cursors.has(page)) page--;
+    if (grid.loaded.has(page) || grid.loading.has(page)) return;
+
+    const generation = grid.generation;
+    const params = new URLSearchParams({
+        page, page_size: grid.pageSize, estimate: '1', shape: 'columns'
+    });
+    const cursor = grid.cursors.get(page);
+    if (cursor) params.set('cursor', cursor);
+    if (grid.query) params.set('query', grid.query);
+
+    const request = fetch(`/preview?${params}`, { method: 'GET', credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(data => {
+            if (generation !== grid.generation) return;
+            if (data.error) throw new Error(data.error);
+            storePage(page, data);
+            scheduleRender();
+        })
+        .catch(error => {
+            if (generation === grid.generation) showErrorToast(error.message);
+        })
+        .finally(() => {
+            if (grid.loading.get(page) === request) grid.loading.delete(page);
+        });
+    grid.loading.set(page, request);
+}
+
+function scheduleRender() {
+    if (grid.renderQueued) return;
+    grid.renderQueued = true;
+    requestAnimationFrame(renderGrid);
+}
+
+function spacerRow(height) {
+    const tr = document.createElement('tr');
+    tr.className = 'grid-spacer';
+    tr.style.height = `${height}px`;
+    return tr;
+}
+
+function appendCell(tr, className, content) {
+    const td = document.createElement('td');
+    td.className = `px-6 py-4 whitespace-nowrap ${className}`;
+    if (content instanceof Node) td.appendChild(content);
+    else td.textContent = content;
+    tr.appendChild(td);
+    return td;
+}
+
+function buildRow(index, row) {
+    const tr = document.createElement('tr');
+    appendCell(tr, '', index + 1);
+    if (!row) {
+        const loading = appendCell(tr, 'text-gray-400', 'Đang tải...');
+        loading.colSpan = grid.hideVisitCount ? 4 : 5;
+        return tr;
+    }
+    const value = name => row[grid.columnIndex[name]];
+    appendCell(tr, '', value('Loại'));
+    appendCell(tr, 'truncate max-w-xs', value('Tiêu đề'));
+    let url = value('URL');
+    const href = safeHref(url);
+    if (href) {
+        url = document.createElement('a');
+        url.href = href;
+        url.rel = 'noopener noreferrer';
+        url.target = '_blank';
+        url.className = 'text-blue-600 hover:underline';
+        url.textContent = value('URL');
+    }
+    appendCell(tr, 'truncate max-w-md', url);
+    const visitCount = appendCell(tr, 'visit-count-cell', value('Số lần truy cập') || '-');
+    if (grid.hideVisitCount) visitCount.style.display = 'none';
+    appendCell(tr, '', value('Thời gian') || '-');
+    return tr;
+}
+
+function renderGrid() {
+    grid.renderQueued = false;
+    // Chưa xem trước lần nào: chưa có phiên để tải dữ liệu.
+    if (!grid.generation) return;
+    const viewport = document.getElementById('table-viewport');
+    const tbody = document.getElementById('data-body');
+    const rowHeight = grid.rowHeight || ESTIMATED_ROW_HEIGHT;
+    const headerHeight = document.querySelector('#data-table thead').offsetHeight;
+
+    const scrolled = Math.max(viewport.scrollTop - headerHeight, 0);
+    let first = Math.min(Math.max(Math.floor(scrolled / rowHeight) - OVERSCAN_ROWS, 0), grid.total);
+    // Bắt đầu từ hàng chẵn để màu xen kẽ (tr:nth-child) không đổi khi cuộn.
+    first -= first % 2;
+    const visible = Math.ceil(viewport.clientHeight / rowHeight);
+    const last = Math.min(first + visible + 2 * OVERSCAN_ROWS, grid.total);
+
+    const fragment = document.createDocumentFragment();
+    fragment.appendChild(spacerRow(first * rowHeight));
+    for (let index = first; index < last; index++) {
+        fragment.appendChild(buildRow(index, grid.rows[index]));
+    }
+    fragment.appendChild(spacerRow((grid.total - last) * rowHeight));
+    tbody.replaceChildren(fragment);
+
+    // Đo chiều cao hàng thật một lần rồi vẽ lại với vị trí chính xác.
+    if (!grid.rowHeight && last > first) {
+        grid.rowHeight = tbody.children[1].offsetHeight || ESTIMATED_ROW_HEIGHT;
+        if (grid.rowHeight !== rowHeight) scheduleRender();
+    }
+
+    const firstPage = Math.floor(first / grid.pageSize) + 1;
+    const lastPage = Math.floor(Math.max(last - 1, first) / grid.pageSize) + 1;
+    for (let page = firstPage; page <= lastPage; page++) loadPage(page);
+    const prefetchPage = Math.floor((last + PREFETCH_ROWS) / grid.pageSize) + 1;
+    if (prefetchPage > lastPage && (prefetchPage - 1) * grid.pageSize < grid.total) {
+        loadPage(prefetchPage);
+    }
+
+    const pageInfo = document.getElementById('page-info');
+    // Tổng số ước lượng được thay bằng số chính xác khi các khối sau được tải.
+    pageInfo.textContent = `Bản ghi ${last ? first + 1 : 0}–${last} / ${grid.totalIsEstimate ? '~' : ''}${grid.total}`;
+    document.getElementById('prev-page').disabled = viewport.scrollTop <= 0;
+    document.getElementById('next-page').disabled = last >= grid.total && !grid.totalIsEstimate;
+}
 
-    const totalPages = data.total_pages;
-    pageInfo.textContent = `Trang ${currentPage} / ${totalPages}`;
-    document.getElementById('prev-page').disabled = currentPage === 1;
-    document.getElementById('next-page').disabled = currentPage === totalPages;
+function scrollGrid(direction) {
+    const viewport = document.getElementById('table-viewport');
+    viewport.scrollBy({ top: direction * viewport.clientHeight * 0.9 });
 }
 
 async function downloadData() {
-    await fetchData('/download', 1, 'POST');
+    await fetchData('/download');
 }
 
 function updateDataTypeWarning() {
@@ -167,6 +364,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const downloadBtn = document.getElementById('download-btn');
     const prevPageBtn = document.getElementById('prev-page');
     const nextPageBtn = document.getElementById('next-page');
+    const viewport = document.getElementById('table-viewport');
     const form = document.getElementById('browser-form');
 
     browserSelect.addEventListener('change', updateDataTypeWarning);
@@ -176,10 +374,12 @@ document.addEventListener('DOMContentLoaded', () => {
         event.preventDefault();
     });
 
-    previewBtn.addEventListener('click', () => previewData(1, true));
+    previewBtn.addEventListener('click', previewData);
     downloadBtn.addEventListener('click', downloadData);
-    prevPageBtn.addEventListener('click', () => previewData(currentPage - 1));
-    nextPageBtn.addEventListener('click', () => previewData(currentPage + 1));
+    prevPageBtn.addEventListener('click', () => scrollGrid(-1));
+    nextPageBtn.addEventListener('click', () => scrollGrid(1));
+    viewport.addEventListener('scroll', scheduleRender, { passive: true });
+    window.addEventListener('resize', scheduleRender);
 
     updateDataTypeWarning();
 
@@ -0,0 +1,62 @@
+# Số giây giữa mốc Chromium (1601-01-01) và mốc Unix (1970-01-01).
+CHROME_EPOCH_OFFSET = 11644473600
+# Chỉ giữ thời gian trong khoảng năm 2000-2030, ngoài khoảng này coi như không hợp lệ.
+WINDOW_START = 946684800  # 2000-01-01 00:00:00
+WINDOW_END = 1924992000  # 2031-01-01 00:00:00
+TIME_FORMAT = "%m/%d/%Y %H:%M:%S"
+
+
+def format_unix_seconds_sql(seconds):
+    """Biểu thức SQL định dạng số giây Unix, trả về chuỗi rỗng nếu ngoài khoảng 2000-2030."""
+    return (
+        f"CASE WHEN {seconds} >= {WINDOW_START} AND {seconds} < {WINDOW_END} "
+        f"THEN strftime('{TIME_FORMAT}', {seconds}, 'unixepoch') ELSE '' END"
+    )
+
+
+def chrome_time_sql(column):
+    """Định dạng thời gian Chromium (microseconds từ 1601-01-01)."""
+    return format_unix_seconds_sql(f"({column} / 1000000 - {CHROME_EPOCH_OFFSET})")
+
+
+def firefox_time_sql(column):
+    """Định dạng thời gian Firefox (microseconds từ 1970-01-01)."""
+    return format_unix_seconds_sql(f"({column} / 1000000)")
+
+
+def local_seconds_sql(column, default="Không có thời gian"):
+    """Định dạng số giây Unix theo giờ địa phương, không giới hạn khoảng năm."""
+    return (
+        f"CASE WHEN {column} THEN coalesce(strftime('{TIME_FORMAT}', {column}, "
+        f"'unixepoch', 'localtime'), '{default}') ELSE '{default}' END"
+    )
+
+
+def chrome_unix_micros_sql(column):
+    """Thời gian Chromium quy về microseconds Unix (UTC), NULL nếu không hợp lệ."""
+    return f"CASE WHEN {column} > 0 THEN {column} - {CHROME_EPOCH_OFFSET * 1000000} END"
+
+
+def firefox_unix_micros_sql(column):
+    """Thời gian Firefox vốn đã là microseconds Unix (UTC), NULL nếu không hợp lệ."""
+    return f"CASE WHEN {column} > 0 THEN {column} END"
+
+
+def unix_seconds_micros_sql(column):
+    """Số giây Unix quy về microseconds Unix, NULL nếu không hợp lệ."""
+    return f"CASE WHEN {column} > 0 THEN {column} * 1000000 END"
+
+
+def chrome_from_unix_micros(micros):
+    """Microseconds Unix đổi ngược về thời gian Chromium, để lọc trực tiếp trên cột gốc."""
+    return micros + CHROME_EPOCH_OFFSET * 1000000
+
+
+def firefox_from_unix_micros(micros):
+    """Thời gian Firefox vốn là microseconds Unix."""
+    return micros
+
+
+def unix_seconds_from_micros(micros):
+    """Microseconds Unix đổi về số giây (làm tròn lên, giữ đúng so sánh >= và <)."""
+    return -(-micros // 1000000)
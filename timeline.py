@@ -0,0 +1,214 @@
+import heapq
+from itertools import islice
+from artifact_reader import list_tables, select_artifacts
+from metrics import metrics
+from pagination import Seek, encode_cursor
+
+# Vị trí của một nguồn trong con trỏ là một "khe" giữa hai dòng liền kề:
+# [thời gian gốc, khóa, AFTER] nằm ngay sau dòng đó, [..., BEFORE] nằm ngay trước.
+# Không có khe nghĩa là nguồn còn ở đầu dòng thời gian.
+AFTER = 0
+BEFORE = 1
+
+
+class TimelineSource:
+    """Một cơ sở dữ liệu tham gia dòng thời gian gộp.
+
+    name phải ổn định giữa các yêu cầu vì được dùng làm khóa trong con trỏ;
+    label (nếu có) được thêm vào mỗi bản ghi dưới cột "Nguồn"; conditions là điều kiện
+    lọc (where, tham số) của từng loại dữ liệu, xem Artifact.filter_sql.
+    """
+
+    def __init__(self, name, cursor, artifacts, label=None, conditions=None):
+        self.name = name
+        self.cursor = cursor
+        self.artifacts = artifacts
+        self.label = label
+        self.conditions = conditions or [("", ())] * len(artifacts)
+
+    def key(self, artifact):
+        return f"{self.name}:{artifact.name}"
+
+
+def timeline_source(name, cursor, artifacts, db_type, label=None, filters=None):
+    """Tạo nguồn từ các loại dữ liệu của db_type có bảng tồn tại trong cơ sở dữ liệu.
+
+    Loại dữ liệu không thể thỏa bộ lọc bị loại khỏi nguồn.
+    """
+    tables = list_tables(cursor)
+    available = []
+    conditions = []
+    for artifact in select_artifacts(artifacts, db_type, "all"):
+        if not all(table in tables for table in artifact.tables):
+            continue
+        condition = artifact.filter_sql(filters)
+        if condition is not None:
+            available.append(artifact)
+            conditions.append(condition)
+    return TimelineSource(name, cursor, available, label, conditions)
+
+
+def _seek(artifact, gap, backward):
+    # Mọi loại dữ liệu sắp theo (thời gian, khóa) giảm dần; không có cột thời gian
+    # thì dùng hằng NULL để chỉ còn sắp theo khóa.
+    time_col = artifact.timeline_time or "NULL"
+    nullable = artifact.nullable_time or not artifact.timeline_time
+    if gap is None:
+        page_cursor = {"d": "prev", "k": {}} if backward else None
+        return Seek(
+            page_cursor, artifact.name, time_col, artifact.key, nullable=nullable
+        )
+    page_cursor = {"d": "prev" if backward else "next", "k": {artifact.name: gap}}
+    return Seek(
+        page_cursor,
+        artifact.name,
+        time_col,
+        artifact.key,
+        nullable=nullable,
+        inclusive=bool(gap[2]) != backward,
+    )
+
+
+def _fetch(source, rank, gaps, limit, backward):
+    """Đọc tối đa limit khóa kế tiếp của một nguồn bằng một truy vấn UNION ALL."""
+    branches = []
+    params = []
+    for index, artifact in enumerate(source.artifacts):
+        seek = _seek(artifact, gaps.get(source.key(artifact)), backward)
+        if seek.skip:
+            continue
+        where, filter_params = source.conditions[index]
+        # Mỗi nhánh tự sắp xếp và giới hạn trên chỉ số của cột thời gian.
+        branches.append(
+            f"SELECT {index}, * FROM "
+            f"({artifact.timeline_sql} {where} {seek.where} {seek.order} LIMIT ?)"
+        )
+        params.extend([*filter_params, *seek.params, limit])
+    if not branches:
+        return []
+    direction = "ASC" if backward else "DESC"
+    sql = (
+        " UNION ALL ".join(branches)
+        + f" ORDER BY 2 {direction}, 3 {direction}, 4 {direction},"
+        + f" 1 {'DESC' if backward else 'ASC'} LIMIT ?"
+    )
+    source.cursor.execute(sql, (*params, limit))
+    return [(rank, *row) for row in source.cursor.fetchall()]
+
+
+def _order_key(entry):
+    """Thứ tự toàn cục: thời gian Unix giảm dần (NULL cuối), rồi thời gian gốc, khóa, nguồn.
+
+    Trong một loại dữ liệu, thời gian Unix tăng theo thời gian gốc nên thứ tự này
+    trùng với thứ tự của từng nhánh SQL, cho phép gộp k nguồn đã sắp sẵn.
+    """
+    rank, index, unix_time, time, key = entry
+    return (
+        unix_time is None,
+        -unix_time if unix_time is not None else 0,
+        time is None,
+        -time if time is not None else 0,
+        -key,
+        rank,
+        index,
+    )
+
+
+def _build_rows(sources, entries, typed=False):
+    """Lấy đủ cột cho các dòng được chọn theo khóa, mỗi loại dữ liệu một truy vấn."""
+    wanted = {}
+    for rank, index, _, _, key in entries:
+        wanted.setdefault((rank, index), []).append(key)
+
+    rows = {}
+    for (rank, index), keys in wanted.items():
+        source = sources[rank]
+        artifact = source.artifacts[index]
+        source.cursor.execute(
+            f"{artifact.select_sql} AND {artifact.key} IN ({', '.join('?' * len(keys))})",
+            keys,
+        )
+        for row in source.cursor.fetchall():
+            rows[(rank, index, row[artifact.key_index])] = row
+
+    all_data = []
+    for rank, index, _, _, key in entries:
+        source = sources[rank]
+        record = source.artifacts[index].build_row(rows[(rank, index, key)], typed)
+        if source.label:
+            record = record.extend(("Nguồn",), (source.label,))
+        all_data.append(record)
+    return all_data
+
+
+def read_timeline(sources, items_per_page, page_cursor=None, page=1):
+    """Đọc một trang của dòng thời gian gộp mọi loại dữ liệu trên nhiều nguồn.
+
+    Mỗi nguồn đọc tối đa một trang (thêm một dòng để biết còn dữ liệu) rồi được gộp
+    k đường bằng heapq. Trả về (bản ghi, con trỏ trang sau, con trỏ trang trước).
+    """
+    backward = bool(page_cursor) and page_cursor["d"] == "prev"
+    gaps = page_cursor["k"] if page_cursor else {}
+
+    with metrics.timed("query", artifact="timeline"):
+        fetched = [
+            _fetch(source, rank, gaps, items_per_page + 1, backward)
+            for rank, source in enumerate(sources)
+        ]
+    merged = heapq.merge(*fetched, key=_order_key, reverse=backward)
+    entries = list(islice(merged, items_per_page))
+    more = sum(map(len, fetched)) > len(entries)
+    if backward:
+        entries.reverse()
+
+    next_gaps = dict(gaps)
+    prev_gaps = dict(gaps)
+    for rank, index, _, time, key in entries:
+        name = sources[rank].key(sources[rank].artifacts[index])
+        next_gaps[name] = [time, key, AFTER]
+    for rank, index, _, time, key in reversed(entries):
+        name = sources[rank].key(sources[rank].artifacts[index])
+        prev_gaps[name] = [time, key, BEFORE]
+
+    has_next = backward or more
+    has_prev = more if backward else page > 1
+    with metrics.timed("build", artifact="timeline"):
+        all_data = _build_rows(sources, entries)
+    metrics.inc("rows_total", len(all_data), artifact="timeline")
+    return (
+        all_data,
+        encode_cursor("next", next_gaps) if has_next and entries else None,
+        encode_cursor("prev", prev_gaps) if has_prev and entries else None,
+    )
+
+
+def iter_timeline(sources, limit=None, batch_size=1000, typed=False):
+    """Duyệt dòng thời gian gộp (tối đa limit bản ghi) theo thứ tự của read_timeline.
+
+    Mỗi khối batch_size dòng là một lượt đọc theo con trỏ như một trang xem trước, nên
+    bản xuất luôn trùng với những gì /preview hiển thị.
+    """
+    gaps = {}
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        with metrics.timed("query", artifact="timeline"):
+            fetched = [
+                _fetch(source, rank, gaps, size, False)
+                for rank, source in enumerate(sources)
+            ]
+        entries = list(islice(heapq.merge(*fetched, key=_order_key), size))
+        if not entries:
+            return
+        for rank, index, _, time, key in entries:
+            name = sources[rank].key(sources[rank].artifacts[index])
+            gaps[name] = [time, key, AFTER]
+        with metrics.timed("build", artifact="timeline"):
+            records = _build_rows(sources, entries, typed)
+        metrics.inc("rows_total", len(records), artifact="timeline")
+        yield from records
+        if remaining is not None:
+            remaining -= len(records)
+        # Ít hơn size dòng nghĩa là mọi nguồn đều đã hết dữ liệu.
+        if len(entries) < size:
+            return